@@ -0,0 +1,66 @@
+import os
+
+from backend.database.db import DATABASE_URL, apply_sqlite_pragmas, engine_options
+
+
+# =====================================================
+# Async Database Mode
+# =====================================================
+# IDS_ASYNC_MODE=1 serves detect, logs, notifications and analytics
+# from `async def` handlers on an async engine (aiosqlite for SQLite,
+# asyncpg for Postgres), so slow queries wait on the event loop
+# instead of holding one of the server's worker threads.
+#
+# Query code is shared with the sync routes: each handler's body is
+# a plain function taking a Session, run here through run_sync().
+
+ASYNC_MODE = os.getenv("IDS_ASYNC_MODE", "0").lower() in ("1", "true", "yes")
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_url(url: str) -> str:
+    """Swap a sync database URL's driver for its async counterpart."""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_sessionmaker():
+    """Create the async engine on first use (the driver is only needed in async mode)."""
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+        from sqlalchemy.orm import sessionmaker
+
+        url = async_url(DATABASE_URL)
+        _async_engine = create_async_engine(url, **engine_options(url, is_async=True))
+        apply_sqlite_pragmas(_async_engine.sync_engine)
+        _AsyncSessionLocal = sessionmaker(
+            bind=_async_engine,
+            class_=AsyncSession,
+            autocommit=False,
+            autoflush=False,
+        )
+    return _AsyncSessionLocal
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run fn(session, *args, **kwargs) in a fresh async session."""
+    async with get_async_sessionmaker()() as session:
+        return await session.run_sync(fn, *args, **kwargs)
+
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
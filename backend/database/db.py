@@ -1,13 +1,107 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-DATABASE_URL = "sqlite:///./ids_logs.db"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# =====================================================
+# Database Config
+# =====================================================
+# DATABASE_URL selects the backend; SQLite (default) and Postgres
+# use the same models.
+#
+# SQLite connections get these pragmas (WAL lets dashboard reads
+# run alongside the log writer instead of waiting on its lock):
+#   IDS_SQLITE_AUTO_VACUUM      INCREMENTAL (new databases only) so space freed
+#                               by retention / purges can be returned to the OS
+#   IDS_SQLITE_JOURNAL_MODE     WAL
+#   IDS_SQLITE_SYNCHRONOUS      NORMAL (durable at checkpoints under WAL)
+#   IDS_SQLITE_BUSY_TIMEOUT_MS  wait this long on a lock before "database is locked"
+#   IDS_SQLITE_MMAP_SIZE        bytes of the file to memory-map
+#   IDS_SQLITE_CACHE_SIZE       page cache; negative = KiB
+#
+# Postgres sessions run with TimeZone=UTC: timestamps are bound as
+# naive UTC datetimes, and a timestamptz column reads those in the
+# session's zone (day partition bounds are UTC midnights).
+#
+# Connection pool (file SQLite and Postgres):
+#   IDS_DB_POOL_SIZE, IDS_DB_MAX_OVERFLOW, IDS_DB_POOL_TIMEOUT,
+#   IDS_DB_POOL_RECYCLE (seconds before a connection is replaced)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ids_logs.db")
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
+
+SQLITE_PRAGMAS = {
+    "auto_vacuum": os.getenv("IDS_SQLITE_AUTO_VACUUM", "INCREMENTAL"),
+    "journal_mode": os.getenv("IDS_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("IDS_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("IDS_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("IDS_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("IDS_SQLITE_CACHE_SIZE", "-65536")),
+}
+
+POOL_SIZE = int(os.getenv("IDS_DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("IDS_DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("IDS_DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("IDS_DB_POOL_RECYCLE", "1800"))
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return is_sqlite(url) and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine() keyword arguments for a database URL."""
+    if _is_memory_sqlite(url):
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+
+    options = {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": not is_sqlite(url),
+    }
+    if not is_sqlite(url):
+        # libpq drivers take server settings as options, asyncpg as server_settings
+        options["connect_args"] = (
+            {"server_settings": {"timezone": "UTC"}} if is_async else {"options": "-c timezone=UTC"}
+        )
+    if is_sqlite(url):
+        # Some SQLAlchemy versions default file databases to NullPool (reconnect + pragmas per session)
+        options["poolclass"] = AsyncAdaptedQueuePool if is_async else QueuePool
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def apply_sqlite_pragmas(sync_engine):
+    """Run SQLITE_PRAGMAS on every new DBAPI connection of a SQLite engine."""
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def make_engine(url: str = DATABASE_URL):
+    engine = create_engine(url, **engine_options(url))
+    apply_sqlite_pragmas(engine)
+    return engine
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -16,3 +110,36 @@ SessionLocal = sessionmaker(
 )
 
 Base = declarative_base()
+
+
+def database_size_mb(db) -> float:
+    """On-disk size of the database (SQLite file + WAL, or the Postgres database)."""
+    bind = db.get_bind()
+    if bind.dialect.name == "sqlite":
+        path = bind.url.database
+        if not path or path == ":memory:":
+            return 0.0
+        size = sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+        return size / (1024 ** 2)
+    if bind.dialect.name == "postgresql":
+        return (db.execute(text("SELECT pg_database_size(current_database())")).scalar() or 0) / (1024 ** 2)
+    return 0.0
+
+
+def reclaim_space(bind=None, pages: int = None) -> bool:
+    """
+    Return free SQLite pages to the OS with an incremental vacuum.
+
+    Needs auto_vacuum=INCREMENTAL (migration 9 rebuilds older SQLite
+    files with it); otherwise, and on Postgres, where autovacuum handles
+    it, this is a no-op.
+    """
+    bind = bind or engine
+    if bind.dialect.name != "sqlite":
+        return False
+    with bind.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:  # 2 = INCREMENTAL
+            return False
+        # Each step of the pragma frees one page; executescript() runs it to completion
+        conn.connection.executescript(f"PRAGMA incremental_vacuum({pages or 0});")
+    return True
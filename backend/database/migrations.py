@@ -0,0 +1,275 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+from backend.database.db import SQLITE_PRAGMAS, engine
+from backend.database.partitions import create_partition, lock_for_write, log_ids, partition_table, refresh_view
+from backend.models.detection_log import DetectionLog
+from backend.models.notification import Notification
+from backend.models.rollup import DetectionRollup
+from backend.models.settings import SystemSettings
+from backend.services.rollups import rebuild_rollups
+
+
+# =====================================================
+# Schema Migrations
+# =====================================================
+# Startup applies every migration not yet recorded in schema_migrations,
+# in order, each in its own transaction. A migration is a function of
+# the open connection and must be safe on a database that already has
+# its changes (databases created before this table existed).
+#
+# Add changes by appending to MIGRATIONS; never edit a shipped one.
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# ===============================
+# HELPERS
+# ===============================
+def _add_column(conn, column):
+    """ALTER TABLE ... ADD COLUMN for a model column, unless it already exists."""
+    table = column.table
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    if column.name in existing:
+        return
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    conn.execute(text(ddl))
+    print(f"🔧 Added column {table.name}.{column.name}")
+
+
+def _create_index(conn, table, name):
+    """Create one of the indexes declared on a model's table."""
+    index = next(index for index in table.indexes if index.name == name)
+    index.create(bind=conn, checkfirst=True)
+
+
+# ===============================
+# MIGRATIONS
+# ===============================
+def _create_base_tables(conn):
+    for model in (DetectionLog, Notification, SystemSettings):
+        model.__table__.create(bind=conn, checkfirst=True)
+
+
+def _add_version_and_coalescing_columns(conn):
+    _add_column(conn, SystemSettings.__table__.c.version)
+    for name in ("count", "first_seen", "last_seen"):
+        _add_column(conn, Notification.__table__.c[name])
+
+
+def _add_query_indexes(conn):
+    # /logs, reports and exports sort by timestamp; analytics filters on
+    # result + timestamp and groups attack types and severities
+    for name in (
+        "ix_detection_logs_timestamp_id",
+        "ix_detection_logs_result_timestamp",
+        "ix_detection_logs_result_attack_type",
+        "ix_detection_logs_severity_confidence",
+    ):
+        _create_index(conn, DetectionLog.__table__, name)
+    # The notification list filters on is_read / type / severity, newest first
+    for name in (
+        "ix_notifications_timestamp_id",
+        "ix_notifications_is_read_timestamp",
+        "ix_notifications_type_timestamp",
+        "ix_notifications_severity_timestamp",
+    ):
+        _create_index(conn, Notification.__table__, name)
+
+
+def _normalize_sqlite_timestamps(conn):
+    # CURRENT_TIMESTAMP server defaults stored "YYYY-MM-DD HH:MM:SS" while
+    # SQLAlchemy binds "YYYY-MM-DD HH:MM:SS.ffffff". SQLite compares them as
+    # text, which breaks (timestamp, id) keyset cursors on those rows.
+    if conn.dialect.name != "sqlite":
+        return
+    for table in ("detection_logs", "notifications"):
+        conn.execute(text(
+            f"UPDATE {table} SET timestamp = timestamp || '.000000' WHERE length(timestamp) = 19"
+        ))
+
+
+def _create_rollups(conn):
+    DetectionRollup.__table__.create(bind=conn, checkfirst=True)
+    rows = rebuild_rollups(conn)
+    print(f"🔧 Rolled up {rows} existing detection logs")
+
+
+def _add_feature_vectors(conn):
+    _add_column(conn, DetectionLog.__table__.c.features)
+
+
+def _add_search_indexes(conn):
+    # /logs/search filters on any one of these plus a time range, newest first
+    for name in (
+        "ix_detection_logs_severity_timestamp",
+        "ix_detection_logs_attack_type_timestamp",
+        "ix_detection_logs_service_timestamp",
+        "ix_detection_logs_protocol_timestamp",
+        "ix_detection_logs_flag_timestamp",
+    ):
+        _create_index(conn, DetectionLog.__table__, name)
+
+
+def _partition_sqlite(conn):
+    log_ids.create(bind=conn, checkfirst=True)
+    # First DML: pysqlite opens the transaction here, so the DDL below is part of it
+    if conn.execute(select(func.count()).select_from(log_ids)).scalar() == 0:
+        conn.execute(log_ids.insert().values(id=1, last_id=0))
+    else:
+        lock_for_write(conn)
+    if conn.execute(text("SELECT type FROM sqlite_master WHERE name = 'detection_logs'")).scalar() == "view":
+        return
+
+    conn.execute(text("ALTER TABLE detection_logs RENAME TO detection_logs_unpartitioned"))
+    conn.execute(text(
+        "UPDATE detection_logs_unpartitioned SET timestamp = strftime('%Y-%m-%d %H:%M:%f', 'now') || '000' "
+        "WHERE timestamp IS NULL"
+    ))
+    days = sorted(
+        datetime.strptime(value, "%Y-%m-%d").date() for value in conn.execute(text(
+            "SELECT DISTINCT substr(timestamp, 1, 10) FROM detection_logs_unpartitioned"
+        )).scalars()
+    )
+    columns = ", ".join(column.name for column in DetectionLog.__table__.columns)
+    for day in days:
+        table = partition_table(day)
+        table.create(bind=conn, checkfirst=True)
+        # Timestamps are uniform text (migration 4), so a day is a prefix range
+        conn.execute(text(
+            f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM detection_logs_unpartitioned "
+            "WHERE timestamp >= :start AND timestamp < :end"
+        ), {"start": day.isoformat(), "end": (day + timedelta(days=1)).isoformat()})
+
+    last_id = conn.execute(text("SELECT max(id) FROM detection_logs_unpartitioned")).scalar() or 0
+    conn.execute(log_ids.update().where(log_ids.c.last_id < last_id).values(last_id=last_id))
+    conn.execute(text("DROP TABLE detection_logs_unpartitioned"))
+    refresh_view(conn, days)
+    print(f"🔧 Moved detection logs into {len(days)} day partition(s)")
+
+
+def _partition_postgres(conn):
+    partitioned = conn.execute(text(
+        "SELECT count(*) FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+        "WHERE pg_class.relname = 'detection_logs'"
+    )).scalar()
+    if partitioned:
+        return
+
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('detection_logs', 'id')")).scalar()
+    conn.execute(text("UPDATE detection_logs SET timestamp = now() WHERE timestamp IS NULL"))
+    conn.execute(text("ALTER TABLE detection_logs RENAME TO detection_logs_unpartitioned"))
+    # Free the index and constraint names for the partitioned table
+    for index in DetectionLog.__table__.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    primary_key = conn.execute(text(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = 'detection_logs_unpartitioned'::regclass AND contype = 'p'"
+    )).scalar()
+    if primary_key:
+        conn.execute(text(f"ALTER TABLE detection_logs_unpartitioned DROP CONSTRAINT {primary_key}"))
+    # Ids keep counting from the same sequence
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+
+    conn.execute(text(
+        "CREATE TABLE detection_logs (LIKE detection_logs_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (timestamp)"
+    ))
+    conn.execute(text("ALTER TABLE detection_logs ADD PRIMARY KEY (id, timestamp)"))
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY detection_logs.id"))
+    for index in DetectionLog.__table__.indexes:
+        index.create(bind=conn)  # on the parent: every partition gets it
+
+    days = conn.execute(text(
+        "SELECT DISTINCT (timestamp AT TIME ZONE 'UTC')::date FROM detection_logs_unpartitioned"
+    )).scalars().all()
+    for day in days:
+        create_partition(conn, day)
+    conn.execute(text("INSERT INTO detection_logs SELECT * FROM detection_logs_unpartitioned"))
+    conn.execute(text("DROP TABLE detection_logs_unpartitioned"))
+    print(f"🔧 Moved detection logs into {len(days)} day partition(s)")
+
+
+def _partition_detection_logs(conn):
+    # Retention and purges drop whole days (backend/database/partitions.py)
+    if conn.dialect.name == "postgresql":
+        _partition_postgres(conn)
+    else:
+        _partition_sqlite(conn)
+
+
+def _enable_incremental_vacuum(conn):
+    # auto_vacuum only changes when the file is rebuilt, so databases
+    # created before IDS_SQLITE_AUTO_VACUUM=INCREMENTAL never gave pages
+    # back after a purge or retention run (reclaim_space() needs it).
+    # One-time VACUUM: needs free disk about the size of the database.
+    if conn.dialect.name != "sqlite" or str(SQLITE_PRAGMAS["auto_vacuum"]).upper() != "INCREMENTAL":
+        return
+    if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:  # 2 = INCREMENTAL
+        return
+    conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+    # Runs before any DML, so pysqlite has no transaction open (VACUUM can't run in one)
+    conn.exec_driver_sql("VACUUM")
+    print("🔧 Rebuilt the database with incremental auto_vacuum")
+
+
+MIGRATIONS = [
+    (1, "create base tables", _create_base_tables),
+    (2, "settings version and notification coalescing columns", _add_version_and_coalescing_columns),
+    (3, "query indexes for detection_logs and notifications", _add_query_indexes),
+    (4, "uniform SQLite timestamp format for keyset pagination", _normalize_sqlite_timestamps),
+    (5, "detection rollup tables, backfilled from detection_logs", _create_rollups),
+    (6, "packed feature vectors on detection_logs", _add_feature_vectors),
+    (7, "search indexes for detection_logs", _add_search_indexes),
+    (8, "detection_logs partitioned by day", _partition_detection_logs),
+    (9, "incremental auto_vacuum for existing SQLite databases", _enable_incremental_vacuum),
+]
+
+
+# ===============================
+# RUNNER
+# ===============================
+def applied_versions(bind=None) -> set:
+    bind = bind or engine
+    migration_metadata.create_all(bind=bind)
+    with bind.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migrate(bind=None) -> int:
+    """Apply pending migrations in order; returns how many were applied."""
+    bind = bind or engine
+    applied = applied_versions(bind)
+
+    count = 0
+    for version, name, upgrade in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with bind.begin() as conn:
+                upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()
+                ))
+        except DBAPIError:
+            # Another worker starting at the same time may have applied it first
+            if version not in applied_versions(bind):
+                raise
+            continue
+        print(f"🔧 Applied migration {version:03d}: {name}")
+        count += 1
+    return count
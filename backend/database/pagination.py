@@ -0,0 +1,57 @@
+import base64
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import literal, tuple_
+
+
+# =====================================================
+# Keyset Pagination
+# =====================================================
+# Pages are ordered newest first by (timestamp, id) and continue from
+# an opaque cursor holding the last row's key. Each page is a single
+# index seek however deep it is, and rows inserted while a client is
+# paging can't shift later pages the way OFFSET does.
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(timestamp, id) from a cursor made by encode_cursor()."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError as e:  # bad base64, bad UTF-8, bad timestamp or id
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_page(query, timestamp_column, id_column, limit: int, cursor: Optional[str] = None):
+    """
+    One page of `query`, newest first.
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(timestamp_column, id_column)
+            < tuple_(literal(timestamp, timestamp_column.type), literal(row_id, id_column.type))
+        )
+
+    # One extra row tells whether another page follows
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
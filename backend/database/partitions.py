@@ -0,0 +1,248 @@
+import re
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import Column, Index, Integer, MetaData, Table, insert, select, text, update
+
+from backend.models.detection_log import DetectionLog
+
+
+# =====================================================
+# Detection Log Partitions
+# =====================================================
+# detection_logs is stored as one partition per UTC day, so retention
+# and purges remove whole days by dropping (Postgres: detaching) their
+# partition instead of deleting rows.
+#
+# Postgres: detection_logs is a native PARTITION BY RANGE (timestamp)
+# table; day partitions are created as rows for them arrive.
+#
+# SQLite: each day is its own table, detection_logs_pYYYYMMDD, with the
+# model's columns and indexes, in the main database file. Attached
+# per-day files would make dropping free, but a transaction spanning
+# attached WAL databases is not atomic, and the rollups must commit
+# with the rows they count. detection_logs is a UNION ALL view over the
+# day tables: SQLite pushes filters into every day and merges the days'
+# index order for ORDER BY ... LIMIT, so keyset pages stay index seeks.
+# Ids come from detection_log_ids, advanced inside the inserting
+# transaction, so they are unique across days and increase in commit
+# order.
+#
+# Schema changes to detection_logs must be applied to every partition.
+
+PREFIX = "detection_logs_p"
+VIEW_ARMS = 400  # SQLite allows 500 terms per compound SELECT; more days nest views
+
+_PARTITION_NAME = re.compile(rf"^{PREFIX}(\d{{8}})$")
+
+partition_metadata = MetaData()
+
+# SQLite only: the last detection log id handed out
+log_ids = Table(
+    "detection_log_ids",
+    partition_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("last_id", Integer, nullable=False),
+)
+
+_tables = {}
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def partition_name(day: date) -> str:
+    return f"{PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str):
+    """The day of a partition table name, or None for other tables."""
+    match = _PARTITION_NAME.match(name)
+    return datetime.strptime(match.group(1), "%Y%m%d").date() if match else None
+
+
+def day_bounds(day: date):
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def partition_table(day: date) -> Table:
+    """The day's table (on SQLite with its own copies of the model's indexes)."""
+    name = partition_name(day)
+    if name not in _tables:
+        columns = [
+            Column(column.name, column.type, primary_key=column.name == "id", autoincrement=False)
+            for column in DetectionLog.__table__.columns
+        ]
+        table = Table(name, partition_metadata, *columns)
+        for index in DetectionLog.__table__.indexes:
+            names = [column.name for column in index.columns]
+            if names == ["id"]:
+                continue  # the primary key already
+            Index(index.name.replace("ix_detection_logs_", f"ix_{name}_"), *[table.c[n] for n in names])
+        _tables[name] = table
+    return _tables[name]
+
+
+def list_partitions(conn) -> list:
+    """Days that have a partition, oldest first."""
+    if conn.dialect.name == "postgresql":
+        names = conn.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'detection_logs'"
+        )).scalars()
+    else:
+        names = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'detection_logs_p%'"
+        )).scalars()
+    return sorted(day for day in map(partition_day, names) if day is not None)
+
+
+def lock_for_write(conn):
+    """
+    Take the SQLite write lock now. pysqlite only opens its transaction
+    on DML, so partition DDL run after this commits or rolls back with it.
+    """
+    if conn.dialect.name == "sqlite":
+        conn.execute(update(log_ids).values(last_id=log_ids.c.last_id))
+
+
+def _quote(conn, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def refresh_view(conn, days: list):
+    """(SQLite) Recreate the detection_logs view over these days' tables."""
+    columns = ", ".join(_quote(conn, column.name) for column in DetectionLog.__table__.columns)
+    for name in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'view' AND name LIKE 'detection_logs%'"
+    )).scalars().all():
+        conn.execute(text(f"DROP VIEW {_quote(conn, name)}"))
+
+    selects = [f"SELECT {columns} FROM {partition_name(day)}" for day in days]
+    if not selects:
+        empty = ", ".join(f"NULL AS {_quote(conn, column.name)}" for column in DetectionLog.__table__.columns)
+        selects = [f"SELECT {columns} FROM (SELECT {empty}) WHERE 0"]
+    if len(selects) > VIEW_ARMS:
+        groups = []
+        for i in range(0, len(selects), VIEW_ARMS):
+            name = f"detection_logs_group{i // VIEW_ARMS}"
+            conn.execute(text(f"CREATE VIEW {name} AS " + " UNION ALL ".join(selects[i:i + VIEW_ARMS])))
+            groups.append(f"SELECT {columns} FROM {name}")
+        selects = groups
+    conn.execute(text("CREATE VIEW detection_logs AS " + " UNION ALL ".join(selects)))
+
+
+def create_partition(conn, day: date):
+    """Create one day's partition (SQLite: call refresh_view() afterwards)."""
+    if conn.dialect.name == "postgresql":
+        # UTC midnights, matching the naive UTC timestamps inserted under
+        # the engine's TimeZone=UTC sessions (db.engine_options)
+        start, end = (bound.replace(tzinfo=timezone.utc) for bound in day_bounds(day))
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF detection_logs "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+    else:
+        partition_table(day).create(bind=conn, checkfirst=True)
+
+
+def ensure_partitions(conn, days) -> list:
+    """Create the missing partitions among `days`; returns the days created."""
+    existing = list_partitions(conn)
+    missing = sorted(set(days) - set(existing))
+    if missing and conn.dialect.name == "postgresql":
+        # Another process may be creating the same day: wait for it, then look again
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('detection_logs partitions'))"))
+        existing = list_partitions(conn)
+        missing = sorted(set(days) - set(existing))
+    for day in missing:
+        create_partition(conn, day)
+    if missing and conn.dialect.name == "sqlite":
+        refresh_view(conn, sorted(set(existing) | set(missing)))
+    return missing
+
+
+def drop_partition(conn, day: date) -> bool:
+    """
+    Remove a day's partition and every row in it (Postgres: detach, then
+    drop). Call lock_inserts() first: on SQLite that also makes the view
+    change and the drop commit together.
+    """
+    existing = list_partitions(conn)
+    if day not in existing:
+        return False
+    name = partition_name(day)
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"ALTER TABLE detection_logs DETACH PARTITION {name}"))
+    else:
+        refresh_view(conn, [d for d in existing if d != day])
+    conn.execute(text(f"DROP TABLE {name}"))
+    return True
+
+
+def lock_inserts(conn):
+    """
+    Hold off detection log inserts until the transaction ends, so a day
+    can be read completely and then dropped. Postgres locks the parent
+    (and with it every partition): DETACH needs the parent later, and
+    taking it first is what keeps a concurrent insert from deadlocking.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("LOCK TABLE detection_logs IN SHARE ROW EXCLUSIVE MODE"))
+    else:
+        lock_for_write(conn)
+
+
+def last_log_id(conn) -> int:
+    """The newest detection log id handed out (a lookup, not a scan of every day)."""
+    if conn.dialect.name == "postgresql":
+        return conn.execute(text("SELECT max(id) FROM detection_logs")).scalar() or 0
+    return conn.execute(select(log_ids.c.last_id)).scalar() or 0
+
+
+def allocate_ids(conn, n: int) -> list:
+    if conn.dialect.name == "postgresql":
+        return list(conn.execute(
+            text("SELECT nextval(pg_get_serial_sequence('detection_logs', 'id')) FROM generate_series(1, :n)"),
+            {"n": n},
+        ).scalars())
+    # Also takes the write lock, so partition DDL below is part of the transaction
+    conn.execute(update(log_ids).values(last_id=log_ids.c.last_id + n))
+    last = conn.execute(select(log_ids.c.last_id)).scalar()
+    return list(range(last - n + 1, last + 1))
+
+
+def insert_logs(conn, rows: list) -> list:
+    """
+    Insert detection log rows (column dicts) into their day partitions,
+    creating partitions as needed. Rows without a timestamp get the
+    current time, set on the dict itself.
+
+    Returns:
+        The new ids, in row order
+    """
+    if not rows:
+        return []
+    ids = allocate_ids(conn, len(rows))
+    columns = [column.name for column in DetectionLog.__table__.columns]
+
+    by_day = defaultdict(list)
+    for row, row_id in zip(rows, ids):
+        if row.get("timestamp") is None:
+            row["timestamp"] = datetime.utcnow()
+        values = {name: row.get(name) for name in columns}
+        values["id"] = row_id
+        by_day[_naive_utc(row["timestamp"]).date()].append(values)
+
+    ensure_partitions(conn, by_day)
+    for day, values in sorted(by_day.items()):
+        # Postgres routes rows itself
+        table = DetectionLog.__table__ if conn.dialect.name == "postgresql" else partition_table(day)
+        conn.execute(insert(table), values)
+    return ids
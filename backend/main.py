@@ -1,10 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routes.detect import router as detect_router
-from backend.database.db import engine, Base
+from backend.routes.detect import router as detect_router, async_router as detect_async_router
+from backend.database.migrations import migrate
+from backend.database.async_db import ASYNC_MODE, dispose_async_engine
+from backend.services.model_registry import model_registry
+from backend.services.settings_cache import settings_cache
+from backend.services.log_writer import log_writer
+from backend.services.inference_pool import inference_pool
+from backend.services.health_sampler import health_sampler
+from backend.services.retention import retention_manager
+from backend.services.purge import purge_manager
 import backend.models.detection_log
 import backend.models.settings
 import backend.models.notification
+import backend.models.rollup
 
 # =====================================================
 # Create FastAPI App
@@ -25,13 +34,13 @@ app.add_middleware(
 )
 
 # =====================================================
-# Startup Event (Create Tables)
+# Startup Event (Migrate Schema)
 # =====================================================
 
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    migrate()
+    print("✅ Database schema is up to date")
     
     # Create system startup notification
     from backend.models.notification import Notification
@@ -56,27 +65,68 @@ def on_startup():
     finally:
         db.close()
 
+    # Load settings into the in-process cache (refreshes on version change)
+    settings_cache.start()
+
+    # Load the ML model once and keep it resident (hot-reloads on file change)
+    model_registry.start()
+
+    # Move model scoring into worker processes (IDS_INFERENCE_WORKERS > 0)
+    inference_pool.start(model_registry.current)
+
+    # Start the write-behind writer for detection logs and notifications
+    log_writer.start()
+
+    # Sample system health for /system/health and /events subscribers
+    health_sampler.start()
+
+    # Mirror closed days into the archive (IDS_HISTORY_MIRROR) and drop
+    # days past IDS_LOG_RETENTION_DAYS (off when 0)
+    retention_manager.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Commit everything still buffered before the process exits
+    purge_manager.stop()
+    retention_manager.stop()
+    health_sampler.stop()
+    log_writer.stop()
+    inference_pool.stop()
+    model_registry.stop()
+    settings_cache.stop()
+    await dispose_async_engine()
+
 
 # =====================================================
 # Include Routers
 # =====================================================
 
-from backend.routes.logs import router as logs_router
-from backend.routes.analytics import router as analytics_router
+from backend.routes.logs import router as logs_router, async_router as logs_async_router
+from backend.routes.analytics import router as analytics_router, async_router as analytics_async_router
 from backend.routes.reports import router as reports_router
 from backend.routes.settings import router as settings_router
-from backend.routes.notifications import router as notifications_router
+from backend.routes.notifications import router as notifications_router, async_router as notifications_async_router
 from backend.routes.system import router as system_router
 from backend.routes.compliance import router as compliance_router
+from backend.routes.ingest import router as ingest_router
+from backend.routes.export import router as export_router
+from backend.routes.events import router as events_router
 
-app.include_router(detect_router)
-app.include_router(logs_router)
-app.include_router(analytics_router)
+# IDS_ASYNC_MODE=1 swaps in async handlers on the async database engine
+if ASYNC_MODE:
+    print("⚡ Async mode: detect, logs, notifications and analytics use async handlers")
+app.include_router(detect_async_router if ASYNC_MODE else detect_router)
+app.include_router(logs_async_router if ASYNC_MODE else logs_router)
+app.include_router(analytics_async_router if ASYNC_MODE else analytics_router)
 app.include_router(reports_router)
 app.include_router(settings_router)
-app.include_router(notifications_router)
+app.include_router(notifications_async_router if ASYNC_MODE else notifications_router)
 app.include_router(system_router)
 app.include_router(compliance_router)
+app.include_router(ingest_router)
+app.include_router(export_router)
+app.include_router(events_router)
 
 
 # =====================================================
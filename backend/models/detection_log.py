@@ -1,15 +1,37 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, LargeBinary
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
+from datetime import datetime
 from backend.database.db import Base
 
 
 class DetectionLog(Base):
+    # Partitioned by UTC day (backend/database/partitions.py): rows are
+    # written with insert_logs(), never through the ORM. On SQLite this
+    # name is a read-only view over the day tables.
     __tablename__ = "detection_logs"
+    __table_args__ = (
+        # Match the route queries; created by backend/database/migrations.py
+        Index("ix_detection_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_detection_logs_result_timestamp", "result", "timestamp"),
+        Index("ix_detection_logs_result_attack_type", "result", "attack_type"),
+        # confidence rides along so AVG(confidence) reads the index, not the table
+        Index("ix_detection_logs_severity_confidence", "severity", "confidence"),
+        # /logs/search: each exact-match filter seeks its own index, newest first
+        # (SQLite appends the rowid, so (column, timestamp) also orders id ties)
+        Index("ix_detection_logs_severity_timestamp", "severity", "timestamp"),
+        Index("ix_detection_logs_attack_type_timestamp", "attack_type", "timestamp"),
+        Index("ix_detection_logs_service_timestamp", "service", "timestamp"),
+        Index("ix_detection_logs_protocol_timestamp", "protocol", "timestamp"),
+        Index("ix_detection_logs_flag_timestamp", "flag", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     # Auto timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python so every row is stored in the same format (keyset cursors
+    # compare timestamps); the server default covers raw SQL inserts
+    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
 
     # Network features (important ones)
     duration = Column(Integer)
@@ -22,3 +44,7 @@ class DetectionLog(Base):
     attack_type = Column(String, nullable=True)
     confidence = Column(Float)
     severity = Column(String)
+
+    # Full numeric feature vector for retraining, packed float32
+    # (backend/services/feature_store.py); not loaded with the row
+    features = deferred(Column(LargeBinary, nullable=True))
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index
 from sqlalchemy.sql import func
+from datetime import datetime
 from backend.database.db import Base
 
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Match the list / unread-count queries; created by backend/database/migrations.py
+        Index("ix_notifications_timestamp_id", "timestamp", "id"),
+        Index("ix_notifications_is_read_timestamp", "is_read", "timestamp"),
+        Index("ix_notifications_type_timestamp", "type", "timestamp"),
+        Index("ix_notifications_severity_timestamp", "severity", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -24,7 +32,14 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     
     # Timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python so every row is stored in the same format (keyset cursors
+    # compare timestamps); the server default covers raw SQL inserts
+    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
     
     # Optional: related entity ID (e.g., detection_log id)
     related_id = Column(Integer, nullable=True)
+
+    # Coalesced ATTACK notifications: how many attacks this row stands for
+    count = Column(Integer, nullable=False, default=1, server_default="1")
+    first_seen = Column(DateTime(timezone=True), nullable=True)
+    last_seen = Column(DateTime(timezone=True), nullable=True)
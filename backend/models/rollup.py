@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from backend.database.db import Base
+
+
+class DetectionRollup(Base):
+    """Detection counts per time bucket and dimension value (see backend/services/rollups.py)."""
+
+    __tablename__ = "detection_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket", "dimension", "value", name="uq_detection_rollups_key"),
+        Index("ix_detection_rollups_dimension_bucket", "granularity", "dimension", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    # minute / hour / day, and the bucket's start (UTC)
+    granularity = Column(String, nullable=False)
+    bucket = Column(DateTime, nullable=False)
+
+    # result / severity / attack_type / service / protocol; "" stands for NULL
+    dimension = Column(String, nullable=False)
+    value = Column(String, nullable=False)
+
+    # Detections in the bucket with this value, and how many were attacks
+    total = Column(Integer, nullable=False, default=0)
+    attacks = Column(Integer, nullable=False, default=0)
@@ -11,3 +11,6 @@ class SystemSettings(Base):
     alert_sound = Column(Boolean, default=True)
     email_alerts = Column(Boolean, default=False)
     auto_generate_daily_report = Column(Boolean, default=True)
+
+    # Bumped on every write so each worker's settings cache can detect changes
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,108 +1,170 @@
-from fastapi import APIRouter
-from sqlalchemy import func, case, cast, Date
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from backend.database.db import SessionLocal
-from backend.models.detection_log import DetectionLog
-from datetime import datetime, timedelta
+from backend.database.async_db import run_db
+from backend.services.history import BUCKETS, HISTORY_DIMENSIONS, parse_range, query_history
+from backend.services.rollups import rollup_breakdown, rollup_daily, rollup_totals
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
 router = APIRouter()
+async_router = APIRouter()  # IDS_ASYNC_MODE=1
+
+
+def _window(value: Optional[str], default: timedelta) -> timedelta:
+    if value is None:
+        return default
+    try:
+        return parse_range(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def summarize(db, window: timedelta = timedelta(days=30)) -> dict:
+    """Aggregate analytics data from the detection rollups (backend/services/rollups.py)."""
+    # ─── Totals ───
+    total_requests, total_attacks = rollup_totals(db)
+    total_normal = total_requests - total_attacks
+    attack_rate = round((total_attacks / total_requests) * 100, 1) if total_requests > 0 else 0.0
+
+    # ─── Top Attack Types ───
+    top_attack_types = [
+        {"type": value, "count": count}
+        for value, count in rollup_breakdown(db, "attack_type", attacks_only=True, limit=10)
+    ]
+
+    # ─── Severity Distribution ───
+    severity_distribution = {level: 0 for level in ["LOW", "MEDIUM", "HIGH", "CRITICAL"]}
+    for value, count in rollup_breakdown(db, "severity"):
+        if value in severity_distribution:
+            severity_distribution[value] = count
+
+    # ─── Attacks / Traffic Over Time (last 30 days by default) ───
+    days = rollup_daily(db, datetime.utcnow() - window)
+
+    attacks_over_time = [
+        {"date": day, "attacks": attacks} for day, total, attacks in days if attacks
+    ]
+    traffic_over_time = [
+        {"date": day, "total": total, "attacks": attacks}
+        for day, total, attacks in days
+    ]
+
+    return {
+        "total_requests": total_requests,
+        "total_attacks": total_attacks,
+        "total_normal": total_normal,
+        "attack_rate": attack_rate,
+        "top_attack_types": top_attack_types,
+        "severity_distribution": severity_distribution,
+        "attacks_over_time": attacks_over_time,
+        "traffic_over_time": traffic_over_time,
+    }
+
+
+def history(
+    window: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    bucket: str,
+    group_by: List[str],
+    filters: dict,
+) -> dict:
+    unknown = [name for name in group_by if name not in HISTORY_DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {', '.join(unknown)}")
+
+    # Stored timestamps are naive UTC
+    start, end = (
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value and value.tzinfo else value
+        for value in (start, end)
+    )
+    end = end or datetime.utcnow()
+    start = start or end - _window(window, timedelta(days=30))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return query_history(start, end, None if bucket == "none" else bucket, group_by, filters)
 
 
 @router.get("/analytics/summary")
-def get_analytics_summary():
+def get_analytics_summary(window: Optional[str] = Query(None, alias="range")):
     """
-    Return aggregated analytics data computed from detection_logs.
+    Return aggregated analytics data from the detection rollups.
+
+    `range` (e.g. 90d, 1y) sets how far back the over-time series go.
     """
     db = SessionLocal()
 
     try:
-        # ─── Totals ───
-        total_requests = db.query(func.count(DetectionLog.id)).scalar() or 0
-        total_attacks = (
-            db.query(func.count(DetectionLog.id))
-            .filter(DetectionLog.result == "ATTACK")
-            .scalar()
-            or 0
-        )
-        total_normal = total_requests - total_attacks
-        attack_rate = round((total_attacks / total_requests) * 100, 1) if total_requests > 0 else 0.0
-
-        # ─── Top Attack Types ───
-        top_attack_rows = (
-            db.query(
-                DetectionLog.attack_type,
-                func.count(DetectionLog.id).label("count"),
-            )
-            .filter(DetectionLog.result == "ATTACK")
-            .filter(DetectionLog.attack_type.isnot(None))
-            .group_by(DetectionLog.attack_type)
-            .order_by(func.count(DetectionLog.id).desc())
-            .limit(10)
-            .all()
-        )
-        top_attack_types = [{"type": row[0], "count": row[1]} for row in top_attack_rows]
-
-        # ─── Severity Distribution ───
-        severity_rows = (
-            db.query(
-                DetectionLog.severity,
-                func.count(DetectionLog.id).label("count"),
-            )
-            .filter(DetectionLog.severity.isnot(None))
-            .group_by(DetectionLog.severity)
-            .all()
-        )
-        severity_distribution = {level: 0 for level in ["LOW", "MEDIUM", "HIGH", "CRITICAL"]}
-        for row in severity_rows:
-            if row[0] in severity_distribution:
-                severity_distribution[row[0]] = row[1]
-
-        # ─── Attacks Over Time (last 30 days) ───
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-
-        time_rows = (
-            db.query(
-                func.date(DetectionLog.timestamp).label("date"),
-                func.count(DetectionLog.id).label("attacks"),
-            )
-            .filter(DetectionLog.result == "ATTACK")
-            .filter(DetectionLog.timestamp >= thirty_days_ago)
-            .group_by(func.date(DetectionLog.timestamp))
-            .order_by(func.date(DetectionLog.timestamp))
-            .all()
-        )
-        attacks_over_time = [
-            {"date": str(row[0]), "attacks": row[1]} for row in time_rows
-        ]
-
-        # ─── Traffic Over Time (for area chart) ───
-        traffic_rows = (
-            db.query(
-                func.date(DetectionLog.timestamp).label("date"),
-                func.count(DetectionLog.id).label("total"),
-                func.sum(
-                    case((DetectionLog.result == "ATTACK", 1), else_=0)
-                ).label("attacks"),
-            )
-            .filter(DetectionLog.timestamp >= thirty_days_ago)
-            .group_by(func.date(DetectionLog.timestamp))
-            .order_by(func.date(DetectionLog.timestamp))
-            .all()
-        )
-        traffic_over_time = [
-            {"date": str(row[0]), "total": row[1], "attacks": row[2]}
-            for row in traffic_rows
-        ]
-
-        return {
-            "total_requests": total_requests,
-            "total_attacks": total_attacks,
-            "total_normal": total_normal,
-            "attack_rate": attack_rate,
-            "top_attack_types": top_attack_types,
-            "severity_distribution": severity_distribution,
-            "attacks_over_time": attacks_over_time,
-            "traffic_over_time": traffic_over_time,
-        }
+        return summarize(db, _window(window, timedelta(days=30)))
 
     finally:
         db.close()
+
+
+@async_router.get("/analytics/summary")
+async def get_analytics_summary_async(window: Optional[str] = Query(None, alias="range")):
+    """
+    Return aggregated analytics data from the detection rollups.
+
+    `range` (e.g. 90d, 1y) sets how far back the over-time series go.
+    """
+    return await run_db(summarize, _window(window, timedelta(days=30)))
+
+
+_BUCKET_PATTERN = f"^({'|'.join(BUCKETS)}|none)$"
+
+
+@router.get("/analytics/history")
+def get_analytics_history(
+    window: Optional[str] = Query(None, alias="range"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = Query("day", pattern=_BUCKET_PATTERN),
+    group_by: List[str] = Query([]),
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+):
+    """
+    Detection counts per time bucket and dimension over any range.
+
+    Closed days come from the columnar archive, the rest from the
+    database (backend/services/history.py). `range` (e.g. 90d, 1y)
+    counts back from `end` (default now) unless `start` is given.
+    """
+    filters = {
+        "result": result, "attack_type": attack_type, "severity": severity,
+        "service": service, "protocol": protocol,
+    }
+    return history(window, start, end, bucket, group_by, filters)
+
+
+@async_router.get("/analytics/history")
+async def get_analytics_history_async(
+    window: Optional[str] = Query(None, alias="range"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = Query("day", pattern=_BUCKET_PATTERN),
+    group_by: List[str] = Query([]),
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+):
+    """
+    Detection counts per time bucket and dimension over any range.
+
+    Closed days come from the columnar archive, the rest from the
+    database (backend/services/history.py). `range` (e.g. 90d, 1y)
+    counts back from `end` (default now) unless `start` is given.
+    """
+    filters = {
+        "result": result, "attack_type": attack_type, "severity": severity,
+        "service": service, "protocol": protocol,
+    }
+    # File scans and numpy work: keep them off the event loop
+    return await run_in_threadpool(history, window, start, end, bucket, group_by, filters)
@@ -3,8 +3,8 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from backend.database.db import SessionLocal
-from backend.models.detection_log import DetectionLog
-from sqlalchemy import func, and_
+from backend.services.rollups import rollup_breakdown, rollup_totals
+from backend.services.settings_cache import settings_cache
 
 router = APIRouter()
 
@@ -36,19 +36,13 @@ def get_compliance_dashboard():
     
     try:
         # Gather metrics
-        total_logs = db.query(func.count(DetectionLog.id)).scalar() or 0
-        attack_logs = db.query(func.count(DetectionLog.id)).filter(
-            DetectionLog.result == "ATTACK"
-        ).scalar() or 0
-        critical_attacks = db.query(func.count(DetectionLog.id)).filter(
-            DetectionLog.severity == "CRITICAL"
-        ).scalar() or 0
+        total_logs, attack_logs = rollup_totals(db)
+        critical_attacks = dict(rollup_breakdown(db, "severity")).get("CRITICAL", 0)
         
         # Check settings
-        from backend.models.settings import SystemSettings
-        settings = db.query(SystemSettings).filter(SystemSettings.id == 1).first()
-        test_mode_enabled = settings.test_mode if settings else True
-        alert_sound_enabled = settings.alert_sound if settings else False
+        settings = settings_cache.get()
+        test_mode_enabled = settings["test_mode"]
+        alert_sound_enabled = settings["alert_sound"]
         
         # Calculate compliance items
         items = []
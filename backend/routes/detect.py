@@ -1,22 +1,29 @@
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from backend.schemas.ids_schema import IDSInput
-import pandas as pd
-import joblib
-import os
+from backend.schemas.ids_schema import IDSInput, IDSBatchInput
+from typing import List
+import asyncio
 import random
 from datetime import datetime
 
-from backend.database.db import SessionLocal
-from backend.models.detection_log import DetectionLog
-from backend.models.settings import SystemSettings
+from backend.services.model_registry import model_registry
+from backend.services.settings_cache import settings_cache
+from backend.services.log_writer import log_writer, LogWriterFull
+from backend.services.notification_coalescer import notification_coalescer
+from backend.services.inference_pool import inference_pool
+from backend.services.cpu_executor import run_cpu
+from backend.services import cascade
+from backend.services.prediction_cache import prediction_cache
+from backend.services.feature_store import pack_features
 
 
 router = APIRouter()
+async_router = APIRouter()  # IDS_ASYNC_MODE=1
 
 
 # =====================================================
-# 🔧 TEST_MODE Toggle - Dynamic from Database
+# 🔧 TEST_MODE Toggle - Dynamic from Database (cached)
 # =====================================================
 # When test_mode=True  → use random attack simulation (for demo/testing)
 # When test_mode=False → use real ML model predictions
@@ -77,147 +84,294 @@ def simulate_detection() -> dict:
     }
 
 
-def get_test_mode_from_db() -> bool:
-    """Get the current test_mode setting from database."""
-    db = SessionLocal()
+def decode(loaded, probabilities) -> List[dict]:
+    """Turn predict_proba rows into detection results."""
+    # predict() is argmax over predict_proba(), so one pass gives both
+    class_index = probabilities.argmax(axis=1)
+    classes = loaded.engine.classes_
+
+    results = []
+    for i, idx in enumerate(class_index):
+        prediction = int(classes[idx])
+        confidence = round(float(probabilities[i, idx]), 2)
+        results.append({
+            "prediction": prediction,
+            "result": "ATTACK" if prediction == 1 else "NORMAL",
+            "attack_type": str(classes[idx]) if prediction == 1 else None,
+            "confidence": confidence,
+            "severity": get_severity(confidence),
+        })
+    return results
+
+
+def encode_records(loaded, records: List[IDSInput]):
+    """Encode records into the model's feature layout (one-row fast path for /detect)."""
+    if len(records) == 1:
+        return loaded.encoder.encode(records[0])
+    return loaded.encoder.encode_many(records)
+
+
+def full_proba(loaded, features):
+    """predict_proba of the full model, in the worker pool when one is running."""
+    if inference_pool.running:
+        try:
+            return inference_pool.predict_proba(features, loaded)
+        except Exception as e:
+            print(f"⚠️ Inference pool failed, scoring in-process: {e}")
+    return loaded.engine.predict_proba(features)
+
+
+async def full_proba_async(loaded, features):
+    if inference_pool.running:
+        try:
+            return await asyncio.wrap_future(inference_pool.submit(features, loaded))
+        except Exception as e:
+            print(f"⚠️ Inference pool failed, scoring in-process: {e}")
+    return await run_cpu(loaded.engine.predict_proba, features)
+
+
+def classify(loaded, records: List[IDSInput]) -> List[dict]:
+    """
+    Score records, one result per record.
+
+    Cached vectors skip the model; of the rest, only those the stage-1
+    model isn't confident about reach the full model.
+    """
+    features = encode_records(loaded, records)
+    plan = prediction_cache.plan(loaded.scoring_version, features, len(loaded.engine.classes_))
+    if len(plan.misses):
+        pending = features[plan.misses]
+        probabilities, escalate = cascade.first_pass(loaded, pending)
+        if len(escalate):
+            escalated = pending if probabilities is None else pending[escalate]
+            probabilities = cascade.merge(probabilities, escalate, full_proba(loaded, escalated))
+        plan.fill(probabilities)
+    return decode(loaded, plan.probabilities)
+
+
+async def classify_async(loaded, records: List[IDSInput]) -> List[dict]:
+    """classify() for async handlers: encoding and scoring stay off the event loop."""
+    if len(records) == 1:
+        features = encode_records(loaded, records)
+        plan = prediction_cache.plan(loaded.scoring_version, features, len(loaded.engine.classes_))
+    else:
+        features = await run_cpu(encode_records, loaded, records)
+        plan = await run_cpu(prediction_cache.plan, loaded.scoring_version, features, len(loaded.engine.classes_))
+
+    if len(plan.misses):
+        pending = features[plan.misses]
+        if len(pending) == 1:
+            probabilities, escalate = cascade.first_pass(loaded, pending)
+        else:
+            probabilities, escalate = await run_cpu(cascade.first_pass, loaded, pending)
+        if len(escalate):
+            escalated = pending if probabilities is None else pending[escalate]
+            probabilities = cascade.merge(probabilities, escalate, await full_proba_async(loaded, escalated))
+        plan.fill(probabilities)
+    return decode(loaded, plan.probabilities)
+
+
+def current_model():
+    loaded = model_registry.current
+    if loaded is None:
+        raise HTTPException(
+            status_code=503,
+            detail="ML Model not ready. Please ensure the model file exists."
+        )
+    return loaded
+
+
+def log_row(record: IDSInput, det: dict, timestamp: datetime, scored: bool = True) -> dict:
+    """
+    DetectionLog column values for one classified record. Only verdicts
+    the model scored (`scored`) keep a feature vector: test-mode results
+    are random and must never become training labels.
+    """
+    return {
+        "timestamp": timestamp,
+        "duration": record.duration,
+        "protocol": record.protocol_type,
+        "service": record.service,
+        "flag": record.flag,
+        "result": det["result"],
+        "attack_type": det["attack_type"],
+        "confidence": det["confidence"],
+        "severity": det["severity"],
+        "features": pack_features(record) if scored else None,
+    }
+
+
+def fold_attacks(detections: List[dict]):
+    """
+    Fold attacks into the coalesced notification windows, one record()
+    per (attack_type, severity).
+
+    Returns:
+        (notifications, attack_count)
+    """
+    attacks = {}
+    for i, det in enumerate(detections):
+        if det["result"] == "ATTACK":
+            key = (det["attack_type"], det["severity"])
+            first_index, count, confidence = attacks.get(key, (i, 0, 0.0))
+            attacks[key] = (first_index, count + 1, max(confidence, det["confidence"]))
+
+    notifications = []
+    for (attack_type, severity), (first_index, count, confidence) in attacks.items():
+        notification = notification_coalescer.record(attack_type, severity, confidence, count=count)
+        if notification is not None:
+            notification["related_index"] = first_index
+            notifications.append(notification)
+    return notifications, sum(count for _, count, _ in attacks.values())
+
+
+def write_logs(logs: list, notifications: list = (), wait: bool = None):
+    """Queue rows on the write-behind log writer, surfacing backpressure as 503."""
     try:
-        settings = db.query(SystemSettings).filter(SystemSettings.id == 1).first()
-        if settings:
-            return settings.test_mode
-        return True  # Default to test mode if no settings exist
-    finally:
-        db.close()
-
-
-def get_model():
-    """Load ML model if not in test mode."""
-    MODEL_PATH = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "../../model/ids_model.pkl")
-    )
-    
+        return log_writer.submit(logs, notifications, wait=wait)
+    except LogWriterFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def write_logs_async(logs: list, notifications: list = (), wait: bool = None):
+    """write_logs() for async handlers; only a full buffer costs a thread."""
     try:
-        model = joblib.load(MODEL_PATH)
-        return model
-    except Exception as e:
-        print(f"❌ Failed to load model: {e}")
-        return None
+        pending = log_writer.submit(logs, notifications, wait=False, timeout=0)
+    except LogWriterFull:
+        pending = await run_in_threadpool(write_logs, logs, notifications, False)
+    if wait if wait is not None else log_writer.durability == "sync":
+        await pending.wait_async()
+    return pending
+
+
+def detection_response(record: IDSInput, det: dict) -> dict:
+    return {
+        **det,
+        "protocol_type": record.protocol_type,
+        "service": record.service,
+        "flag": record.flag,
+        "duration": record.duration,
+    }
+
+
+def batch_response(records: List[IDSInput], detections: List[dict], timestamp: datetime, attack_count: int) -> dict:
+    return {
+        "count": len(records),
+        "attacks": attack_count,
+        "normal": len(records) - attack_count,
+        "timestamp": timestamp.isoformat(),
+        "results": [
+            {"index": i, **detection_response(record, det)}
+            for i, (record, det) in enumerate(zip(records, detections))
+        ],
+    }
 
 
 # =====================================================
-# Detection Endpoint
+# Detection
 # =====================================================
 
+def detect_records(records: List[IDSInput], wait: bool = None):
+    """
+    Classify many records at once and queue their logs in one submission.
+
+    Attacks are folded into the coalesced notification windows.
+
+    Returns:
+        (detections, timestamp, attack_count)
+    """
+    # ─── Get test mode from the settings cache ───
+    test_mode = settings_cache.get()["test_mode"]
+    if test_mode:
+        # ─── TEST MODE: Random Simulation ───
+        detections = [simulate_detection() for _ in records]
+    else:
+        # ─── PRODUCTION MODE: Real ML Model ───
+        loaded = current_model()
+        detections = classify(loaded, records)
+
+    notifications, attack_count = fold_attacks(detections)
+
+    # ─── All logs go into the same group commit ───
+    timestamp = datetime.utcnow()
+    write_logs(
+        [log_row(record, det, timestamp, scored=not test_mode) for record, det in zip(records, detections)],
+        notifications,
+        wait=wait,
+    )
+    return detections, timestamp, attack_count
+
+
+async def detect_records_async(records: List[IDSInput], wait: bool = None):
+    """detect_records() for async handlers."""
+    test_mode = settings_cache.get()["test_mode"]
+    if test_mode:
+        detections = [simulate_detection() for _ in records]
+    else:
+        detections = await classify_async(current_model(), records)
+
+    notifications, attack_count = fold_attacks(detections)
+
+    timestamp = datetime.utcnow()
+    await write_logs_async(
+        [log_row(record, det, timestamp, scored=not test_mode) for record, det in zip(records, detections)],
+        notifications,
+        wait=wait,
+    )
+    return detections, timestamp, attack_count
+
+
 @router.post("/detect")
 def detect(data: IDSInput):
-    db = SessionLocal()
+    try:
+        detections, timestamp, _ = detect_records([data])
+        return {**detection_response(data, detections[0]), "timestamp": timestamp.isoformat()}
+
+    except HTTPException:
+        raise
 
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@async_router.post("/detect")
+async def detect_async(data: IDSInput):
     try:
-        # ─── Get test mode from database ───
-        test_mode = get_test_mode_from_db()
+        detections, timestamp, _ = await detect_records_async([data])
+        return {**detection_response(data, detections[0]), "timestamp": timestamp.isoformat()}
 
-        # ─── TEST MODE: Random Simulation ───
-        if test_mode:
-            sim = simulate_detection()
-            prediction = sim["prediction"]
-            result = sim["result"]
-            attack_type = sim["attack_type"]
-            confidence = sim["confidence"]
-            severity = sim["severity"]
+    except HTTPException:
+        raise
 
-        # ─── PRODUCTION MODE: Real ML Model ───
-        else:
-            model = get_model()
-            if model is None:
-                raise HTTPException(
-                    status_code=500,
-                    detail="ML Model not loaded. Please ensure the model file exists."
-                )
-
-            # 🔹 Convert input to DataFrame
-            input_dict = data.model_dump()
-            df = pd.DataFrame([input_dict])
-
-            # 🔹 One-hot encoding
-            df = pd.get_dummies(df)
-
-            # 🔹 Align with trained model features
-            model_features = model.feature_names_in_
-            df = df.reindex(columns=model_features, fill_value=0)
-
-            # 🔹 Prediction
-            prediction = int(model.predict(df)[0])
-            probabilities = model.predict_proba(df)[0]
-            confidence = round(float(max(probabilities)), 2)
-
-            # 🔹 Labels
-            result = "ATTACK" if prediction == 1 else "NORMAL"
-            attack_type = str(model.classes_[prediction]) if prediction == 1 else None
-            severity = get_severity(confidence)
-
-        # ─── Save to Database ───
-        log_entry = DetectionLog(
-            duration=data.duration,
-            protocol=data.protocol_type,
-            service=data.service,
-            flag=data.flag,
-            result=result,
-            attack_type=attack_type,
-            confidence=confidence,
-            severity=severity,
-        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
-
-        # ─── Create Notification for Attacks ───
-        if result == "ATTACK":
-            from backend.models.notification import Notification
-
-            # Check for duplicate recent notification (anti-spam)
-            from datetime import timedelta
-            recent_similar = db.query(Notification).filter(
-                Notification.type == "ATTACK",
-                Notification.related_id == log_entry.id,
-                Notification.timestamp >= datetime.utcnow() - timedelta(minutes=1)
-            ).first()
-
-            if not recent_similar:
-                # Determine priority prefix based on severity
-                priority_prefix = {
-                    "CRITICAL": "🔴 CRITICAL",
-                    "HIGH": "🟠 HIGH",
-                    "MEDIUM": "🟡 MEDIUM",
-                    "LOW": "🔵 LOW",
-                }.get(severity, "⚪")
-
-                notification = Notification(
-                    type="ATTACK",
-                    title=f"{priority_prefix}: {attack_type or 'Attack'} Detected",
-                    message=f"Attack detected with {confidence*100:.0f}% confidence. Severity: {severity}",
-                    severity=severity,
-                    related_id=log_entry.id,
-                )
-                db.add(notification)
-                db.commit()
-
-        # 🔹 Return response
-        return {
-            "prediction": prediction,
-            "result": result,
-            "attack_type": attack_type,
-            "confidence": confidence,
-            "severity": severity,
-            "timestamp": log_entry.timestamp.isoformat() if log_entry.timestamp else None,
-            "protocol_type": data.protocol_type,
-            "service": data.service,
-            "flag": data.flag,
-            "duration": data.duration,
-        }
+
+# =====================================================
+# Batch Detection Endpoint
+# =====================================================
+
+@router.post("/detect/batch")
+def detect_batch(data: IDSBatchInput):
+    """Classify many connection records in one model pass and one transaction."""
+    try:
+        return batch_response(data.records, *detect_records(data.records))
+
+    except HTTPException:
+        raise
 
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-    finally:
-        db.close()
+
+@async_router.post("/detect/batch")
+async def detect_batch_async(data: IDSBatchInput):
+    """Classify many connection records in one model pass and one transaction."""
+    try:
+        return batch_response(data.records, *(await detect_records_async(data.records)))
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
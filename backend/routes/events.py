@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import os
+
+from backend.routes.notifications import count_unread, with_session
+from backend.services.event_bus import event_bus, format_event
+from backend.services.health_sampler import health_sampler
+
+router = APIRouter()
+
+
+# =====================================================
+# Live Event Stream Config
+# =====================================================
+# GET /events replaces dashboard polling of /notifications and
+# /system/health. Events:
+#   detections           newest rows of each group commit
+#   notification         a new notification
+#   notification_update  running count of a coalesced notification
+#   unread_count         after any change to unread notifications
+#   health               each health sample
+
+KEEPALIVE_SECONDS = float(os.getenv("IDS_EVENTS_KEEPALIVE", "15"))
+RETRY_MS = 3000  # EventSource reconnect delay
+
+
+@router.get("/events")
+async def stream_events(request: Request):
+    """
+    Server-sent event stream of live dashboard updates.
+
+    Starts with the current unread count and health sample so a
+    (re)connecting client is in sync without polling.
+    """
+    async def frames():
+        # Subscribe before the snapshot so nothing between the two is lost
+        subscription = event_bus.subscribe()
+        try:
+            unread = await run_in_threadpool(with_session, count_unread)
+            health = await run_in_threadpool(health_sampler.latest)
+            yield f"retry: {RETRY_MS}\n\n"
+            yield format_event("unread_count", unread)
+            yield format_event("health", health)
+            while not await request.is_disconnected():
+                frame = await subscription.next_frame(KEEPALIVE_SECONDS)
+                yield frame if frame is not None else ": keepalive\n\n"
+        except ConnectionAbortedError:
+            # Fell behind; the client reconnects and starts from a fresh snapshot
+            pass
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
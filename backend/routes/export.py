@@ -0,0 +1,232 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
+import csv
+import io
+import json
+import os
+import zlib
+
+from backend.database.db import SessionLocal
+from backend.models.detection_log import DetectionLog
+from backend.routes.logs import filter_logs
+from backend.services.log_archive import has_pyarrow
+
+router = APIRouter()
+
+
+# =====================================================
+# Streaming Export Config
+# =====================================================
+# Rows are read with yield_per (a server-side cursor on Postgres, an
+# incremental cursor on SQLite) and encoded, and optionally compressed,
+# chunk by chunk straight into the response. Memory use depends on
+# CHUNK_ROWS, not on how many rows match. Days already moved out by
+# retention are in the archive (IDS_ARCHIVE_DIR) as columnar files.
+#
+#   IDS_EXPORT_CHUNK_ROWS  rows fetched and encoded per chunk (one Parquet row group)
+
+CHUNK_ROWS = int(os.getenv("IDS_EXPORT_CHUNK_ROWS", "10000"))
+
+EXPORT_COLUMNS = [
+    "id", "timestamp", "result", "attack_type", "confidence",
+    "severity", "protocol", "service", "flag", "duration",
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# ===============================
+# ROWS
+# ===============================
+def iter_chunks(filters: dict):
+    """Matching rows, oldest first, CHUNK_ROWS at a time."""
+    db = SessionLocal()
+    try:
+        query = filter_logs(db.query(*[getattr(DetectionLog, name) for name in EXPORT_COLUMNS]), **filters)
+        chunk = []
+        for row in query.order_by(DetectionLog.timestamp, DetectionLog.id).yield_per(CHUNK_ROWS):
+            chunk.append(row)
+            if len(chunk) >= CHUNK_ROWS:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
+
+def _record(row) -> dict:
+    record = dict(zip(EXPORT_COLUMNS, row))
+    record["timestamp"] = record["timestamp"].isoformat() if record["timestamp"] else None
+    return record
+
+
+# ===============================
+# ENCODERS
+# ===============================
+def encode_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            ["" if value is None else value for value in _record(row).values()] for row in chunk
+        )
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(chunks):
+    for chunk in chunks:
+        yield "".join(json.dumps(_record(row)) + "\n" for row in chunk).encode()
+
+
+class _ChunkSink:
+    """Write-only file object that hands over what was written so far."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def encode_parquet(chunks, codec: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.timestamp("us")),
+        ("result", pa.string()),
+        ("attack_type", pa.string()),
+        ("confidence", pa.float64()),
+        ("severity", pa.string()),
+        ("protocol", pa.string()),
+        ("service", pa.string()),
+        ("flag", pa.string()),
+        ("duration", pa.int64()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression=codec)
+    try:
+        for chunk in chunks:
+            columns = list(zip(*chunk))
+            writer.write_table(pa.table(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()  # footer
+
+
+def _compressor(compression: str):
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.ZstdCompressor()
+    except ImportError:
+        import zstandard
+        return zstandard.ZstdCompressor().compressobj()
+
+
+def compress(stream, compressor):
+    for data in stream:
+        out = compressor.compress(data)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+# ===============================
+# ROUTE
+# ===============================
+@router.get("/logs/export")
+def export_logs(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    compression: str = Query("none", pattern="^(none|gzip|zstd)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+    flag: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    max_confidence: Optional[float] = Query(None, ge=0, le=1),
+):
+    """
+    Stream detection logs as a file download, oldest first, without a row cap.
+
+    Args:
+        format: "csv", "ndjson" or "parquet"
+        compression: "none", "gzip" or "zstd" (Parquet compresses its
+            column chunks with that codec instead)
+        start / end: timestamp range (start inclusive, end exclusive)
+        result, attack_type, severity, service, protocol, flag: exact matches
+        min_confidence / max_confidence: confidence range (inclusive)
+    """
+    filters = {
+        "start": start, "end": end, "result": result, "attack_type": attack_type,
+        "severity": severity, "service": service, "protocol": protocol, "flag": flag,
+        "min_confidence": min_confidence, "max_confidence": max_confidence,
+    }
+    filename = f"detection_logs_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{format}"
+    media_type = MEDIA_TYPES[format]
+
+    # Checked before the response starts: errors can't change the status later
+    if format == "parquet":
+        if not has_pyarrow():
+            raise HTTPException(status_code=400, detail="Parquet export needs pyarrow installed")
+        stream = encode_parquet(iter_chunks(filters), "none" if compression == "none" else compression)
+    else:
+        stream = (encode_csv if format == "csv" else encode_ndjson)(iter_chunks(filters))
+        if compression != "none":
+            try:
+                compressor = _compressor(compression)
+            except ImportError:
+                raise HTTPException(status_code=400, detail="zstd export needs Python 3.14+ or the zstandard package")
+            stream = compress(stream, compressor)
+            filename += ".gz" if compression == "gzip" else ".zst"
+            media_type = "application/gzip" if compression == "gzip" else "application/zstd"
+
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,186 @@
+from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import csv
+import json
+import os
+import tempfile
+
+from backend.schemas.ids_schema import IDSInput
+from backend.routes.detect import detect_records, detect_records_async
+from backend.database.async_db import ASYNC_MODE
+from backend.services.model_registry import model_registry
+from backend.services.settings_cache import settings_cache
+
+router = APIRouter()
+
+
+# =====================================================
+# Streaming Bulk Ingestion Config
+# =====================================================
+# Uploads are spooled (in memory up to SPOOL_MEMORY_BYTES, then to a
+# temporary file) before the progress response starts: while a
+# StreamingResponse runs, Starlette listens for disconnects on the same
+# receive channel on servers below ASGI spec 2.4, and would swallow
+# body chunks. The spool is then split into lines and detected in
+# chunks of CHUNK_ROWS records, so memory use depends on the chunk
+# size, not on the file size.
+#
+#   IDS_UPLOAD_CHUNK_ROWS          records detected per chunk (one progress line each)
+#   IDS_UPLOAD_MAX_LINE_BYTES      longest accepted line
+#   IDS_UPLOAD_SPOOL_MEMORY_BYTES  upload bytes kept in memory before spilling to disk
+
+CHUNK_ROWS = int(os.getenv("IDS_UPLOAD_CHUNK_ROWS", "2000"))
+MAX_LINE_BYTES = int(os.getenv("IDS_UPLOAD_MAX_LINE_BYTES", "65536"))
+SPOOL_MEMORY_BYTES = int(os.getenv("IDS_UPLOAD_SPOOL_MEMORY_BYTES", str(8 * 1024 * 1024)))
+READ_BYTES = 64 * 1024
+MAX_REPORTED_ERRORS = 20
+
+# dataset/test.csv column order; trailing label/difficulty columns are ignored
+CSV_FIELDS = list(IDSInput.model_fields)
+
+
+def parse_csv_line(line: str) -> IDSInput:
+    values = next(csv.reader([line]))
+    if len(values) < len(CSV_FIELDS):
+        raise ValueError(f"Expected at least {len(CSV_FIELDS)} columns, got {len(values)}")
+    return IDSInput(**dict(zip(CSV_FIELDS, values)))
+
+
+def parse_ndjson_line(line: str) -> IDSInput:
+    return IDSInput.model_validate_json(line)
+
+
+async def spool_body(request: Request):
+    """The whole request body in a spooled temporary file, rewound."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    try:
+        async for chunk in request.stream():
+            # Past SPOOL_MEMORY_BYTES this is a disk write: keep it off the event loop
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def iter_lines(spool):
+    """Yield spooled body lines, keeping only the unfinished tail in memory."""
+    tail = b""
+    while True:
+        chunk = await run_in_threadpool(spool.read, READ_BYTES)
+        if not chunk:
+            break
+        tail += chunk
+        lines = tail.split(b"\n")
+        tail = lines.pop()
+        if len(tail) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            yield line
+    if tail:
+        yield tail
+
+
+def _progress(**fields) -> bytes:
+    return (json.dumps(fields) + "\n").encode()
+
+
+async def stream_upload(spool, upload_format: str):
+    parse = parse_csv_line if upload_format == "csv" else parse_ndjson_line
+    totals = {"rows": 0, "attacks": 0, "invalid": 0, "chunks": 0}
+    errors = []
+    chunk = []
+
+    async def flush():
+        # Model scoring and the (blocking) group commit run off the event loop
+        if ASYNC_MODE:
+            _, _, attacks = await detect_records_async(chunk, True)
+        else:
+            _, _, attacks = await run_in_threadpool(detect_records, chunk, True)
+        totals["rows"] += len(chunk)
+        totals["attacks"] += attacks
+        totals["chunks"] += 1
+        chunk.clear()
+        return _progress(**totals)
+
+    line_number = 0
+    try:
+        async for raw in iter_lines(spool):
+            line_number += 1
+            line = raw.strip()
+            if not line:
+                continue
+            # Optional CSV header row
+            if upload_format == "csv" and line_number == 1 and line.startswith(b"duration"):
+                continue
+
+            try:
+                chunk.append(parse(line.decode("utf-8")))
+            except ValueError as e:
+                totals["invalid"] += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line_number, "error": str(e).splitlines()[0]})
+                continue
+
+            if len(chunk) >= CHUNK_ROWS:
+                yield await flush()
+
+        if chunk:
+            yield await flush()
+
+        yield _progress(done=True, **totals, errors=errors)
+
+    except Exception as e:
+        # Headers are already sent; report the failure in-band
+        error = getattr(e, "detail", None) or str(e)
+        yield _progress(done=False, error=error, line=line_number, **totals, errors=errors)
+
+    finally:
+        spool.close()
+
+
+@router.post("/detect/upload")
+async def upload_detections(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+):
+    """
+    Stream a CSV (dataset/test.csv layout) or NDJSON (IDSInput per line)
+    upload through batch detection.
+
+    Args:
+        format: "csv" or "ndjson"; inferred from Content-Type when omitted
+
+    Returns:
+        NDJSON progress lines, one per processed chunk, then a final
+        line with "done" and up to 20 per-line parse errors
+    """
+    upload_format = format
+    if upload_format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            upload_format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+            upload_format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+            )
+
+    # Fail before streaming starts rather than in the middle of the response
+    if not settings_cache.get()["test_mode"] and not model_registry.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="ML Model not ready. Please ensure the model file exists."
+        )
+
+    # Read here, not inside the response iterator (see Config)
+    spool = await spool_body(request)
+    return StreamingResponse(
+        stream_upload(spool, upload_format),
+        media_type="application/x-ndjson",
+    )
@@ -1,9 +1,262 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime, timezone
 from typing import Optional
+from sqlalchemy import func, literal, tuple_
+import os
 from backend.database.db import SessionLocal
+from backend.database.async_db import run_db
+from backend.database.pagination import InvalidCursor, keyset_page
+from backend.database.partitions import day_bounds, list_partitions
 from backend.models.detection_log import DetectionLog
+from backend.services.rollups import DIMENSIONS, rollup_facet, rollup_spans
 
 router = APIRouter()
+async_router = APIRouter()  # IDS_ASYNC_MODE=1
+
+
+# =====================================================
+# Search Config
+# =====================================================
+# /logs/search returns a keyset page plus per-facet counts (result,
+# severity, attack_type, service, protocol) in one round trip. Every
+# exact-match filter has a (column, timestamp) index, so the page is an
+# index seek. A facet whose count only depends on the time range (no
+# filter on another field) is summed from the analytics rollups and
+# costs the same for an hour or a year. With other filters active the
+# facet is counted over the newest matching rows only, and flagged as
+# not exact when there are more.
+#
+#   IDS_SEARCH_FACET_SCAN_ROWS  newest matching rows counted per filtered facet
+
+FACET_SCAN_ROWS = int(os.getenv("IDS_SEARCH_FACET_SCAN_ROWS", "50000"))
+FACET_VALUES = 20  # largest values returned per facet
+
+
+def serialize_log(log: DetectionLog) -> dict:
+    return {
+        "id": log.id,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+        "duration": log.duration,
+        "protocol": log.protocol,
+        "service": log.service,
+        "flag": log.flag,
+        "result": log.result,
+        "attack_type": log.attack_type,
+        "confidence": log.confidence,
+        "severity": log.severity
+    }
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def filter_logs(
+    query,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+    flag: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+):
+    """Apply the shared detection log filters (start inclusive, end exclusive)."""
+    if start is not None:
+        query = query.filter(DetectionLog.timestamp >= _naive_utc(start))
+    if end is not None:
+        query = query.filter(DetectionLog.timestamp < _naive_utc(end))
+    for column, value in (
+        (DetectionLog.result, result),
+        (DetectionLog.attack_type, attack_type),
+        (DetectionLog.severity, severity),
+        (DetectionLog.service, service),
+        (DetectionLog.protocol, protocol),
+        (DetectionLog.flag, flag),
+    ):
+        if value:
+            query = query.filter(column == value)
+    if min_confidence is not None:
+        query = query.filter(DetectionLog.confidence >= min_confidence)
+    if max_confidence is not None:
+        query = query.filter(DetectionLog.confidence <= max_confidence)
+    return query
+
+
+def query_logs(db, limit: int, offset: int, result: Optional[str]):
+    query = db.query(DetectionLog)
+
+    # Apply result filter if provided
+    if result:
+        query = query.filter(DetectionLog.result == result)
+
+    # Order by timestamp descending (id breaks ties) and apply pagination
+    logs = query.order_by(DetectionLog.timestamp.desc(), DetectionLog.id.desc())\
+               .offset(offset)\
+               .limit(limit)\
+               .all()
+
+    # Convert to dict for JSON serialization
+    return [serialize_log(log) for log in logs]
+
+
+def page_filtered_logs(db, limit: int, cursor: Optional[str], filters: dict):
+    query = filter_logs(db.query(DetectionLog), **filters)
+
+    try:
+        logs, next_cursor = keyset_page(query, DetectionLog.timestamp, DetectionLog.id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": [serialize_log(log) for log in logs], "next_cursor": next_cursor}
+
+
+def page_logs(db, limit: int, cursor: Optional[str], result: Optional[str]):
+    return page_filtered_logs(db, limit, cursor, {"result": result})
+
+
+def _active_filters(filters: dict) -> set:
+    return {
+        name for name, value in filters.items()
+        if name not in ("start", "end") and value is not None and value != ""
+    }
+
+
+def _rollup_range(db, filters: dict):
+    """
+    The search time range, starting no earlier than the oldest day still in
+    detection_logs: rollups also count days retention moved to the archive.
+    """
+    days = list_partitions(db.connection())
+    if not days:
+        return None
+    start = day_bounds(days[0])[0]
+    if filters["start"] is not None:
+        start = max(start, _naive_utc(filters["start"]))
+    return start, _naive_utc(filters["end"])
+
+
+def _newest_matches(db, filters: dict) -> list:
+    """
+    Criteria that keep only the newest FACET_SCAN_ROWS matches (none when
+    there are fewer). The oldest of them is found at the end of a page,
+    which the day partitions serve as one merged index walk; a LIMIT
+    subquery would sort every match first.
+    """
+    oldest = (
+        filter_logs(db.query(DetectionLog.timestamp, DetectionLog.id), **filters)
+        .order_by(DetectionLog.timestamp.desc(), DetectionLog.id.desc())
+        .offset(FACET_SCAN_ROWS - 1)
+        .first()
+    )
+    if oldest is None:
+        return []
+    return [
+        DetectionLog.timestamp >= oldest.timestamp,
+        tuple_(DetectionLog.timestamp, DetectionLog.id) >= tuple_(
+            literal(oldest.timestamp, DetectionLog.timestamp.type), literal(oldest.id, DetectionLog.id.type)
+        ),
+    ]
+
+
+def _scan_facet(db, dimension: str, filters: dict):
+    """[(value, count)] over the newest FACET_SCAN_ROWS matches, and how many rows that was."""
+    column = getattr(DetectionLog, dimension)
+    rows = (
+        filter_logs(db.query(column, func.count()), **filters)
+        .filter(*_newest_matches(db, filters))
+        .group_by(column)
+        .all()
+    )
+    counts = sorted(((value, n) for value, n in rows if value), key=lambda item: -item[1])
+    return counts, sum(n for _, n in rows)
+
+
+def search_facets(db, filters: dict) -> dict:
+    """Facet counts and the total match count for a search (see Search Config)."""
+    active = _active_filters(filters)
+    time_range = _rollup_range(db, filters)
+    if time_range is None or (time_range[1] is not None and time_range[0] >= time_range[1]):
+        return {
+            "total": 0, "total_exact": True, "facets_exact": True,
+            "facets": {dimension: [] for dimension in DIMENSIONS},
+            "facet_sources": {dimension: "rollups" for dimension in DIMENSIONS},
+        }
+    spans, spans_exact = rollup_spans(*time_range)
+
+    facets, sources, from_rollups = {}, {}, {}
+    facets_exact = True
+    scanned = None
+    for dimension in DIMENSIONS:
+        # A facet ignores its own filter, so the other values stay selectable
+        others = {name: value for name, value in filters.items() if name != dimension}
+        if not _active_filters(others):
+            counts = from_rollups[dimension] = rollup_facet(db, dimension, spans)
+            sources[dimension] = "rollups"
+            facets_exact = facets_exact and spans_exact
+        else:
+            counts, rows = _scan_facet(db, dimension, others)
+            sources[dimension] = "scan"
+            facets_exact = facets_exact and rows < FACET_SCAN_ROWS
+            if dimension not in active:
+                scanned = rows
+        facets[dimension] = [{"value": value, "count": n} for value, n in counts[:FACET_VALUES]]
+
+    # At most one rollup dimension filtered: its facet holds the total too
+    if len(active) <= 1 and active <= set(DIMENSIONS):
+        dimension = next(iter(active), "result")
+        total = sum(n for value, n in from_rollups[dimension] if not active or value == filters[dimension])
+        total_exact = spans_exact
+    else:
+        if scanned is None:
+            scanned = (
+                filter_logs(db.query(func.count(DetectionLog.id)), **filters)
+                .filter(*_newest_matches(db, filters))
+                .scalar()
+            )
+        total, total_exact = scanned, scanned < FACET_SCAN_ROWS
+
+    return {
+        "total": total,
+        "total_exact": total_exact,
+        "facets": facets,
+        "facet_sources": sources,
+        "facets_exact": facets_exact,
+    }
+
+
+def search_logs(db, limit: int, cursor: Optional[str], filters: dict, facets: bool):
+    page = page_filtered_logs(db, limit, cursor, filters)
+    if facets:
+        page.update(search_facets(db, filters))
+    return page
+
+
+def search_filters(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+    flag: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+) -> dict:
+    if start is not None and end is not None and _naive_utc(start) >= _naive_utc(end):
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if min_confidence is not None and max_confidence is not None and min_confidence > max_confidence:
+        raise HTTPException(status_code=400, detail="min_confidence must not exceed max_confidence")
+    return {
+        "start": start, "end": end, "result": result, "attack_type": attack_type,
+        "severity": severity, "service": service, "protocol": protocol, "flag": flag,
+        "min_confidence": min_confidence, "max_confidence": max_confidence,
+    }
 
 
 @router.get("/logs")
@@ -26,34 +279,120 @@ def get_logs(
     db = SessionLocal()
     
     try:
-        query = db.query(DetectionLog)
-        
-        # Apply result filter if provided
-        if result:
-            query = query.filter(DetectionLog.result == result)
-        
-        # Order by timestamp descending and apply pagination
-        logs = query.order_by(DetectionLog.timestamp.desc())\
-                   .offset(offset)\
-                   .limit(limit)\
-                   .all()
-        
-        # Convert to dict for JSON serialization
-        return [
-            {
-                "id": log.id,
-                "timestamp": log.timestamp.isoformat() if log.timestamp else None,
-                "duration": log.duration,
-                "protocol": log.protocol,
-                "service": log.service,
-                "flag": log.flag,
-                "result": log.result,
-                "attack_type": log.attack_type,
-                "confidence": log.confidence,
-                "severity": log.severity
-            }
-            for log in logs
-        ]
+        return query_logs(db, limit, offset, result)
     
     finally:
         db.close()
+
+
+@router.get("/logs/page")
+def get_logs_page(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    result: Optional[str] = None
+):
+    """
+    Fetch one page of detection logs, newest first.
+
+    Args:
+        limit: Maximum number of logs in the page (default: 100)
+        cursor: next_cursor from the previous page; omit for the first page
+        result: Filter by result type ("ATTACK" or "NORMAL")
+
+    Returns:
+        {"items": [...], "next_cursor": str or None on the last page}
+    """
+    db = SessionLocal()
+
+    try:
+        return page_logs(db, limit, cursor, result)
+
+    finally:
+        db.close()
+
+
+@router.get("/logs/search")
+def search(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    facets: bool = True,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+    flag: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    max_confidence: Optional[float] = Query(None, ge=0, le=1),
+):
+    """
+    Search detection logs: one page, newest first, plus facet counts.
+
+    Args:
+        limit: Maximum number of logs in the page (default: 100)
+        cursor: next_cursor from the previous page; omit for the first page
+        facets: Include facet counts (pass false when loading further pages)
+        start / end: timestamp range (start inclusive, end exclusive)
+        result, attack_type, severity, service, protocol, flag: exact matches
+        min_confidence / max_confidence: confidence range (inclusive)
+
+    Returns:
+        {"items", "next_cursor", and with facets: "total", "total_exact",
+         "facets" {dimension: [{"value", "count"}]}, "facet_sources"
+         {dimension: "rollups" or "scan"}, "facets_exact"}
+    """
+    filters = search_filters(
+        start, end, result, attack_type, severity, service, protocol, flag, min_confidence, max_confidence
+    )
+    db = SessionLocal()
+
+    try:
+        return search_logs(db, limit, cursor, filters, facets)
+
+    finally:
+        db.close()
+
+
+@async_router.get("/logs")
+async def get_logs_async(
+    limit: int = 100,
+    offset: int = 0,
+    result: Optional[str] = None
+):
+    """Fetch detection logs with optional filtering."""
+    return await run_db(query_logs, limit, offset, result)
+
+
+@async_router.get("/logs/page")
+async def get_logs_page_async(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    result: Optional[str] = None
+):
+    """Fetch one page of detection logs, newest first."""
+    return await run_db(page_logs, limit, cursor, result)
+
+
+@async_router.get("/logs/search")
+async def search_async(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    facets: bool = True,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    result: Optional[str] = None,
+    attack_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    service: Optional[str] = None,
+    protocol: Optional[str] = None,
+    flag: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    max_confidence: Optional[float] = Query(None, ge=0, le=1),
+):
+    """Search detection logs: one page, newest first, plus facet counts."""
+    filters = search_filters(
+        start, end, result, attack_type, severity, service, protocol, flag, min_confidence, max_confidence
+    )
+    return await run_db(search_logs, limit, cursor, filters, facets)
@@ -3,9 +3,15 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from backend.database.db import SessionLocal
+from backend.database.async_db import run_db
+from backend.database.pagination import InvalidCursor, keyset_page
 from backend.models.notification import Notification
+from backend.services.event_bus import event_bus
+from backend.services.log_writer import log_writer
+from backend.services.notification_coalescer import notification_coalescer
 
 router = APIRouter()
+async_router = APIRouter()  # IDS_ASYNC_MODE=1
 
 
 class NotificationCreate(BaseModel):
@@ -25,31 +31,149 @@ class NotificationResponse(BaseModel):
     is_read: bool
     timestamp: datetime
     related_id: Optional[int]
+    count: int = 1
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
-@router.post("/notifications", response_model=NotificationResponse)
-def create_notification(notification: NotificationCreate):
-    """Create a new notification."""
-    db = SessionLocal()
+class NotificationPage(BaseModel):
+    items: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+
+
+# =====================================================
+# Queries (shared by the sync and async routes)
+# =====================================================
+
+def publish_unread_count(db):
+    """Push the unread count to live dashboards after a change."""
+    if event_bus.subscriber_count:
+        event_bus.publish("unread_count", count_unread(db))
+
+
+def publish_notification(db, notification: Notification):
+    if event_bus.subscriber_count:
+        event_bus.publish("notification", NotificationResponse.model_validate(notification).model_dump(mode="json"))
+        publish_unread_count(db)
+
+
+def insert_notification(db, notification: NotificationCreate):
+    db_notification = Notification(
+        type=notification.type,
+        title=notification.title,
+        message=notification.message,
+        severity=notification.severity,
+        related_id=notification.related_id,
+    )
+    db.add(db_notification)
+    db.commit()
+    db.refresh(db_notification)
+    publish_notification(db, db_notification)
+    return db_notification
+
+
+def filter_notifications(db, type: Optional[str], severity: Optional[str], is_read: Optional[bool]):
+    query = db.query(Notification)
+
+    if type:
+        query = query.filter(Notification.type == type)
+    if severity:
+        query = query.filter(Notification.severity == severity)
+    if is_read is not None:
+        query = query.filter(Notification.is_read == is_read)
+    return query
+
+
+def query_notifications(db, limit: int, skip: int, type: Optional[str], severity: Optional[str], is_read: Optional[bool]):
+    return (
+        filter_notifications(db, type, severity, is_read)
+        .order_by(Notification.timestamp.desc(), Notification.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def page_notifications(db, limit: int, cursor: Optional[str], type: Optional[str], severity: Optional[str], is_read: Optional[bool]):
+    query = filter_notifications(db, type, severity, is_read)
     try:
-        db_notification = Notification(
-            type=notification.type,
-            title=notification.title,
-            message=notification.message,
-            severity=notification.severity,
-            related_id=notification.related_id,
-        )
-        db.add(db_notification)
+        items, next_cursor = keyset_page(query, Notification.timestamp, Notification.id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def count_unread(db):
+    count = db.query(Notification).filter(Notification.is_read == False).count()
+    return {"unread_count": count}
+
+
+def set_read(db, notification_id: int):
+    notification = db.query(Notification).filter(Notification.id == notification_id).first()
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    notification.is_read = True
+    db.commit()
+    db.refresh(notification)
+    publish_unread_count(db)
+    return notification
+
+
+def set_all_read(db):
+    db.query(Notification).filter(Notification.is_read == False).update(
+        {"is_read": True}
+    )
+    db.commit()
+    publish_unread_count(db)
+    return {"message": "All notifications marked as read"}
+
+
+def remove_notification(db, notification_id: int):
+    notification = db.query(Notification).filter(Notification.id == notification_id).first()
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    # No group commit updates the row between the delete and the reset
+    with log_writer.exclusive():
+        db.delete(notification)
         db.commit()
-        db.refresh(db_notification)
-        return db_notification
+        notification_coalescer.reset({notification_id})
+    publish_unread_count(db)
+    return {"message": "Notification deleted"}
+
+
+def remove_all_notifications(db):
+    # Open attack windows would otherwise keep counting into deleted rows
+    with log_writer.exclusive():
+        db.query(Notification).delete()
+        db.commit()
+        notification_coalescer.reset()
+    publish_unread_count(db)
+    return {"message": "All notifications deleted"}
+
+
+def with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
     finally:
         db.close()
 
 
+# =====================================================
+# Sync Routes
+# =====================================================
+
+@router.post("/notifications", response_model=NotificationResponse)
+def create_notification(notification: NotificationCreate):
+    """Create a new notification."""
+    return with_session(insert_notification, notification)
+
+
 @router.get("/notifications", response_model=List[NotificationResponse])
 def get_notifications(
     limit: int = Query(4, ge=1, le=100),
@@ -59,93 +183,110 @@ def get_notifications(
     is_read: Optional[bool] = None,
 ):
     """Get notifications with optional filters."""
-    db = SessionLocal()
-    try:
-        query = db.query(Notification)
-        
-        if type:
-            query = query.filter(Notification.type == type)
-        if severity:
-            query = query.filter(Notification.severity == severity)
-        if is_read is not None:
-            query = query.filter(Notification.is_read == is_read)
-        
-        notifications = (
-            query.order_by(Notification.timestamp.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-        return notifications
-    finally:
-        db.close()
+    return with_session(query_notifications, limit, skip, type, severity, is_read)
+
+
+@router.get("/notifications/page", response_model=NotificationPage)
+def get_notifications_page(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    type: Optional[str] = None,
+    severity: Optional[str] = None,
+    is_read: Optional[bool] = None,
+):
+    """Get notifications newest first; pass next_cursor back to get the following page."""
+    return with_session(page_notifications, limit, cursor, type, severity, is_read)
 
 
 @router.get("/notifications/count", response_model=dict)
 def get_unread_count():
     """Get count of unread notifications."""
-    db = SessionLocal()
-    try:
-        count = db.query(Notification).filter(Notification.is_read == False).count()
-        return {"unread_count": count}
-    finally:
-        db.close()
+    return with_session(count_unread)
 
 
 @router.put("/notifications/{notification_id}/read", response_model=NotificationResponse)
 def mark_as_read(notification_id: int):
     """Mark a single notification as read."""
-    db = SessionLocal()
-    try:
-        notification = db.query(Notification).filter(Notification.id == notification_id).first()
-        if not notification:
-            raise HTTPException(status_code=404, detail="Notification not found")
-        
-        notification.is_read = True
-        db.commit()
-        db.refresh(notification)
-        return notification
-    finally:
-        db.close()
+    return with_session(set_read, notification_id)
 
 
 @router.put("/notifications/read-all", response_model=dict)
 def mark_all_as_read():
     """Mark all notifications as read."""
-    db = SessionLocal()
-    try:
-        db.query(Notification).filter(Notification.is_read == False).update(
-            {"is_read": True}
-        )
-        db.commit()
-        return {"message": "All notifications marked as read"}
-    finally:
-        db.close()
+    return with_session(set_all_read)
 
 
 @router.delete("/notifications/{notification_id}", response_model=dict)
 def delete_notification(notification_id: int):
     """Delete a single notification."""
-    db = SessionLocal()
-    try:
-        notification = db.query(Notification).filter(Notification.id == notification_id).first()
-        if not notification:
-            raise HTTPException(status_code=404, detail="Notification not found")
-        
-        db.delete(notification)
-        db.commit()
-        return {"message": "Notification deleted"}
-    finally:
-        db.close()
+    return with_session(remove_notification, notification_id)
 
 
 @router.delete("/notifications", response_model=dict)
 def delete_all_notifications():
     """Delete all notifications."""
-    db = SessionLocal()
-    try:
-        db.query(Notification).delete()
-        db.commit()
-        return {"message": "All notifications deleted"}
-    finally:
-        db.close()
+    return with_session(remove_all_notifications)
+
+
+# =====================================================
+# Async Routes (IDS_ASYNC_MODE=1)
+# =====================================================
+
+@async_router.post("/notifications", response_model=NotificationResponse)
+async def create_notification_async(notification: NotificationCreate):
+    """Create a new notification."""
+    return await run_db(insert_notification, notification)
+
+
+@async_router.get("/notifications", response_model=List[NotificationResponse])
+async def get_notifications_async(
+    limit: int = Query(4, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+    type: Optional[str] = None,
+    severity: Optional[str] = None,
+    is_read: Optional[bool] = None,
+):
+    """Get notifications with optional filters."""
+    return await run_db(query_notifications, limit, skip, type, severity, is_read)
+
+
+@async_router.get("/notifications/page", response_model=NotificationPage)
+async def get_notifications_page_async(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    type: Optional[str] = None,
+    severity: Optional[str] = None,
+    is_read: Optional[bool] = None,
+):
+    """Get notifications newest first; pass next_cursor back to get the following page."""
+    return await run_db(page_notifications, limit, cursor, type, severity, is_read)
+
+
+@async_router.get("/notifications/count", response_model=dict)
+async def get_unread_count_async():
+    """Get count of unread notifications."""
+    return await run_db(count_unread)
+
+
+@async_router.put("/notifications/{notification_id}/read", response_model=NotificationResponse)
+async def mark_as_read_async(notification_id: int):
+    """Mark a single notification as read."""
+    return await run_db(set_read, notification_id)
+
+
+@async_router.put("/notifications/read-all", response_model=dict)
+async def mark_all_as_read_async():
+    """Mark all notifications as read."""
+    return await run_db(set_all_read)
+
+
+@async_router.delete("/notifications/{notification_id}", response_model=dict)
+async def delete_notification_async(notification_id: int):
+    """Delete a single notification."""
+    return await run_db(remove_notification, notification_id)
+
+
+@async_router.delete("/notifications", response_model=dict)
+async def delete_all_notifications_async():
+    """Delete all notifications."""
+    return await run_db(remove_all_notifications)
@@ -2,7 +2,8 @@ from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from backend.database.db import SessionLocal
 from backend.models.detection_log import DetectionLog
-from sqlalchemy import func, case
+from backend.routes.notifications import publish_notification
+from backend.services.rollups import rollup_breakdown, rollup_daily, rollup_totals
 from datetime import datetime, timedelta
 import io
 import os
@@ -46,29 +47,19 @@ def _build_pdf(db) -> io.BytesIO:
     elements = []
 
     # ─── Query data ───
-    total = db.query(func.count(DetectionLog.id)).scalar() or 0
-    attacks = db.query(func.count(DetectionLog.id)).filter(DetectionLog.result == "ATTACK").scalar() or 0
+    total, attacks = rollup_totals(db)
     normal = total - attacks
     attack_rate = round((attacks / total) * 100, 1) if total > 0 else 0.0
 
     # Severity counts
-    sev_rows = (
-        db.query(DetectionLog.severity, func.count(DetectionLog.id))
-        .filter(DetectionLog.severity.isnot(None))
-        .group_by(DetectionLog.severity).all()
-    )
+    sev_rows = rollup_breakdown(db, "severity")
     severity = {s: 0 for s in ["LOW", "MEDIUM", "HIGH", "CRITICAL"]}
     for r in sev_rows:
         if r[0] in severity:
             severity[r[0]] = r[1]
 
     # Top attack types
-    attack_rows = (
-        db.query(DetectionLog.attack_type, func.count(DetectionLog.id).label("c"))
-        .filter(DetectionLog.result == "ATTACK", DetectionLog.attack_type.isnot(None))
-        .group_by(DetectionLog.attack_type).order_by(func.count(DetectionLog.id).desc())
-        .limit(10).all()
-    )
+    attack_rows = rollup_breakdown(db, "attack_type", attacks_only=True, limit=10)
 
     # Most frequent
     most_frequent = attack_rows[0][0] if attack_rows else "N/A"
@@ -194,12 +185,7 @@ def _build_pdf(db) -> io.BytesIO:
 
     # --- Line Chart: Attacks Over Time ---
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    time_rows = (
-        db.query(func.date(DetectionLog.timestamp), func.count(DetectionLog.id))
-        .filter(DetectionLog.result == "ATTACK", DetectionLog.timestamp >= thirty_days_ago)
-        .group_by(func.date(DetectionLog.timestamp))
-        .order_by(func.date(DetectionLog.timestamp)).all()
-    )
+    time_rows = [(day, attacks) for day, _, attacks in rollup_daily(db, thirty_days_ago) if attacks]
     if time_rows:
         fig3, ax3 = plt.subplots(figsize=(6, 3))
         dates = [str(r[0]) for r in time_rows]
@@ -340,6 +326,7 @@ def generate_report():
         )
         db.add(report_notification)
         db.commit()
+        publish_notification(db, report_notification)
         
         return StreamingResponse(
             pdf_buffer,
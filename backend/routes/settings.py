@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from typing import Optional
 from backend.database.db import SessionLocal
 from backend.models.settings import SystemSettings
+from backend.services.settings_cache import settings_cache, settings_to_dict
 
 router = APIRouter()
 
@@ -26,20 +27,18 @@ def get_or_create_settings(db):
     return settings
 
 
+def bump_version(db, settings):
+    """Commit a settings change and publish it to this worker's cache."""
+    # Increment in SQL so concurrent writers from other workers can't collide
+    settings.version = SystemSettings.version + 1
+    db.commit()
+    db.refresh(settings)
+    settings_cache.store(settings)
+
+
 @router.get("/settings")
 def get_settings():
-    db = SessionLocal()
-    try:
-        settings = get_or_create_settings(db)
-        return {
-            "test_mode": settings.test_mode,
-            "confidence_threshold": settings.confidence_threshold,
-            "alert_sound": settings.alert_sound,
-            "email_alerts": settings.email_alerts,
-            "auto_generate_daily_report": settings.auto_generate_daily_report,
-        }
-    finally:
-        db.close()
+    return dict(settings_cache.get())
 
 
 @router.post("/settings")
@@ -59,18 +58,11 @@ def update_settings(data: SettingsUpdate):
         if data.auto_generate_daily_report is not None:
             settings.auto_generate_daily_report = data.auto_generate_daily_report
 
-        db.commit()
-        db.refresh(settings)
+        bump_version(db, settings)
 
         return {
             "message": "Settings updated successfully",
-            "settings": {
-                "test_mode": settings.test_mode,
-                "confidence_threshold": settings.confidence_threshold,
-                "alert_sound": settings.alert_sound,
-                "email_alerts": settings.email_alerts,
-                "auto_generate_daily_report": settings.auto_generate_daily_report,
-            },
+            "settings": settings_to_dict(settings),
         }
     except Exception as e:
         db.rollback()
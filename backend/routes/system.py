@@ -1,15 +1,26 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
-import psutil
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from backend.database.db import SessionLocal
 from backend.models.detection_log import DetectionLog
-from sqlalchemy import func
+from backend.services.model_registry import model_registry
+from backend.services.inference_pool import inference_pool
+from backend.services.health_sampler import health_sampler
+from backend.services.cascade import cascade_stats
+from backend.services.prediction_cache import prediction_cache
+from backend.services.log_writer import log_writer
+from backend.services.rollups import rebuild_rollups, rollup_totals
+from backend.services.retention import retention_manager
+from backend.services.purge import PurgeRunning, purge_manager
 
 router = APIRouter()
 
+# The accuracy estimate averages the confidence of this many latest
+# predictions, so it reads a bounded slice of detection_logs
+ACCURACY_SAMPLE_ROWS = int(os.getenv("IDS_ACCURACY_SAMPLE_ROWS", "1000"))
+
 
 class SystemHealthResponse(BaseModel):
     # System Resources
@@ -50,6 +61,10 @@ class ModelMetricsResponse(BaseModel):
     attack_predictions: int
     normal_predictions: int
     accuracy_estimate: float
+    cascade_enabled: bool = False
+    escalation_rate: Optional[float] = None  # share of records the stage-1 model passed on
+    cascade_records: int = 0
+    prediction_cache: Optional[dict] = None  # hits, misses, evictions, hit_rate, ...
 
 
 class QuickActionResponse(BaseModel):
@@ -58,8 +73,6 @@ class QuickActionResponse(BaseModel):
     data: Optional[dict] = None
 
 
-# Track API start time
-API_START_TIME = datetime.utcnow()
 LAST_PREDICTION_TIME = None
 TOTAL_PREDICTIONS = 0
 ATTACK_PREDICTIONS = 0
@@ -67,80 +80,19 @@ ATTACK_PREDICTIONS = 0
 
 @router.get("/system/health", response_model=SystemHealthResponse)
 def get_system_health():
-    """Get comprehensive system health metrics."""
-    db = SessionLocal()
-    
-    try:
-        # CPU Usage
-        cpu_usage = psutil.cpu_percent(interval=0.1)
-        
-        # Memory Usage
-        memory = psutil.virtual_memory()
-        memory_usage = memory.percent
-        memory_total = memory.total / (1024 ** 3)  # GB
-        memory_available = memory.available / (1024 ** 3)  # GB
-        
-        # Disk Usage
-        disk = psutil.disk_usage('/')
-        disk_usage = disk.percent
-        disk_total = disk.total / (1024 ** 3)  # GB
-        disk_used = disk.used / (1024 ** 3)  # GB
-        
-        # Database Metrics
-        db_logs_count = db.query(func.count(DetectionLog.id)).scalar() or 0
-        
-        # Get database file size
-        db_path = "ids_logs.db"
-        db_size_mb = 0
-        if os.path.exists(db_path):
-            db_size_mb = os.path.getsize(db_path) / (1024 ** 2)  # MB
-        
-        # Count tables (simplified)
-        db_table_count = 5  # detection_logs, notifications, system_settings, etc.
-        
-        # Import notification model for count
-        try:
-            from backend.models.notification import Notification
-            db_notifications_count = db.query(func.count(Notification.id)).scalar() or 0
-        except:
-            db_notifications_count = 0
-        
-        # API Uptime
-        uptime = (datetime.utcnow() - API_START_TIME).total_seconds()
-        
-        # Model Status
-        model_path = os.path.join(os.path.dirname(__file__), "../model/ids_model.pkl")
-        model_path_exists = os.path.exists(model_path)
-        model_loaded = model_path_exists  # Simplified check
-        
-        # Determine overall status
-        overall_status = "healthy"
-        if cpu_usage > 80 or memory_usage > 80 or disk_usage > 80:
-            overall_status = "warning"
-        if cpu_usage > 95 or memory_usage > 95 or disk_usage > 95:
-            overall_status = "critical"
-        
-        return SystemHealthResponse(
-            cpu_usage=cpu_usage,
-            memory_usage=memory_usage,
-            memory_total=round(memory_total, 2),
-            memory_available=round(memory_available, 2),
-            disk_usage=disk_usage,
-            disk_total=round(disk_total, 2),
-            disk_used=round(disk_used, 2),
-            db_size_mb=round(db_size_mb, 2),
-            db_table_count=db_table_count,
-            db_logs_count=db_logs_count,
-            db_notifications_count=db_notifications_count,
-            api_uptime_seconds=uptime,
-            api_start_time=API_START_TIME.isoformat(),
-            model_loaded=model_loaded,
-            model_path_exists=model_path_exists,
-            overall_status=overall_status,
-            timestamp=datetime.utcnow().isoformat(),
-        )
-    finally:
-        db.close()
+    """Get comprehensive system health metrics (shared sample, refreshed every few seconds)."""
+    return SystemHealthResponse(**health_sampler.latest())
+
+
+@router.get("/system/ready")
+def get_readiness():
+    """Readiness probe: 503 until the ML model is loaded and warmed up."""
+    status = model_registry.status()
+    status["inference_workers"] = inference_pool.workers if inference_pool.running else 0
+    status["inference_pool"] = dict(inference_pool.stats)
+    if not status["ready"]:
+        raise HTTPException(status_code=503, detail=status)
+    return status
 
 
 @router.get("/system/model-metrics", response_model=ModelMetricsResponse)
@@ -150,10 +102,7 @@ def get_model_metrics():
     
     try:
         # Get prediction statistics from database
-        total_predictions = db.query(func.count(DetectionLog.id)).scalar() or 0
-        attack_predictions = db.query(func.count(DetectionLog.id)).filter(
-            DetectionLog.result == "ATTACK"
-        ).scalar() or 0
+        total_predictions, attack_predictions = rollup_totals(db)
         normal_predictions = total_predictions - attack_predictions
         
         # Get last prediction time
@@ -168,20 +117,29 @@ def get_model_metrics():
         feature_count = 0
         classes = []
         
-        try:
-            import joblib
-            model_path = os.path.join(os.path.dirname(__file__), "../model/ids_model.pkl")
-            if os.path.exists(model_path):
-                model = joblib.load(model_path)
-                model_loaded = True
-                model_type = type(model).__name__
-                feature_count = len(getattr(model, 'feature_names_in_', []))
-                classes = list(getattr(model, 'classes_', []))
-        except:
-            pass
+        current = model_registry.current
+        if current is not None:
+            model = current.model
+            model_loaded = True
+            model_type = type(model).__name__
+            feature_count = len(getattr(model, 'feature_names_in_', []))
+            classes = [str(c) for c in getattr(model, 'classes_', [])]
         
+        # Two-stage cascade: how often the full forest was needed
+        cascade = cascade_stats.snapshot()
+
         # Calculate accuracy estimate (based on confidence scores)
-        avg_confidence = db.query(func.avg(DetectionLog.confidence)).scalar() or 0
+        # Averaged here and with the sort columns selected: SQLite only
+        # merges the day tables' (timestamp, id) index order for a
+        # top-level ORDER BY ... LIMIT over columns it returns
+        latest = [
+            row.confidence
+            for row in db.query(DetectionLog.timestamp, DetectionLog.id, DetectionLog.confidence)
+            .order_by(DetectionLog.timestamp.desc(), DetectionLog.id.desc())
+            .limit(ACCURACY_SAMPLE_ROWS)
+            if row.confidence is not None
+        ]
+        avg_confidence = sum(latest) / len(latest) if latest else 0
         accuracy_estimate = round(avg_confidence * 100, 2) if avg_confidence else 0
         
         return ModelMetricsResponse(
@@ -194,93 +152,126 @@ def get_model_metrics():
             attack_predictions=attack_predictions,
             normal_predictions=normal_predictions,
             accuracy_estimate=accuracy_estimate,
+            cascade_enabled=bool(current is not None and current.stage1 is not None),
+            escalation_rate=cascade["escalation_rate"],
+            cascade_records=cascade["records"],
+            prediction_cache=prediction_cache.snapshot(),
         )
     finally:
         db.close()
 
 
-@router.post("/system/actions/export-logs", response_model=QuickActionResponse)
-def export_logs():
-    """Export detection logs to CSV."""
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _start_purge(start=None, end=None, notifications=True, archive=True) -> QuickActionResponse:
+    try:
+        job = purge_manager.start(_naive_utc(start), _naive_utc(end), notifications, archive)
+    except PurgeRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return QuickActionResponse(
+        success=True,
+        message=f"Purge {job['id']} started (progress: GET /system/purge)",
+        data=job
+    )
+
+
+@router.post("/system/actions/clear-database", response_model=QuickActionResponse)
+def clear_database():
+    """Purge all detection logs and notifications in the background (keep settings)."""
+    return _start_purge()
+
+
+@router.post("/system/purge", response_model=QuickActionResponse)
+def start_purge(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    notifications: bool = True,
+    archive: bool = True,
+):
+    """
+    Purge detection logs with start <= timestamp < end (either bound may be
+    left open) that exist when it starts, in the background: whole days
+    are dropped, the rest deleted in short transactions.
+    """
+    if start is not None and end is not None and _naive_utc(start) >= _naive_utc(end):
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return _start_purge(start, end, notifications, archive)
+
+
+@router.get("/system/purge")
+def get_purge_status():
+    """Progress of the running purge, or the result of the last one."""
+    return {"running": purge_manager.running, "job": purge_manager.status()}
+
+
+@router.post("/system/purge/cancel", response_model=QuickActionResponse)
+def cancel_purge():
+    """Stop the running purge after its current chunk."""
+    if not purge_manager.cancel():
+        return QuickActionResponse(success=False, message="No purge is running")
+    return QuickActionResponse(success=True, message="Purge cancelling", data=purge_manager.status())
+
+
+@router.post("/system/actions/rebuild-rollups", response_model=QuickActionResponse)
+def rebuild_analytics_rollups():
+    """Recompute the analytics rollups from the raw detection logs."""
     db = SessionLocal()
-    
+
     try:
-        import csv
-        import io
-        
-        logs = db.query(DetectionLog).order_by(DetectionLog.timestamp.desc()).limit(10000).all()
-        
-        output = io.StringIO()
-        fieldnames = [
-            'id', 'timestamp', 'result', 'attack_type', 'confidence', 
-            'severity', 'protocol', 'service', 'flag', 'duration'
-        ]
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for log in logs:
-            writer.writerow({
-                'id': log.id,
-                'timestamp': log.timestamp.isoformat() if log.timestamp else '',
-                'result': log.result,
-                'attack_type': log.attack_type or '',
-                'confidence': log.confidence,
-                'severity': log.severity,
-                'protocol': log.protocol or '',
-                'service': log.service or '',
-                'flag': log.flag or '',
-                'duration': log.duration,
-            })
-        
+        # No group commit lands mid-rebuild, so no detection is missed or counted twice
+        with log_writer.exclusive():
+            logs_read = rebuild_rollups(db.connection())
+            db.commit()
+
         return QuickActionResponse(
             success=True,
-            message=f"Exported {len(logs)} logs to CSV",
-            data={"count": len(logs), "format": "CSV"}
+            message="Analytics rollups rebuilt",
+            data={"logs_read": logs_read}
         )
     except Exception as e:
+        db.rollback()
         return QuickActionResponse(
             success=False,
-            message=f"Export failed: {str(e)}"
+            message=f"Rebuild failed: {str(e)}"
         )
     finally:
         db.close()
 
 
-@router.post("/system/actions/clear-database", response_model=QuickActionResponse)
-def clear_database():
-    """Clear all detection logs and notifications (keep settings)."""
-    db = SessionLocal()
-    
+@router.get("/system/retention")
+def get_retention_status():
+    """Retention policy, last run and archive size."""
+    return retention_manager.status()
+
+
+@router.post("/system/actions/archive-expired", response_model=QuickActionResponse)
+def archive_expired_logs(older_than_days: Optional[int] = None):
+    """Archive and drop detection logs older than the retention window (or older_than_days)."""
+    days = retention_manager.retention_days if older_than_days is None else older_than_days
+    if days <= 0:
+        return QuickActionResponse(
+            success=False,
+            message="No retention window: set IDS_LOG_RETENTION_DAYS or pass older_than_days"
+        )
+
     try:
-        # Count records before deletion
-        logs_count = db.query(func.count(DetectionLog.id)).scalar() or 0
-        
-        try:
-            from backend.models.notification import Notification
-            notifications_count = db.query(func.count(Notification.id)).scalar() or 0
-            db.query(Notification).delete()
-        except:
-            notifications_count = 0
-        
-        db.query(DetectionLog).delete()
-        db.commit()
-        
+        run = retention_manager.run(retention_days=days)
+        if "skipped" in run:
+            return QuickActionResponse(success=False, message=f"Archive skipped: {run['skipped']}", data=run)
         return QuickActionResponse(
             success=True,
-            message="Database cleared successfully",
-            data={
-                "logs_deleted": logs_count,
-                "notifications_deleted": notifications_count
-            }
+            message=f"Archived {sum(d['rows'] for d in run['archived'])} logs from {len(run['archived'])} day(s)",
+            data=run
         )
     except Exception as e:
-        db.rollback()
         return QuickActionResponse(
             success=False,
-            message=f"Clear failed: {str(e)}"
+            message=f"Archive failed: {str(e)}"
         )
-    finally:
-        db.close()
 
 
 @router.post("/system/actions/reset-settings", response_model=QuickActionResponse)
@@ -290,6 +281,7 @@ def reset_settings():
     
     try:
         from backend.models.settings import SystemSettings
+        from backend.routes.settings import bump_version
         
         settings = db.query(SystemSettings).filter(SystemSettings.id == 1).first()
         if settings:
@@ -298,7 +290,7 @@ def reset_settings():
             settings.alert_sound = True
             settings.email_alerts = False
             settings.auto_generate_daily_report = True
-            db.commit()
+            bump_version(db, settings)
         
         return QuickActionResponse(
             success=True,
@@ -1,4 +1,10 @@
-from pydantic import BaseModel
+import os
+from typing import List
+from pydantic import BaseModel, Field
+
+# Upper bound on records per /detect/batch request
+MAX_BATCH_SIZE = int(os.getenv("IDS_MAX_BATCH_SIZE", "10000"))
+
 
 class IDSInput(BaseModel):
     duration: int = 0
@@ -42,3 +48,7 @@ class IDSInput(BaseModel):
     dst_host_srv_serror_rate: float = 0
     dst_host_rerror_rate: float = 0
     dst_host_srv_rerror_rate: float = 0
+
+
+class IDSBatchInput(BaseModel):
+    records: List[IDSInput] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
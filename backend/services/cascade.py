@@ -0,0 +1,96 @@
+import os
+import threading
+
+import numpy as np
+
+from backend.services.forest_engine import build_engine
+
+
+# =====================================================
+# Two-Stage Cascade Config
+# =====================================================
+# When model/ids_stage1.pkl exists (ml/train_model.py --stage1), each
+# record is first scored by that small model on a handful of features.
+# Only records whose stage-1 confidence is below CASCADE_MARGIN are
+# escalated to the full forest; the rest keep the stage-1 result.
+#
+#   IDS_STAGE1_MODEL_PATH  stage-1 pickle (missing file = cascade off)
+#   IDS_CASCADE_MARGIN     min stage-1 confidence to skip the forest
+#                          (1.0 effectively escalates everything)
+
+STAGE1_PATH = os.path.abspath(
+    os.getenv(
+        "IDS_STAGE1_MODEL_PATH",
+        os.path.join(os.path.dirname(__file__), "../../model/ids_stage1.pkl"),
+    )
+)
+
+CASCADE_MARGIN = float(os.getenv("IDS_CASCADE_MARGIN", "0.99"))
+
+
+class Stage1Model:
+    """Loaded first-stage model; its features are a subset of the full model's."""
+
+    def __init__(self, model, path: str, full_feature_names):
+        self.model = model
+        self.engine = build_engine(model)
+        self.path = path
+        # Stage-1 columns picked out of the full model's encoded matrix
+        index = {str(name): i for i, name in enumerate(full_feature_names)}
+        missing = [str(name) for name in model.feature_names_in_ if str(name) not in index]
+        if missing:
+            raise ValueError(f"Stage-1 features not in the full model: {missing}")
+        self.columns = np.array([index[str(name)] for name in model.feature_names_in_], dtype=np.intp)
+
+
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = 0
+        self.escalated = 0
+
+    def add(self, records: int, escalated: int):
+        with self._lock:
+            self.records += records
+            self.escalated += escalated
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            records, escalated = self.records, self.escalated
+        return {
+            "records": records,
+            "escalated": escalated,
+            "escalation_rate": round(escalated / records, 4) if records else None,
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+def first_pass(loaded, features, margin: float = None):
+    """
+    Score rows of the full model's encoded matrix with the stage-1 model.
+
+    Returns:
+        (probabilities, escalate) where escalate holds the row indices that
+        still need the full model; probabilities is None without a stage 1
+    """
+    stage1 = loaded.stage1
+    if stage1 is None:
+        return None, np.arange(len(features))
+
+    probabilities = stage1.engine.predict_proba(features[:, stage1.columns])
+
+    margin = CASCADE_MARGIN if margin is None else margin
+    escalate = np.flatnonzero(probabilities.max(axis=1) < margin)
+    cascade_stats.add(len(features), len(escalate))
+    return probabilities, escalate
+
+
+def merge(probabilities, escalate, full_probabilities):
+    """Overwrite the escalated rows with the full model's probabilities."""
+    if probabilities is None:
+        return full_probabilities
+    if len(escalate):
+        probabilities[escalate] = full_probabilities
+    return probabilities
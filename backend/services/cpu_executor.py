@@ -0,0 +1,24 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+# =====================================================
+# CPU Work Executor (async mode)
+# =====================================================
+# Encoding and model scoring from async handlers run here rather
+# than on the event loop or the server's shared threadpool, so a
+# burst of detections can't starve I/O-bound handlers and vice versa.
+#
+#   IDS_CPU_WORKERS  threads for CPU-bound work (default: CPU count)
+
+CPU_WORKERS = int(os.getenv("IDS_CPU_WORKERS", str(os.cpu_count() or 2)))
+
+cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="ids-cpu")
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Await fn(*args, **kwargs) on the CPU executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(fn, *args, **kwargs))
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import threading
+
+
+# =====================================================
+# Live Event Bus Config
+# =====================================================
+# One in-process fan-out for dashboard push updates (GET /events).
+# Publishers (the log writer, notification routes, the health
+# sampler) may be on any thread; each event is serialized once and
+# handed to every subscriber's bounded queue on its event loop.
+#
+#   IDS_EVENTS_QUEUE_SIZE  events buffered per subscriber; a subscriber
+#                          whose queue fills up is disconnected (the
+#                          browser's EventSource reconnects and resyncs)
+
+QUEUE_SIZE = int(os.getenv("IDS_EVENTS_QUEUE_SIZE", "256"))
+
+_CLOSED = object()  # queued after a subscriber is dropped
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def format_event(event_type: str, data) -> str:
+    """One server-sent event frame."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+class Subscription:
+    """One connected client: a bounded queue of ready-to-send SSE frames."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def _offer(self, frame):
+        # Runs on the subscriber's event loop
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSED)
+
+    async def next_frame(self, timeout: float):
+        """Next frame, None on timeout, or raise ConnectionAbortedError if dropped."""
+        try:
+            frame = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if frame is _CLOSED:
+            raise ConnectionAbortedError("Subscriber fell behind and was dropped")
+        return frame
+
+
+class EventBus:
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.stats = {"published": 0, "dropped_subscribers": 0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        """Register a subscriber on the running event loop."""
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        if subscription.dropped:
+            self.stats["dropped_subscribers"] += 1
+
+    def publish(self, event_type: str, data):
+        """Broadcast an event from any thread."""
+        frame = format_event(event_type, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        self.stats["published"] += 1
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, frame)
+            except RuntimeError:
+                # Loop already closed (server shutting down)
+                self.unsubscribe(subscription)
+
+
+event_bus = EventBus()
@@ -0,0 +1,77 @@
+import numpy as np
+
+from backend.schemas.ids_schema import IDSInput
+
+
+# =====================================================
+# Feature Encoder
+# =====================================================
+# Replaces the per-request pd.get_dummies + reindex with a
+# column layout compiled once from model.feature_names_in_.
+# Output is identical to the pandas path: numeric fields are
+# copied into their column, each categorical value sets its
+# one-hot column to 1, unknown categories stay all-zero.
+
+CATEGORICAL_FIELDS = ("protocol_type", "service", "flag")
+NUMERIC_FIELDS = tuple(
+    name for name in IDSInput.model_fields if name not in CATEGORICAL_FIELDS
+)
+
+# RandomForest casts its input to float32, so encode straight into it
+FEATURE_DTYPE = np.float32
+
+
+class FeatureEncoder:
+    """Maps IDSInput records to the model's feature matrix layout."""
+
+    def __init__(self, feature_names):
+        self.feature_names = [str(name) for name in feature_names]
+        self.n_features = len(self.feature_names)
+        column = {name: i for i, name in enumerate(self.feature_names)}
+
+        # (field, column) for every numeric input the model was trained on
+        self.numeric_slots = [
+            (field, column[field]) for field in NUMERIC_FIELDS if field in column
+        ]
+
+        # field -> {category value -> one-hot column}
+        self.category_slots = {}
+        for field in CATEGORICAL_FIELDS:
+            prefix = f"{field}_"
+            self.category_slots[field] = {
+                name[len(prefix):]: i
+                for name, i in column.items()
+                if name.startswith(prefix)
+            }
+
+    def encode(self, record: IDSInput) -> np.ndarray:
+        """Encode a single record into a (1, n_features) matrix."""
+        row = np.zeros((1, self.n_features), dtype=FEATURE_DTYPE)
+        for field, col in self.numeric_slots:
+            row[0, col] = getattr(record, field)
+        for field, slots in self.category_slots.items():
+            col = slots.get(getattr(record, field))
+            if col is not None:
+                row[0, col] = 1
+        return row
+
+    def encode_many(self, records) -> np.ndarray:
+        """Encode a sequence of records into an (n, n_features) matrix."""
+        n = len(records)
+        matrix = np.zeros((n, self.n_features), dtype=FEATURE_DTYPE)
+        if n == 0:
+            return matrix
+
+        for field, col in self.numeric_slots:
+            matrix[:, col] = np.fromiter(
+                (getattr(r, field) for r in records), dtype=np.float64, count=n
+            )
+
+        rows = np.arange(n)
+        for field, slots in self.category_slots.items():
+            cols = np.fromiter(
+                (slots.get(getattr(r, field), -1) for r in records), dtype=np.intp, count=n
+            )
+            known = cols >= 0
+            matrix[rows[known], cols[known]] = 1
+        return matrix
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import literal, tuple_
+
+from backend.database.db import SessionLocal
+from backend.models.detection_log import DetectionLog
+from backend.services.feature_encoder import CATEGORICAL_FIELDS, FEATURE_DTYPE, NUMERIC_FIELDS
+from backend.services.history import hot_ranges
+from backend.services.log_archive import archive_parts, archived_days, read_part
+
+
+# =====================================================
+# Stored Feature Vectors
+# =====================================================
+# Every detection the model scored keeps its full numeric feature vector
+# for retraining in detection_logs.features (test-mode detections carry
+# random verdicts and store none): NUMERIC_FIELDS in IDSInput order, packed
+# as little-endian float32 (152 bytes). That is the precision the
+# forest scores at. The categorical fields are already the protocol /
+# service / flag columns. Never reorder the layout; new fields go at
+# the end (older blobs are then shorter and are skipped by the reader).
+#
+# load_features() returns any time range as one (n, N_FEATURES) matrix:
+# database blobs are joined into a single buffer and viewed in place
+# with np.frombuffer, and archived days read the matrix column as is.
+
+FEATURE_FIELDS = NUMERIC_FIELDS
+N_FEATURES = len(FEATURE_FIELDS)
+PACKED_DTYPE = np.dtype("<f4")
+FEATURE_BYTES = N_FEATURES * PACKED_DTYPE.itemsize
+
+READ_CHUNK_ROWS = 50000
+
+_LABEL_COLUMNS = ("id", "timestamp", "protocol", "service", "flag", "result", "attack_type")
+
+
+def pack_features(record) -> bytes:
+    """Packed feature blob for one IDSInput."""
+    return np.array([getattr(record, field) for field in FEATURE_FIELDS], dtype=PACKED_DTYPE).tobytes()
+
+
+def unpack_features(blobs) -> np.ndarray:
+    """(n, N_FEATURES) float32 matrix over packed blobs, all of FEATURE_BYTES."""
+    buffer = b"".join(blobs)
+    return np.frombuffer(buffer, dtype=PACKED_DTYPE).reshape(-1, N_FEATURES)
+
+
+# ===============================
+# BULK READER
+# ===============================
+def _hot_chunks(lo: datetime, hi: datetime):
+    """Database rows with a current-layout feature blob in [lo, hi), keyset chunks in (timestamp, id) order."""
+    columns = [getattr(DetectionLog, name) for name in _LABEL_COLUMNS] + [DetectionLog.features]
+    key = tuple_(DetectionLog.timestamp, DetectionLog.id)
+
+    last = None
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(*columns).filter(
+                DetectionLog.timestamp >= lo,
+                DetectionLog.timestamp < hi,
+                DetectionLog.features.isnot(None),
+            )
+            if last is not None:
+                query = query.filter(key > tuple_(
+                    literal(last.timestamp, DetectionLog.timestamp.type), literal(last.id, DetectionLog.id.type)
+                ))
+            rows = query.order_by(DetectionLog.timestamp, DetectionLog.id).limit(READ_CHUNK_ROWS).all()
+        finally:
+            db.close()
+        if not rows:
+            return
+        last = rows[-1]
+
+        rows = [row for row in rows if len(row.features) == FEATURE_BYTES]
+        chunk = {
+            name: np.array([getattr(row, name) or "" for row in rows], dtype=object)
+            for name in _LABEL_COLUMNS if name not in ("id", "timestamp")
+        }
+        chunk["id"] = np.array([row.id for row in rows], dtype=np.int64)
+        chunk["timestamp"] = np.array([row.timestamp for row in rows], dtype="datetime64[us]")
+        chunk["features"] = unpack_features(row.features for row in rows)
+        yield chunk
+
+
+def load_features(start: datetime, end: datetime) -> dict:
+    """
+    Stored feature vectors of detections in [start, end), from the
+    archive for the days it covers and the database otherwise.
+
+    Returns:
+        {"features": (n, N_FEATURES) float32, plus id / timestamp /
+         protocol / service / flag / result / attack_type arrays}
+    """
+    last_day = (end - timedelta(microseconds=1)).date() + timedelta(days=1)
+    chunks = []
+    for _, path, _ in archive_parts(start.date(), last_day):
+        chunk = read_part(path, [*_LABEL_COLUMNS, "features"], start, end)
+        # Rows stored before feature vectors existed are NaN
+        keep = ~np.isnan(chunk["features"]).any(axis=1)
+        chunks.append(chunk if keep.all() else {name: values[keep] for name, values in chunk.items()})
+
+    covered = set(archived_days(start.date(), last_day))
+    for lo, hi in hot_ranges(start, end, covered):
+        chunks.extend(_hot_chunks(lo, hi))
+
+    if len(chunks) == 1:
+        return chunks[0]
+    if not chunks:
+        empty = {name: np.array([], dtype=object) for name in _LABEL_COLUMNS}
+        empty["id"] = np.array([], dtype=np.int64)
+        empty["timestamp"] = np.array([], dtype="datetime64[us]")
+        empty["features"] = np.zeros((0, N_FEATURES), dtype=PACKED_DTYPE)
+        return empty
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def model_matrix(batch: dict, encoder) -> np.ndarray:
+    """Place a load_features() batch into a FeatureEncoder's model layout."""
+    n = len(batch["features"])
+    matrix = np.zeros((n, encoder.n_features), dtype=FEATURE_DTYPE)
+    index = {field: i for i, field in enumerate(FEATURE_FIELDS)}
+    for field, col in encoder.numeric_slots:
+        matrix[:, col] = batch["features"][:, index[field]]
+
+    # IDSInput.protocol_type is stored as DetectionLog.protocol
+    stored = {"protocol_type": "protocol", "service": "service", "flag": "flag"}
+    rows = np.arange(n)
+    for field in CATEGORICAL_FIELDS:
+        slots = encoder.category_slots[field]
+        cols = np.fromiter((slots.get(value, -1) for value in batch[stored[field]]), dtype=np.intp, count=n)
+        known = cols >= 0
+        matrix[rows[known], cols[known]] = 1
+    return matrix
+
+
+def feature_frame(batch: dict):
+    """A load_features() batch as a DataFrame in ml/train_model.py's column layout."""
+    import pandas as pd
+
+    frame = pd.DataFrame(batch["features"], columns=list(FEATURE_FIELDS))
+    frame["protocol_type"] = batch["protocol"]
+    frame["service"] = batch["service"]
+    frame["flag"] = batch["flag"]
+    # Model verdicts stand in for labels: "normal" or the attack type
+    frame["label"] = np.where(
+        batch["result"] == "ATTACK",
+        np.where(batch["attack_type"] != "", batch["attack_type"], "attack"),
+        "normal",
+    )
+    return frame
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+import psutil
+from sqlalchemy import func
+
+from backend.database.db import SessionLocal, database_size_mb
+from backend.models.notification import Notification
+from backend.services.model_registry import model_registry
+from backend.services.rollups import rollup_totals
+from backend.services.event_bus import event_bus
+
+
+# =====================================================
+# Health Sampler Config
+# =====================================================
+# System health is sampled in the background and shared: GET
+# /system/health serves the latest sample while it is fresh, and
+# every sample is pushed to /events subscribers, so the number of
+# open dashboards doesn't multiply the queries or the CPU probe.
+# The log count comes from the analytics rollups (so it includes days
+# retention moved to the archive); the notification count is a table
+# count, refreshed less often than the samples.
+#
+#   IDS_HEALTH_SAMPLE_INTERVAL  seconds between samples
+#   IDS_HEALTH_COUNT_INTERVAL   seconds between notification counts
+
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("IDS_HEALTH_SAMPLE_INTERVAL", "5"))
+COUNT_INTERVAL_SECONDS = float(os.getenv("IDS_HEALTH_COUNT_INTERVAL", "60"))
+
+API_START_TIME = datetime.utcnow()
+
+_notification_count = {"value": 0, "counted_at": None}
+
+
+def _count_notifications(db) -> int:
+    counted_at = _notification_count["counted_at"]
+    if counted_at is None or time.monotonic() - counted_at >= COUNT_INTERVAL_SECONDS:
+        _notification_count["value"] = db.query(func.count(Notification.id)).scalar() or 0
+        _notification_count["counted_at"] = time.monotonic()
+    return _notification_count["value"]
+
+
+def collect_health() -> dict:
+    """One system health sample (the SystemHealthResponse fields)."""
+    # CPU usage since the previous call; the sampler's own interval is the window
+    cpu_usage = psutil.cpu_percent(interval=None)
+
+    # Memory Usage
+    memory = psutil.virtual_memory()
+
+    # Disk Usage
+    disk = psutil.disk_usage('/')
+
+    # Database Metrics
+    db = SessionLocal()
+    try:
+        db_logs_count, _ = rollup_totals(db)
+        db_notifications_count = _count_notifications(db)
+        db_size_mb = database_size_mb(db)
+    finally:
+        db.close()
+
+    # Determine overall status
+    overall_status = "healthy"
+    if cpu_usage > 80 or memory.percent > 80 or disk.percent > 80:
+        overall_status = "warning"
+    if cpu_usage > 95 or memory.percent > 95 or disk.percent > 95:
+        overall_status = "critical"
+
+    return {
+        "cpu_usage": cpu_usage,
+        "memory_usage": memory.percent,
+        "memory_total": round(memory.total / (1024 ** 3), 2),  # GB
+        "memory_available": round(memory.available / (1024 ** 3), 2),  # GB
+        "disk_usage": disk.percent,
+        "disk_total": round(disk.total / (1024 ** 3), 2),  # GB
+        "disk_used": round(disk.used / (1024 ** 3), 2),  # GB
+        "db_size_mb": round(db_size_mb, 2),
+        "db_table_count": 5,  # detection_logs, notifications, system_settings, etc.
+        "db_logs_count": db_logs_count,
+        "db_notifications_count": db_notifications_count,
+        "api_uptime_seconds": (datetime.utcnow() - API_START_TIME).total_seconds(),
+        "api_start_time": API_START_TIME.isoformat(),
+        "model_loaded": model_registry.ready,
+        "model_path_exists": os.path.exists(model_registry.path),
+        "overall_status": overall_status,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+class HealthSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._latest = None
+        self._sampled_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self) -> dict:
+        health = collect_health()
+        with self._lock:
+            self._latest, self._sampled_at = health, time.monotonic()
+        event_bus.publish("health", health)
+        return health
+
+    def latest(self) -> dict:
+        """The last sample if it is younger than the interval, otherwise a fresh one."""
+        with self._lock:
+            if self._latest is not None and time.monotonic() - self._sampled_at < self.interval:
+                return self._latest
+        return self.sample()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            # Nobody listening: requests sample on demand instead
+            if event_bus.subscriber_count == 0:
+                continue
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️ Health sample failed: {e}")
+
+    def start(self):
+        if self._thread is None:
+            psutil.cpu_percent(interval=None)  # first call only sets the baseline
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="health-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+health_sampler = HealthSampler()
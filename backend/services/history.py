@@ -0,0 +1,204 @@
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
+
+import numpy as np
+
+from backend.database.db import SessionLocal
+from backend.models.detection_log import DetectionLog
+from backend.services.log_archive import archive_parts, archived_days, read_part
+
+
+# =====================================================
+# Historical Analytics Config
+# =====================================================
+# Long-range aggregations (90 days, a year) over raw detections. Closed
+# days that are in the columnar archive are answered from it, reading
+# only the needed columns and only the parts (and Parquet row groups)
+# that overlap the range; days the archive does not have (today, days
+# not mirrored yet) are read from detection_logs. Mirrored days reflect
+# their last sync (see IDS_HISTORY_RESYNC_DAYS in retention.py).
+#
+#   IDS_HISTORY_HOT_CHUNK  database rows converted per chunk
+
+HOT_CHUNK_ROWS = int(os.getenv("IDS_HISTORY_HOT_CHUNK", "50000"))
+
+HISTORY_DIMENSIONS = ("attack_type", "severity", "service", "protocol", "result")
+BUCKETS = ("hour", "day", "week", "month")
+
+_RANGE_PATTERN = re.compile(r"^(\d+)([hdwy])$")
+_RANGE_UNITS = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1), "y": timedelta(days=365)}
+
+
+def parse_range(value: str) -> timedelta:
+    """'24h' / '30d' / '12w' / '1y' as a timedelta."""
+    match = _RANGE_PATTERN.match(value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid range {value!r} (expected e.g. 24h, 30d, 12w, 1y)")
+    return int(match.group(1)) * _RANGE_UNITS[match.group(2)]
+
+
+# ===============================
+# AGGREGATION
+# ===============================
+def _bucket_codes(timestamps, bucket: str):
+    """Integer bucket keys for datetime64 values."""
+    if bucket == "hour":
+        return timestamps.astype("datetime64[h]").astype(np.int64)
+    if bucket == "month":
+        return timestamps.astype("datetime64[M]").astype(np.int64)
+    days = timestamps.astype("datetime64[D]").astype(np.int64)
+    if bucket == "week":
+        return days - (days + 3) % 7  # 1970-01-01 was a Thursday; weeks start on Monday
+    return days
+
+
+def _bucket_label(code: int, bucket: str) -> str:
+    if bucket == "hour":
+        return f"{np.datetime64(code, 'h')}:00"
+    if bucket == "month":
+        return str(np.datetime64(code, "M"))
+    return str(np.datetime64(code, "D"))
+
+
+def _accumulate(counts: dict, columns: dict, bucket: str, group_by: list, filters: dict):
+    """Add one chunk of column arrays to {(bucket, *group values): [total, attacks]}."""
+    if filters:
+        mask = np.ones(len(columns["timestamp"]), dtype=bool)
+        for name, value in filters.items():
+            mask &= columns[name] == value
+        columns = {name: values[mask] for name, values in columns.items()}
+    if len(columns["timestamp"]) == 0:
+        return
+
+    keys = ([_bucket_codes(columns["timestamp"], bucket)] if bucket else []) + [columns[name] for name in group_by]
+    attacks = columns["result"] == "ATTACK"
+    if not keys:
+        counts[()][0] += len(attacks)
+        counts[()][1] += int(attacks.sum())
+        return
+
+    # One integer per row for the whole key, so a single np.unique groups it
+    uniques, codes = zip(*(np.unique(key, return_inverse=True) for key in keys))
+    combined = np.ravel_multi_index([code.ravel() for code in codes], [len(u) for u in uniques])
+    groups, inverse = np.unique(combined, return_inverse=True)
+    totals = np.bincount(inverse.ravel())
+    attack_totals = np.bincount(inverse.ravel(), weights=attacks)
+
+    values = [u.tolist() for u in uniques]
+    for group, total, attack_count in zip(groups, totals, attack_totals):
+        indexes = np.unravel_index(group, [len(u) for u in uniques])
+        key = tuple(v[i] for v, i in zip(values, indexes))
+        entry = counts[key]
+        entry[0] += int(total)
+        entry[1] += int(attack_count)
+
+
+def _hot_columns(rows, names: list) -> dict:
+    columns = {}
+    for i, name in enumerate(names):
+        values = [row[i] for row in rows]
+        if name == "timestamp":
+            columns[name] = np.array(values, dtype="datetime64[us]")
+        else:
+            columns[name] = np.array([value or "" for value in values], dtype=object)
+    return columns
+
+
+def hot_ranges(start: datetime, end: datetime, covered: set) -> list:
+    """Sub-ranges of [start, end) on days the archive does not cover."""
+    ranges = []
+    day = start.date()
+    while datetime.combine(day, datetime.min.time()) < end:
+        lo = max(start, datetime.combine(day, datetime.min.time()))
+        hi = min(end, datetime.combine(day + timedelta(days=1), datetime.min.time()))
+        if day not in covered:
+            if ranges and ranges[-1][1] == lo:
+                ranges[-1][1] = hi
+            else:
+                ranges.append([lo, hi])
+        day += timedelta(days=1)
+    return ranges
+
+
+# ===============================
+# QUERY
+# ===============================
+def query_history(
+    start: datetime,
+    end: datetime,
+    bucket: str = "day",
+    group_by: list = (),
+    filters: dict = None,
+) -> dict:
+    """
+    Detection counts in [start, end) per time bucket and per value of the
+    `group_by` dimensions, optionally restricted to exact `filters`
+    values (e.g. {"result": "ATTACK"}).
+    """
+    group_by = [name for name in dict.fromkeys(group_by)]
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    needed = list(dict.fromkeys(["timestamp", "result", *group_by, *filters]))
+
+    counts = defaultdict(lambda: [0, 0])
+    sources = {"archive_days": 0, "archive_parts": 0, "archive_rows": 0, "hot_ranges": [], "hot_rows": 0}
+
+    # ─── Archived days: partition and part pruning, column projection ───
+    last_day = (end - timedelta(microseconds=1)).date() + timedelta(days=1)
+    covered = set(archived_days(start.date(), last_day))
+    for _, path, part in archive_parts(start.date(), last_day):
+        part_start = np.datetime64(part["min_timestamp"], "us")
+        part_end = np.datetime64(part["max_timestamp"], "us")
+        if part_end < np.datetime64(start, "us") or part_start >= np.datetime64(end, "us"):
+            continue
+        inside = part_start >= np.datetime64(start, "us") and part_end < np.datetime64(end, "us")
+        columns = read_part(path, needed, None if inside else start, None if inside else end)
+        _accumulate(counts, columns, bucket, group_by, filters)
+        sources["archive_parts"] += 1
+        sources["archive_rows"] += len(columns["timestamp"])
+    sources["archive_days"] = len(covered)
+
+    # ─── Everything else: the live table, filters pushed into SQL ───
+    db = SessionLocal()
+    try:
+        for lo, hi in hot_ranges(start, end, covered):
+            query = db.query(*[getattr(DetectionLog, name) for name in needed]).filter(
+                DetectionLog.timestamp >= lo, DetectionLog.timestamp < hi
+            )
+            for name, value in filters.items():
+                query = query.filter(getattr(DetectionLog, name) == value)
+
+            rows = iter(query.yield_per(HOT_CHUNK_ROWS))
+            while True:
+                chunk = list(islice(rows, HOT_CHUNK_ROWS))
+                if not chunk:
+                    break
+                _accumulate(counts, _hot_columns(chunk, needed), bucket, group_by, {})
+                sources["hot_rows"] += len(chunk)
+            sources["hot_ranges"].append([lo.isoformat(), hi.isoformat()])
+    finally:
+        db.close()
+
+    # ─── Result rows, oldest bucket first, largest group first ───
+    result_rows = []
+    for key, (total, attacks) in counts.items():
+        row = {"bucket": _bucket_label(key[0], bucket)} if bucket else {}
+        values = key[1:] if bucket else key
+        row.update({name: value or None for name, value in zip(group_by, values)})
+        row.update({"total": total, "attacks": attacks})
+        result_rows.append(row)
+    result_rows.sort(key=lambda row: (row.get("bucket", ""), -row["total"]))
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket": bucket,
+        "group_by": group_by,
+        "filters": filters,
+        "total": sum(row["total"] for row in result_rows),
+        "attacks": sum(row["attacks"] for row in result_rows),
+        "rows": result_rows,
+        "sources": sources,
+    }
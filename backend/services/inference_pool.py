@@ -0,0 +1,221 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import joblib
+import numpy as np
+
+from backend.services.forest_engine import build_engine
+from backend.services.feature_encoder import FEATURE_DTYPE
+
+
+# =====================================================
+# Inference Worker Pool Config
+# =====================================================
+# With IDS_INFERENCE_WORKERS > 0, model scoring leaves the request
+# threads (and their GIL) for a pool of worker processes that each
+# hold the model once. Requests arriving within BATCH_WINDOW are
+# stacked into one matrix, written to a shared memory block and
+# scored by a single worker call.
+#
+#   IDS_INFERENCE_WORKERS          worker processes (0 = score in-process)
+#   IDS_INFERENCE_BATCH_WINDOW_MS  how long to wait for more requests
+#   IDS_INFERENCE_MAX_BATCH_ROWS   rows per worker call
+#   IDS_INFERENCE_TIMEOUT          seconds a request waits for its result
+
+WORKERS = int(os.getenv("IDS_INFERENCE_WORKERS", "0"))
+BATCH_WINDOW_SECONDS = float(os.getenv("IDS_INFERENCE_BATCH_WINDOW_MS", "2")) / 1000
+MAX_BATCH_ROWS = int(os.getenv("IDS_INFERENCE_MAX_BATCH_ROWS", "4096"))
+TIMEOUT_SECONDS = float(os.getenv("IDS_INFERENCE_TIMEOUT", "30"))
+
+
+# =====================================================
+# Worker Process Side
+# =====================================================
+
+_worker_state = None  # (model version, engine) held by each worker process
+
+
+def _load_worker_model(path: str, version: str):
+    global _worker_state
+    model = joblib.load(path)
+    # One process per core already; don't let sklearn fan out threads too
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    _worker_state = (version, build_engine(model))
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to the parent's block without letting this process unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track= and registers every attach with the resource tracker
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _score_shared(name: str, shape: tuple, path: str, version: str) -> np.ndarray:
+    """Score the matrix in shared memory block `name` with model `version`."""
+    if _worker_state is None or _worker_state[0] != version:
+        _load_worker_model(path, version)
+
+    shm = _attach(name)
+    try:
+        matrix = np.ndarray(shape, dtype=FEATURE_DTYPE, buffer=shm.buf)
+        proba = _worker_state[1].predict_proba(matrix)
+        del matrix
+    finally:
+        shm.close()
+    return proba
+
+
+# =====================================================
+# Request Side
+# =====================================================
+
+class _Request:
+    def __init__(self, features: np.ndarray, loaded):
+        self.features = features
+        self.path = loaded.path
+        self.version = loaded.version
+        self.future = Future()
+
+
+class InferencePool:
+    """Micro-batching front end for a pool of model-holding worker processes."""
+
+    def __init__(
+        self,
+        workers: int = WORKERS,
+        batch_window: float = BATCH_WINDOW_SECONDS,
+        max_batch_rows: int = MAX_BATCH_ROWS,
+    ):
+        self.workers = workers
+        self.batch_window = batch_window
+        self.max_batch_rows = max_batch_rows
+        self._executor = None
+        self._queue = queue.Queue()
+        self._collector = None
+        self.stats = {"requests": 0, "batches": 0, "rows": 0, "failures": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self, loaded=None):
+        """Spawn the workers, preloading `loaded` (the registry's current model) if given."""
+        if self.workers <= 0 or self.running:
+            return
+        initargs = (loaded.path, loaded.version) if loaded is not None else None
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_worker_model if initargs else None,
+            initargs=initargs or (),
+        )
+        self._collector = threading.Thread(target=self._collect, name="inference-collector", daemon=True)
+        self._collector.start()
+        print(f"⚙️ Inference pool started with {self.workers} worker processes")
+
+    def stop(self):
+        if not self.running:
+            return
+        self._queue.put(None)
+        self._collector.join(timeout=5)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._collector = None
+
+    # ─── Submitting ───
+
+    def submit(self, features: np.ndarray, loaded) -> Future:
+        """Queue an encoded matrix; the future resolves to its predict_proba rows."""
+        request = _Request(np.ascontiguousarray(features, dtype=FEATURE_DTYPE), loaded)
+        self._queue.put(request)
+        return request.future
+
+    def predict_proba(self, features: np.ndarray, loaded) -> np.ndarray:
+        return self.submit(features, loaded).result(timeout=TIMEOUT_SECONDS)
+
+    # ─── Batching ───
+
+    def _collect(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch, rows = [request], len(request.features)
+            deadline = time.monotonic() + self.batch_window
+            stopping = False
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                rows += len(request.features)
+
+            self._dispatch(batch)
+            if stopping:
+                return
+
+    def _dispatch(self, batch: list):
+        # A hot-reload can land mid-window: score each model version separately
+        by_version = {}
+        for request in batch:
+            by_version.setdefault((request.path, request.version), []).append(request)
+
+        for (path, version), requests in by_version.items():
+            try:
+                rows = sum(len(r.features) for r in requests)
+                shape = (rows, requests[0].features.shape[1])
+                shm = shared_memory.SharedMemory(create=True, size=max(1, rows * shape[1] * np.dtype(FEATURE_DTYPE).itemsize))
+                matrix = np.ndarray(shape, dtype=FEATURE_DTYPE, buffer=shm.buf)
+                np.concatenate([r.features for r in requests], out=matrix)
+                del matrix
+
+                future = self._executor.submit(_score_shared, shm.name, shape, path, version)
+                future.add_done_callback(
+                    lambda done, shm=shm, requests=requests: self._complete(done, shm, requests)
+                )
+                self.stats["requests"] += len(requests)
+                self.stats["batches"] += 1
+                self.stats["rows"] += rows
+            except Exception as e:
+                self.stats["failures"] += 1
+                for request in requests:
+                    request.future.set_exception(e)
+
+    def _complete(self, done: Future, shm: shared_memory.SharedMemory, requests: list):
+        try:
+            proba = done.result()
+        except Exception as e:
+            self.stats["failures"] += 1
+            for request in requests:
+                request.future.set_exception(e)
+        else:
+            offset = 0
+            for request in requests:
+                n = len(request.features)
+                request.future.set_result(proba[offset:offset + n])
+                offset += n
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+inference_pool = InferencePool()
@@ -0,0 +1,380 @@
+import json
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from backend.services.feature_encoder import NUMERIC_FIELDS
+
+
+# =====================================================
+# Log Archive Config
+# =====================================================
+# Closed days of detection logs are kept as compressed columnar files,
+# one directory per UTC day:
+#
+#   <IDS_ARCHIVE_DIR>/day=YYYY-MM-DD/_manifest.json
+#   <IDS_ARCHIVE_DIR>/day=YYYY-MM-DD/part-<batch>-<seq>.parquet  (pyarrow installed)
+#   <IDS_ARCHIVE_DIR>/day=YYYY-MM-DD/part-<batch>-<seq>.npz      (fallback: one compressed
+#                                                                 array per column)
+#
+# Rows are appended in batches (rows with ids above the day's max_id).
+# A batch only becomes visible when the manifest listing its parts is
+# renamed into place, so readers never see half-written data. Readers
+# pick days from the directory names, skip parts by their time range
+# and load only the columns they ask for.
+#
+#   IDS_ARCHIVE_DIR          archive root
+#   IDS_ARCHIVE_FORMAT       auto / parquet / npz
+#   IDS_ARCHIVE_COMPRESSION  Parquet codec (zstd, snappy, gzip, ...)
+
+ARCHIVE_DIR = os.path.abspath(
+    os.getenv(
+        "IDS_ARCHIVE_DIR",
+        os.path.join(os.path.dirname(__file__), "../../archive/detection_logs"),
+    )
+)
+ARCHIVE_FORMAT = os.getenv("IDS_ARCHIVE_FORMAT", "auto").lower()
+ARCHIVE_COMPRESSION = os.getenv("IDS_ARCHIVE_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP_ROWS = 65536  # unit of time-range pushdown inside a part
+
+MANIFEST_NAME = "_manifest.json"
+
+FEATURE_WIDTH = len(NUMERIC_FIELDS)  # stored feature vectors (backend/services/feature_store.py)
+
+# Archived columns and their dtypes; NULLs become "" / -1 / NaN
+ARCHIVE_COLUMNS = {
+    "id": "int64",
+    "timestamp": "datetime64[us]",
+    "duration": "int64",
+    "protocol": "str",
+    "service": "str",
+    "flag": "str",
+    "result": "str",
+    "attack_type": "str",
+    "confidence": "float64",
+    "severity": "str",
+    "features": f"float32[{FEATURE_WIDTH}]",  # one matrix row per log
+}
+
+ArchivedLog = namedtuple("ArchivedLog", list(ARCHIVE_COLUMNS))
+
+
+def has_pyarrow() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def archive_format() -> str:
+    if ARCHIVE_FORMAT == "auto":
+        return "parquet" if has_pyarrow() else "npz"
+    return ARCHIVE_FORMAT
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    if timestamp is not None and timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def day_dir(day: date, root: str = None) -> str:
+    return os.path.join(root or ARCHIVE_DIR, f"day={day.isoformat()}")
+
+
+# ===============================
+# CONVERSION
+# ===============================
+def to_columns(rows) -> dict:
+    """Column arrays (ARCHIVE_COLUMNS order) from rows with matching attributes."""
+    columns = {}
+    for name, dtype in ARCHIVE_COLUMNS.items():
+        values = [getattr(row, name) for row in rows]
+        if dtype == "str":
+            columns[name] = np.array([value or "" for value in values], dtype=str)
+        elif name == "features":
+            missing = np.full(FEATURE_WIDTH, np.nan, dtype="<f4").tobytes()
+            blobs = [value if value is not None and len(value) == len(missing) else missing for value in values]
+            columns[name] = np.frombuffer(b"".join(blobs), dtype="<f4").reshape(-1, FEATURE_WIDTH)
+        elif name == "timestamp":
+            columns[name] = np.array([_naive_utc(value) for value in values], dtype=dtype)
+        elif dtype == "float64":
+            columns[name] = np.array([np.nan if value is None else value for value in values], dtype=dtype)
+        else:
+            columns[name] = np.array([-1 if value is None else value for value in values], dtype=dtype)
+    return columns
+
+
+def to_rows(columns: dict) -> list:
+    """Named tuples from column arrays (any subset of ARCHIVE_COLUMNS; timestamps as datetime)."""
+    Row = ArchivedLog if list(columns) == list(ARCHIVE_COLUMNS) else namedtuple("ArchivedLog", list(columns))
+    values = []
+    for name, column in columns.items():
+        if name == "timestamp":
+            column = np.asarray(column, dtype="datetime64[us]").astype(object)
+        elif name == "features":
+            values.append([None if np.isnan(row).any() else row.tobytes() for row in column])
+            continue
+        values.append(column.tolist())
+    return [Row(*row) for row in zip(*values)]
+
+
+# ===============================
+# FILES
+# ===============================
+def _write_atomic(path: str, write):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_part(path: str, columns: dict):
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrays = {name: columns[name] for name in ARCHIVE_COLUMNS}
+        arrays["features"] = pa.FixedSizeListArray.from_arrays(
+            pa.array(columns["features"].reshape(-1)), FEATURE_WIDTH
+        )
+        table = pa.table(arrays)
+        _write_atomic(path, lambda f: pq.write_table(
+            table, f, compression=ARCHIVE_COMPRESSION, row_group_size=PARQUET_ROW_GROUP_ROWS
+        ))
+    else:
+        _write_atomic(path, lambda f: np.savez_compressed(f, **columns))
+
+
+def read_part(path: str, columns=None, start: datetime = None, end: datetime = None) -> dict:
+    """
+    Load only `columns` (default: all) of an archive part as arrays,
+    keeping rows with start <= timestamp < end when bounds are given.
+    """
+    names = list(columns or ARCHIVE_COLUMNS)
+    bounded = start is not None or end is not None
+    load = names if not bounded or "timestamp" in names else names + ["timestamp"]
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        # Row-group statistics let Parquet skip groups outside the range
+        filters = [("timestamp", ">=", start)] if start is not None else []
+        filters += [("timestamp", "<", end)] if end is not None else []
+        table = pq.read_table(path, columns=load, filters=filters or None)
+        data = {}
+        for name in names:
+            column = table.column(name)
+            if name == "features":
+                values = column.combine_chunks().flatten()
+                data[name] = values.to_numpy(zero_copy_only=False).reshape(-1, FEATURE_WIDTH)
+            else:
+                data[name] = column.to_numpy()
+        return data
+
+    # NpzFile decompresses a member only when it is accessed
+    with np.load(path) as archive:
+        data = {name: archive[name] for name in load}
+    if bounded:
+        timestamps = data["timestamp"]
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= np.datetime64(start, "us")
+        if end is not None:
+            mask &= timestamps < np.datetime64(end, "us")
+        data = {name: values[mask] for name, values in data.items()}
+    return {name: data[name] for name in names}
+
+
+# ===============================
+# MANIFESTS
+# ===============================
+def load_manifest(day: date, root: str = None) -> dict:
+    path = os.path.join(day_dir(day, root), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"day": day.isoformat(), "batches": 0, "rows": 0, "max_id": 0, "parts": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def has_manifest(day: date, root: str = None) -> bool:
+    return os.path.exists(os.path.join(day_dir(day, root), MANIFEST_NAME))
+
+
+def _part_info(name: str, columns: dict) -> dict:
+    return {
+        "file": name,
+        "rows": len(columns["id"]),
+        "min_id": int(columns["id"].min()),
+        "max_id": int(columns["id"].max()),
+        "min_timestamp": str(columns["timestamp"].min()),
+        "max_timestamp": str(columns["timestamp"].max()),
+    }
+
+
+def _commit_manifest(day: date, manifest: dict, root: str = None):
+    """Publish a manifest, then remove part files it no longer lists."""
+    directory = day_dir(day, root)
+    _write_atomic(os.path.join(directory, MANIFEST_NAME), lambda f: f.write(json.dumps(manifest, indent=1).encode()))
+
+    # Replaced parts, and parts of an interrupted earlier attempt
+    listed = {part["file"] for part in manifest["parts"]}
+    for name in os.listdir(directory):
+        if name.startswith("part-") and name not in listed:
+            os.remove(os.path.join(directory, name))
+
+
+def append_day(day: date, chunks, max_id: int = None, root: str = None) -> dict:
+    """
+    Append one batch to a day: `chunks` yields row lists (ids above the
+    manifest's max_id), one part file each. `max_id` records that every
+    id up to it is covered (default: the largest id written). Returns the
+    new manifest; if `chunks` raises, nothing becomes visible.
+    """
+    manifest = load_manifest(day, root)
+    directory = day_dir(day, root)
+    os.makedirs(directory, exist_ok=True)
+    batch = manifest["batches"] + 1
+    fmt = archive_format()
+
+    written = []
+    for seq, rows in enumerate(chunks):
+        columns = to_columns(rows)
+        name = f"part-{batch:05d}-{seq:05d}.{fmt}"
+        _write_part(os.path.join(directory, name), columns)
+        written.append(_part_info(name, columns))
+    if not written:
+        return manifest
+
+    manifest = {
+        "day": day.isoformat(),
+        "batches": batch,
+        "rows": manifest["rows"] + sum(part["rows"] for part in written),
+        "max_id": max(manifest["max_id"], max_id or 0, max(part["max_id"] for part in written)),
+        "parts": manifest["parts"] + written,
+    }
+    _commit_manifest(day, manifest, root)
+    return manifest
+
+
+def remove_rows(day: date, start: datetime = None, end: datetime = None, root: str = None) -> int:
+    """Drop a day's archived rows with start <= timestamp < end by rewriting the parts holding them."""
+    manifest = load_manifest(day, root)
+    directory = day_dir(day, root)
+    batch = manifest["batches"] + 1
+    fmt = archive_format()
+
+    parts, removed = [], 0
+    for seq, part in enumerate(manifest["parts"]):
+        columns = read_part(os.path.join(directory, part["file"]))
+        timestamps = columns["timestamp"]
+        drop = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            drop &= timestamps >= np.datetime64(start, "us")
+        if end is not None:
+            drop &= timestamps < np.datetime64(end, "us")
+        if not drop.any():
+            parts.append(part)
+            continue
+
+        removed += int(drop.sum())
+        if not drop.all():
+            columns = {name: values[~drop] for name, values in columns.items()}
+            name = f"part-{batch:05d}-{seq:05d}.{fmt}"
+            _write_part(os.path.join(directory, name), columns)
+            parts.append(_part_info(name, columns))
+
+    if removed:
+        # max_id stays: the removed rows must not be synced back in
+        _commit_manifest(day, {
+            **manifest,
+            "batches": batch,
+            "rows": sum(part["rows"] for part in parts),
+            "parts": parts,
+        }, root)
+    return removed
+
+
+def archived_days(start: date = None, end: date = None, root: str = None) -> list:
+    """Days in [start, end) that have a manifest, oldest first."""
+    root = root or ARCHIVE_DIR
+    if not os.path.isdir(root):
+        return []
+
+    days = []
+    for entry in sorted(os.listdir(root)):
+        if not entry.startswith("day="):
+            continue
+        try:
+            day = date.fromisoformat(entry[len("day="):])
+        except ValueError:
+            continue
+        if (start is not None and day < start) or (end is not None and day >= end):
+            continue
+        if has_manifest(day, root):
+            days.append(day)
+    return days
+
+
+def archive_parts(start: date = None, end: date = None, root: str = None) -> list:
+    """[(day, path, part info)] of committed parts for days in [start, end), oldest first."""
+    parts = []
+    for day in archived_days(start, end, root):
+        directory = day_dir(day, root)
+        for part in load_manifest(day, root)["parts"]:
+            parts.append((day, os.path.join(directory, part["file"]), part))
+    return parts
+
+
+def archive_summary(root: str = None) -> dict:
+    parts = archive_parts(root=root)
+    return {
+        "archive_dir": root or ARCHIVE_DIR,
+        "format": archive_format(),
+        "days": len({day for day, _, _ in parts}),
+        "parts": len(parts),
+        "rows": sum(part["rows"] for _, _, part in parts),
+        "bytes": sum(os.path.getsize(path) for _, path, _ in parts),
+        "oldest_day": parts[0][0].isoformat() if parts else None,
+        "newest_day": parts[-1][0].isoformat() if parts else None,
+    }
+
+
+@contextmanager
+def archive_lock(root: str = None):
+    """
+    Cross-process lock on the archive (one writer across server workers).
+
+    Yields False instead of waiting when another process holds it.
+    """
+    root = root or ARCHIVE_DIR
+    os.makedirs(root, exist_ok=True)
+    handle = open(os.path.join(root, ".lock"), "a+b")
+    try:
+        try:
+            import fcntl
+
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            unlock = lambda: fcntl.flock(handle, fcntl.LOCK_UN)  # noqa: E731
+        except ImportError:  # Windows
+            import msvcrt
+
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            unlock = lambda: (handle.seek(0), msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1))  # noqa: E731
+    except OSError:
+        handle.close()
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        unlock()
+        handle.close()
@@ -0,0 +1,349 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from backend.database.db import SessionLocal
+from backend.database.partitions import insert_logs
+from backend.models.notification import Notification
+from backend.services.notification_coalescer import notification_coalescer
+from backend.services.event_bus import event_bus
+from backend.services.rollups import add_to_rollups
+
+
+# =====================================================
+# Write-Behind Config
+# =====================================================
+# Detection logs and their notifications are queued and written
+# by one background thread in group commits, so many requests
+# share a single transaction (and a single fsync).
+#
+#   IDS_LOG_DURABILITY     sync  → request waits until its group is committed
+#                          async → request returns once the rows are queued
+#   IDS_LOG_FLUSH_SIZE     max rows per group commit
+#   IDS_LOG_FLUSH_INTERVAL max seconds a row waits for its group
+#   IDS_LOG_MAX_PENDING    max queued rows before submit() applies backpressure
+#   IDS_LOG_SUBMIT_TIMEOUT seconds submit() waits for room before giving up
+
+DURABILITY = os.getenv("IDS_LOG_DURABILITY", "sync").lower()
+FLUSH_SIZE = int(os.getenv("IDS_LOG_FLUSH_SIZE", "500"))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("IDS_LOG_FLUSH_INTERVAL", "0.05"))
+MAX_PENDING_ROWS = int(os.getenv("IDS_LOG_MAX_PENDING", "50000"))
+SUBMIT_TIMEOUT_SECONDS = float(os.getenv("IDS_LOG_SUBMIT_TIMEOUT", "1.0"))
+LIVE_EVENT_ROWS = 50  # newest detections included in each "detections" event
+
+
+class LogWriterFull(Exception):
+    """Raised when the write-behind buffer stays full past the submit timeout."""
+
+
+class LogWriterClosed(Exception):
+    """Raised when submitting after the writer has been shut down."""
+
+
+class PendingWrite:
+    """
+    One submission: detection log rows plus optional notifications.
+
+    A notification dict may carry "related_index", the position of the
+    log row it refers to; its related_id is filled in once that row has
+    an id. A "coalesce_window" entry gets the inserted notification's id.
+    """
+
+    def __init__(self, logs: list, notifications: list):
+        self.logs = logs
+        self.notifications = notifications
+        self.log_ids = []
+        self.error = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def size(self) -> int:
+        return len(self.logs) + len(self.notifications)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until committed; re-raise the flush error if it failed."""
+        finished = self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return finished
+
+    async def wait_async(self):
+        """Like wait(), without holding a thread while the group commits."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+
+        with self._lock:
+            if self._done.is_set():
+                resolve()
+            else:
+                self._callbacks.append(lambda: loop.call_soon_threadsafe(resolve))
+        await future
+        if self.error is not None:
+            raise self.error
+
+    def _finish(self, error: Exception = None):
+        with self._lock:
+            self.error = error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class LogWriter:
+    """Background group-commit writer for detection logs and notifications."""
+
+    def __init__(
+        self,
+        durability: str = DURABILITY,
+        flush_size: int = FLUSH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+        max_pending: int = MAX_PENDING_ROWS,
+        submit_timeout: float = SUBMIT_TIMEOUT_SECONDS,
+    ):
+        self.durability = durability
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+
+        self._queue = queue.Queue()
+        self._space = threading.Condition()
+        self._pending_rows = 0
+        self._closed = False
+        self._thread = None
+        self._flush_lock = threading.Lock()
+
+        self.stats = {"groups": 0, "rows": 0, "failed_groups": 0, "rejected": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def pending_rows(self) -> int:
+        return self._pending_rows
+
+    # ─── Submitting ───
+
+    def submit(self, logs: list, notifications: list = (), wait: bool = None, timeout: float = None) -> PendingWrite:
+        """
+        Queue rows for the next group commit.
+
+        Args:
+            logs: DetectionLog column dicts
+            notifications: Notification column dicts
+            wait: Block until committed; defaults to the configured durability
+            timeout: Seconds to wait for buffer room; defaults to submit_timeout
+
+        Raises:
+            LogWriterFull: The buffer had no room within submit_timeout
+            LogWriterClosed: The writer is shutting down
+        """
+        pending = PendingWrite(list(logs), list(notifications))
+
+        # Not started (scripts, benchmarks): write inline
+        if not self.running:
+            if self._closed:
+                raise LogWriterClosed("Log writer is shut down")
+            self._flush([pending])
+            pending.wait()
+            return pending
+
+        with self._space:
+            if self._closed:
+                raise LogWriterClosed("Log writer is shut down")
+            has_room = self._space.wait_for(
+                # An oversized submission is still accepted into an empty buffer
+                lambda: self._pending_rows == 0 or self._pending_rows + pending.size <= self.max_pending,
+                timeout=self.submit_timeout if timeout is None else timeout,
+            )
+            if not has_room:
+                self.stats["rejected"] += 1
+                raise LogWriterFull(f"Log buffer full ({self._pending_rows} rows pending)")
+            self._pending_rows += pending.size
+        self._queue.put(pending)
+
+        if wait if wait is not None else self.durability == "sync":
+            pending.wait()
+        return pending
+
+    @contextmanager
+    def exclusive(self):
+        """Hold off group commits while maintenance runs (submissions keep queueing)."""
+        with self._flush_lock:
+            yield
+
+    # ─── Flushing ───
+
+    def _flush(self, group: list, final: bool = False):
+        with self._flush_lock:
+            self._write_group(group, final)
+
+    def _write_group(self, group: list, final: bool):
+        """Write a group of submissions (and due notification updates) in one transaction."""
+        db = SessionLocal()
+        try:
+            # Into each row's day partition; fills in missing timestamps
+            rows = [row for pending in group for row in pending.logs]
+            ids = insert_logs(db.connection(), rows)
+
+            # Analytics rollups commit with the rows they count
+            add_to_rollups(db.connection(), rows)
+
+            windows = []
+            inserted = []
+            offset = 0
+            for pending in group:
+                pending.log_ids = ids[offset:offset + len(pending.logs)]
+                offset += len(pending.logs)
+                for row in pending.notifications:
+                    row = dict(row)
+                    related_index = row.pop("related_index", None)
+                    if related_index is not None:
+                        row["related_id"] = pending.log_ids[related_index]
+                    window = row.pop("coalesce_window", None)
+                    notification = Notification(**row)
+                    db.add(notification)
+                    inserted.append((notification, row))
+                    if window is not None:
+                        windows.append((window, notification))
+            db.flush()
+            inserted = [(notification.id, row) for notification, row in inserted]
+
+            # Running counts of coalesced attack notifications; the coalescer
+            # only counts them as written (and learns new ids) once committed
+            window_ids = {window: notification.id for window, notification in windows}
+            updates = notification_coalescer.collect_updates(final=final, inserted=window_ids)
+            if updates:
+                db.bulk_update_mappings(Notification, [update for _, update in updates])
+
+            db.commit()
+            notification_coalescer.mark_written(updates, window_ids)
+            if event_bus.subscriber_count:
+                self._publish(db, group, inserted, [update for _, update in updates])
+            self.stats["groups"] += 1
+            self.stats["rows"] += sum(pending.size for pending in group)
+            for pending in group:
+                pending._finish()
+        except Exception as e:
+            db.rollback()
+            self.stats["failed_groups"] += 1
+            print(f"❌ Log flush failed ({len(group)} submissions): {e}")
+            for pending in group:
+                pending._finish(e)
+        finally:
+            db.close()
+
+    def _publish(self, db, group: list, inserted: list, updates: list):
+        """Push what this group committed to live dashboards (one event per kind)."""
+        try:
+            rows = [
+                # The packed feature vector is for retraining, not dashboards
+                {"id": entry_id, **{name: value for name, value in row.items() if name != "features"}}
+                for pending in group
+                for entry_id, row in zip(pending.log_ids, pending.logs)
+            ]
+            if rows:
+                event_bus.publish("detections", {
+                    "count": len(rows),
+                    "attacks": sum(1 for row in rows if row["result"] == "ATTACK"),
+                    "latest": rows[-LIVE_EVENT_ROWS:][::-1],
+                })
+            for notification_id, row in inserted:
+                event_bus.publish("notification", {
+                    "id": notification_id,
+                    "is_read": False,
+                    "count": 1,
+                    "timestamp": row.get("first_seen") or datetime.utcnow(),
+                    **row,
+                })
+            for update in updates:
+                event_bus.publish("notification_update", update)
+            if inserted:
+                unread = db.query(Notification).filter(Notification.is_read == False).count()
+                event_bus.publish("unread_count", {"unread_count": unread})
+        except Exception as e:
+            print(f"⚠️ Live event publish failed: {e}")
+
+    def _release(self, group: list):
+        with self._space:
+            self._pending_rows -= sum(pending.size for pending in group)
+            self._space.notify_all()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                # Idle: still persist running counts / closed notification windows
+                if notification_coalescer.has_pending():
+                    self._flush([])
+                continue
+            if item is None:
+                break
+
+            # Collect more submissions until the group is full or its time is up
+            group, rows = [item], item.size
+            deadline = time.monotonic() + self.flush_interval
+            while rows < self.flush_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                group.append(item)
+                rows += item.size
+
+            self._flush(group)
+            self._release(group)
+
+        # Drain whatever was queued before shutdown
+        group = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                group.append(item)
+        self._flush(group, final=True)
+        self._release(group)
+
+    # ─── Lifecycle ───
+
+    def start(self):
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30):
+        """Stop accepting rows, commit everything already queued, then exit."""
+        with self._space:
+            self._closed = True
+            self._space.notify_all()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+            print(f"📝 Log writer drained ({self.stats['rows']} rows in {self.stats['groups']} group commits)")
+
+
+log_writer = LogWriter()
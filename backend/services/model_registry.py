@@ -0,0 +1,218 @@
+import hashlib
+import os
+import threading
+import time
+
+import joblib
+
+from backend.schemas.ids_schema import IDSInput
+from backend.services.feature_encoder import FeatureEncoder
+from backend.services.forest_engine import build_engine
+from backend.services.cascade import STAGE1_PATH, CASCADE_MARGIN, Stage1Model
+
+
+# =====================================================
+# Model Registry Config
+# =====================================================
+# The model is loaded once per process and kept resident.
+# A background watcher polls the pickle and hot-swaps it
+# when the file changes (mtime first, then content hash).
+# The optional stage-1 cascade model is watched alongside it.
+
+MODEL_PATH = os.path.abspath(
+    os.getenv(
+        "IDS_MODEL_PATH",
+        os.path.join(os.path.dirname(__file__), "../../model/ids_model.pkl"),
+    )
+)
+
+RELOAD_INTERVAL_SECONDS = float(os.getenv("IDS_MODEL_RELOAD_INTERVAL", "5"))
+
+
+def _file_sha256(path: str) -> str:
+    """Hash the model file in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LoadedModel:
+    """Snapshot of a loaded model and the file it came from."""
+
+    def __init__(self, model, path: str, mtime: float, sha256: str, stage1: Stage1Model = None):
+        self.model = model
+        self.encoder = FeatureEncoder(model.feature_names_in_)
+        self.engine = build_engine(model)
+        self.stage1 = stage1
+        self.stage1_file = None  # (mtime, sha256) of the stage-1 pickle seen at load time
+        self.path = path
+        self.mtime = mtime
+        self.sha256 = sha256
+        self.version = sha256[:12]
+        self.loaded_at = time.time()
+
+    @property
+    def scoring_version(self):
+        """Changes whenever either pickle does; keys cached predictions."""
+        return (self.sha256, self.stage1_file[1] if self.stage1_file else None)
+
+
+class ModelRegistry:
+    """Process-wide holder of the resident IDS model."""
+
+    def __init__(
+        self,
+        path: str = MODEL_PATH,
+        reload_interval: float = RELOAD_INTERVAL_SECONDS,
+        stage1_path: str = STAGE1_PATH,
+    ):
+        self.path = path
+        self.stage1_path = stage1_path
+        self.reload_interval = reload_interval
+        self._current = None
+        self._last_error = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    # ─── Readiness ───
+
+    @property
+    def current(self):
+        """The active LoadedModel, or None if no model is ready."""
+        return self._current
+
+    @property
+    def ready(self) -> bool:
+        return self._current is not None
+
+    def status(self) -> dict:
+        current = self._current
+        return {
+            "ready": current is not None,
+            "model_path": self.path,
+            "model_path_exists": os.path.exists(self.path),
+            "version": current.version if current else None,
+            "engine": current.engine.name if current else None,
+            "stage1": current.stage1.path if current and current.stage1 else None,
+            "cascade_margin": CASCADE_MARGIN if current and current.stage1 else None,
+            "loaded_at": current.loaded_at if current else None,
+            "last_error": self._last_error,
+        }
+
+    # ─── Loading ───
+
+    def _warmup(self, loaded: LoadedModel):
+        """Run one prediction so the first real request doesn't pay for lazy init."""
+        loaded.engine.predict_proba(loaded.encoder.encode(IDSInput()))
+        if loaded.stage1 is not None:
+            loaded.stage1.engine.predict_proba(loaded.encoder.encode(IDSInput())[:, loaded.stage1.columns])
+
+    def _stage1_mtime(self):
+        try:
+            return os.path.getmtime(self.stage1_path)
+        except OSError:
+            return None
+
+    def _load_stage1(self, model):
+        """The stage-1 model, or None if not compatible with the full model."""
+        try:
+            stage1 = Stage1Model(joblib.load(self.stage1_path), self.stage1_path, model.feature_names_in_)
+        except ValueError as e:
+            print(f"⚠️ {e}, cascade disabled")
+            return None
+        if list(stage1.model.classes_) != list(model.classes_):
+            print(f"⚠️ Stage-1 model classes {list(stage1.model.classes_)} don't match the full model, cascade disabled")
+            return None
+        return stage1
+
+    def load(self, force: bool = False) -> bool:
+        """
+        Load the model if the file changed since the last load.
+
+        The new model is unpickled and warmed up before it replaces the
+        current one, so readers always see a complete, warmed-up model.
+
+        Returns:
+            True if a new model was swapped in.
+        """
+        with self._load_lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                self._last_error = f"Model file not found: {e}"
+                return False
+
+            stage1_mtime = self._stage1_mtime()
+            current = self._current
+            if (
+                not force
+                and current is not None
+                and current.mtime == mtime
+                and (current.stage1_file or (None,))[0] == stage1_mtime
+            ):
+                return False
+
+            try:
+                sha256 = _file_sha256(self.path)
+                stage1_sha256 = _file_sha256(self.stage1_path) if stage1_mtime is not None else None
+                if (
+                    not force
+                    and current is not None
+                    and current.sha256 == sha256
+                    and (current.stage1_file or (None, None))[1] == stage1_sha256
+                ):
+                    # Touched but unchanged — remember the new mtimes and keep the models
+                    current.mtime = mtime
+                    current.stage1_file = (stage1_mtime, stage1_sha256) if stage1_mtime is not None else None
+                    return False
+
+                model = joblib.load(self.path)
+                stage1 = self._load_stage1(model) if stage1_mtime is not None else None
+                loaded = LoadedModel(model, self.path, mtime, sha256, stage1)
+                if stage1_mtime is not None:
+                    loaded.stage1_file = (stage1_mtime, stage1_sha256)
+                self._warmup(loaded)
+            except Exception as e:
+                self._last_error = f"Failed to load model: {e}"
+                print(f"❌ {self._last_error}")
+                return False
+
+            self._current = loaded
+            self._last_error = None
+            cascade = f", stage-1 cascade at {CASCADE_MARGIN}" if loaded.stage1 else ""
+            print(f"✅ Model loaded (version {loaded.version}, {loaded.engine.name} engine{cascade})")
+            return True
+
+    # ─── Background watcher ───
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            self.load()
+
+    def start(self):
+        """Load the model and start watching the file for changes."""
+        self.load()
+        if self._watcher is None and self.reload_interval > 0:
+            self._stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, name="model-registry-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.reload_interval + 1)
+            self._watcher = None
+
+
+model_registry = ModelRegistry()
+
+
+def get_model():
+    """Return the resident model, or None if it isn't loaded yet."""
+    current = model_registry.current
+    return current.model if current else None
@@ -0,0 +1,199 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+
+# =====================================================
+# Attack Notification Coalescing Config
+# =====================================================
+# Repeated attacks with the same (attack_type, severity) are folded
+# into one ATTACK notification per window instead of one row each.
+# The first attack of a window inserts the notification; later ones
+# only bump an in-memory counter, which the log writer persists at
+# most every UPDATE_INTERVAL and once more when the window closes.
+#
+#   IDS_NOTIFY_WINDOW           seconds without a repeat before a window closes
+#   IDS_NOTIFY_MAX_WINDOW       seconds after which a window always closes
+#   IDS_NOTIFY_UPDATE_INTERVAL  seconds between running-count updates
+
+WINDOW_SECONDS = float(os.getenv("IDS_NOTIFY_WINDOW", "60"))
+MAX_WINDOW_SECONDS = float(os.getenv("IDS_NOTIFY_MAX_WINDOW", "3600"))
+UPDATE_INTERVAL_SECONDS = float(os.getenv("IDS_NOTIFY_UPDATE_INTERVAL", "5"))
+
+PRIORITY_PREFIX = {
+    "CRITICAL": "🔴 CRITICAL",
+    "HIGH": "🟠 HIGH",
+    "MEDIUM": "🟡 MEDIUM",
+    "LOW": "🔵 LOW",
+}
+
+
+class AttackWindow:
+    """Running tally for one (attack_type, severity) key."""
+
+    def __init__(self, attack_type, severity: str, confidence: float, count: int, now: datetime):
+        self.attack_type = attack_type
+        self.severity = severity
+        self.first_seen = now
+        self.last_seen = now
+        self.count = count
+        self.max_confidence = confidence
+        self.notification_id = None  # set by the log writer once inserted
+        self.written_count = count
+        self.written_at = now
+
+    def expired(self, now: datetime) -> bool:
+        return (
+            now - self.last_seen >= timedelta(seconds=WINDOW_SECONDS)
+            or now - self.first_seen >= timedelta(seconds=MAX_WINDOW_SECONDS)
+        )
+
+    def message(self) -> str:
+        if self.count == 1:
+            return f"Attack detected with {self.max_confidence*100:.0f}% confidence. Severity: {self.severity}"
+        return (
+            f"{self.count} attacks detected between {self.first_seen:%H:%M:%S} and "
+            f"{self.last_seen:%H:%M:%S} UTC, up to {self.max_confidence*100:.0f}% confidence. "
+            f"Severity: {self.severity}"
+        )
+
+
+class NotificationCoalescer:
+    """In-memory index of open attack notification windows."""
+
+    def __init__(self):
+        self._windows = {}
+        self._closed = []
+        self._lock = threading.Lock()
+        self.stats = {"attacks": 0, "notifications": 0, "updates": 0}
+
+    def record(self, attack_type, severity: str, confidence: float, count: int = 1, now: datetime = None):
+        """
+        Count attacks against their window.
+
+        Returns:
+            A Notification column dict when this opens a new window (the
+            caller queues it on the log writer), otherwise None.
+        """
+        now = now or datetime.utcnow()
+        key = (attack_type, severity)
+
+        with self._lock:
+            self.stats["attacks"] += count
+            window = self._windows.get(key)
+            if window is not None and not window.expired(now):
+                window.count += count
+                window.last_seen = now
+                window.max_confidence = max(window.max_confidence, confidence)
+                return None
+
+            if window is not None:
+                self._closed.append(window)
+            window = AttackWindow(attack_type, severity, confidence, count, now)
+            self._windows[key] = window
+            self.stats["notifications"] += 1
+
+        return {
+            "type": "ATTACK",
+            "title": f"{PRIORITY_PREFIX.get(severity, '⚪')}: {attack_type or 'Attack'} Detected",
+            "message": window.message(),
+            "severity": severity,
+            "count": window.count,
+            "first_seen": window.first_seen,
+            "last_seen": window.last_seen,
+            "coalesce_window": window,
+        }
+
+    def reset(self, notification_ids=None) -> int:
+        """
+        Forget the windows whose notifications were deleted (every window
+        when notification_ids is None), so the next attack of that kind
+        opens a new notification instead of counting into a missing row.
+        Call under log_writer.exclusive(), after the delete is committed.
+
+        Returns:
+            The number of windows dropped
+        """
+        with self._lock:
+            def deleted(window):
+                return notification_ids is None or window.notification_id in notification_ids
+
+            dropped = [key for key, window in self._windows.items() if deleted(window)]
+            for key in dropped:
+                del self._windows[key]
+            closed = len(self._closed)
+            self._closed = [window for window in self._closed if not deleted(window)]
+            return len(dropped) + closed - len(self._closed)
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._closed) or any(
+                w.count != w.written_count for w in self._windows.values()
+            )
+
+    def collect_updates(self, final: bool = False, now: datetime = None, inserted: dict = None) -> list:
+        """
+        Notification updates due now, as (window, bulk_update_mappings dict) pairs.
+
+        Windows that changed are written at most every UPDATE_INTERVAL;
+        expired windows are written one last time and dropped. With
+        final=True every window is flushed and closed (shutdown).
+        `inserted` maps windows to the notification ids the caller's
+        transaction just inserted for them.
+
+        Nothing counts as written until mark_written() is called after the
+        commit, so a failed commit leaves the updates due for the next one.
+        """
+        now = now or datetime.utcnow()
+        inserted = inserted or {}
+        interval = timedelta(seconds=UPDATE_INTERVAL_SECONDS)
+        due = []
+
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                if final or window.expired(now):
+                    del self._windows[key]
+                    self._closed.append(window)
+
+            # A closed window stays listed until its last update is written
+            closed = []
+            for window in self._closed:
+                notification_id = window.notification_id or inserted.get(window)
+                if notification_id is not None and window.count != window.written_count:
+                    due.append((window, notification_id))
+                    closed.append(window)
+            self._closed = closed
+
+            for window in self._windows.values():
+                notification_id = window.notification_id or inserted.get(window)
+                if (
+                    notification_id is not None
+                    and window.count != window.written_count
+                    and now - window.written_at >= interval
+                ):
+                    due.append((window, notification_id))
+
+            return [
+                (window, {
+                    "id": notification_id,
+                    "count": window.count,
+                    "last_seen": window.last_seen,
+                    "message": window.message(),
+                })
+                for window, notification_id in due
+            ]
+
+    def mark_written(self, updates: list, inserted: dict = None, now: datetime = None):
+        """Record a committed transaction: its inserted notification ids and collect_updates() result."""
+        now = now or datetime.utcnow()
+        with self._lock:
+            for window, notification_id in (inserted or {}).items():
+                window.notification_id = notification_id
+            for window, update in updates:
+                window.written_count = update["count"]
+                window.written_at = now
+            self._closed = [window for window in self._closed if window.count != window.written_count]
+            self.stats["updates"] += len(updates)
+
+
+notification_coalescer = NotificationCoalescer()
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+
+import numpy as np
+
+
+# =====================================================
+# Prediction Cache Config
+# =====================================================
+# Floods repeat the same connection record over and over, so model
+# output is memoized per encoded feature vector: the key is a 128-bit
+# blake2b of the row's float32 bytes. Entries live for TTL seconds in
+# an LRU of at most SIZE rows, and the whole cache is dropped when
+# the model version changes. Duplicate rows within one batch are
+# scored once even when they aren't cached yet.
+#
+#   IDS_PREDICTION_CACHE_SIZE  max cached rows (0 = disabled)
+#   IDS_PREDICTION_CACHE_TTL   seconds an entry stays valid
+
+CACHE_SIZE = int(os.getenv("IDS_PREDICTION_CACHE_SIZE", "100000"))
+CACHE_TTL_SECONDS = float(os.getenv("IDS_PREDICTION_CACHE_TTL", "300"))
+
+
+def row_key(row: np.ndarray) -> bytes:
+    return blake2b(row.tobytes(), digest_size=16).digest()
+
+
+class CachePlan:
+    """
+    Result of looking a feature matrix up in the cache.
+
+    `probabilities` has the cached rows filled in; `misses` are the rows
+    that still need scoring (one per distinct missing vector). fill()
+    takes their probabilities, copies them to duplicate rows and caches them.
+    """
+
+    def __init__(self, cache, version, keys, probabilities, misses, owners):
+        self.cache = cache
+        self.version = version
+        self.keys = keys
+        self.probabilities = probabilities
+        self.misses = misses
+        self.owners = owners
+
+    def fill(self, miss_probabilities: np.ndarray):
+        if self.keys is None:
+            self.probabilities[self.misses] = miss_probabilities
+            return
+        entries = []
+        for i, row in zip(self.misses, miss_probabilities):
+            key = self.keys[i]
+            self.probabilities[self.owners[key]] = row
+            entries.append((key, row.copy()))
+        self.cache.put_many(self.version, entries)
+
+
+class PredictionCache:
+    """Thread-safe LRU + TTL map from feature-vector hash to predict_proba row."""
+
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (probabilities row, expires_at)
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "deduplicated": 0,  # repeats of a missing vector within the same batch
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _check_version(self, version):
+        # Caller holds the lock
+        if version != self._version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+
+    def plan(self, version, features: np.ndarray, n_classes: int) -> CachePlan:
+        """Look up every row of `features`, scored by model `version`."""
+        n = len(features)
+        probabilities = np.empty((n, n_classes), dtype=np.float64)
+        if not self.enabled:
+            return CachePlan(self, version, None, probabilities, np.arange(n), None)
+
+        keys = [row_key(row) for row in features]
+        owners = {}  # missing key -> every row index holding that vector
+        misses = []
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version(version)
+            for i, key in enumerate(keys):
+                if key in owners:
+                    owners[key].append(i)
+                    self.stats["deduplicated"] += 1
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry[1] > now:
+                        self._entries.move_to_end(key)
+                        probabilities[i] = entry[0]
+                        self.stats["hits"] += 1
+                        continue
+                    del self._entries[key]
+                    self.stats["expirations"] += 1
+                owners[key] = [i]
+                misses.append(i)
+            self.stats["misses"] += len(misses)
+
+        return CachePlan(self, version, keys, probabilities, np.array(misses, dtype=np.intp), owners)
+
+    def put_many(self, version, entries: list):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if version != self._version:
+                return  # model swapped while this batch was being scored
+            for key, row in entries:
+                self._entries[key] = (row, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "size": size,
+            "max_size": self.max_size,
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+prediction_cache = PredictionCache()
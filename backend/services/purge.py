@@ -0,0 +1,359 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, literal, select, tuple_
+
+from backend.database.db import SessionLocal, reclaim_space
+from backend.database.partitions import day_bounds, drop_partition, last_log_id, list_partitions, lock_inserts, partition_table
+from backend.models.detection_log import DetectionLog
+from backend.models.notification import Notification
+from backend.services.log_archive import archive_lock, archived_days, day_dir, remove_rows
+from backend.services.log_writer import log_writer
+from backend.services.notification_coalescer import notification_coalescer
+from backend.services.rollups import (
+    DIMENSIONS, REBUILD_CHUNK_ROWS, aggregate, cold_archive_rows, drop_empty_rollups, minute_cutoff, subtract_counts,
+    subtract_from_rollups,
+)
+
+
+# =====================================================
+# Purge Config
+# =====================================================
+# Deleting detection logs (a time range or everything) runs as one
+# background job. Only rows that existed when the job started are
+# purged. Days wholly inside the range that received no rows since then
+# have their partition dropped (backend/database/partitions.py); the
+# others (the range edges, today) are deleted in chunks of short
+# transactions with a pause in between, so /detect group commits keep
+# getting the write lock. Rows leave the analytics rollups in the
+# transaction that removes them. The coalescer forgets the attack
+# windows of purged notifications, so their next attack opens a new
+# notification instead of counting into a deleted row. Archived copies
+# of the range go too (days inside it are removed, days at its edges
+# rewritten), so history and rollup rebuilds agree. Freed pages go back
+# to the OS via incremental vacuum at the end.
+#
+#   IDS_PURGE_CHUNK  rows deleted per transaction at the range edges
+#   IDS_PURGE_PAUSE  seconds between chunks
+
+CHUNK_ROWS = int(os.getenv("IDS_PURGE_CHUNK", "1000"))
+PAUSE_SECONDS = float(os.getenv("IDS_PURGE_PAUSE", "0.01"))
+
+
+class PurgeRunning(Exception):
+    """Raised when starting a purge while another one is running."""
+
+
+class PurgeCancelled(Exception):
+    pass
+
+
+class PurgeManager:
+    def __init__(self, chunk_rows: int = CHUNK_ROWS, pause: float = PAUSE_SECONDS, bind=None):
+        self.chunk_rows = chunk_rows
+        self.pause = pause
+        self._bind = bind
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+        self.job = None
+
+    @property
+    def bind(self):
+        """The engine given to the constructor, else the one SessionLocal is bound to."""
+        return self._bind or SessionLocal.kw["bind"]
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> dict:
+        """The running or last purge job (None before the first)."""
+        with self._lock:
+            if self.job is None:
+                return None
+            job = dict(self.job)
+        total = job["logs_total"] + job["notifications_total"]
+        done = job["logs_deleted"] + job["notifications_deleted"]
+        job["progress"] = round(min(done / total, 1) * 100, 1) if total else (100.0 if job["state"] == "completed" else 0.0)
+        return job
+
+    def _update(self, **changes):
+        with self._lock:
+            self.job.update(changes)
+
+    def _add(self, name: str, n: int):
+        with self._lock:
+            self.job[name] += n
+
+    # ─── Control ───
+
+    def start(
+        self,
+        start: datetime = None,
+        end: datetime = None,
+        notifications: bool = True,
+        archive: bool = True,
+        wait: bool = False,
+    ) -> dict:
+        """
+        Purge detection logs with start <= timestamp < end (open bounds:
+        everything), plus notifications in the same range and, with
+        `archive`, the archived copies of logs in the range.
+
+        Raises:
+            PurgeRunning: Another purge has not finished
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise PurgeRunning(f"Purge {self.job['id']} is still {self.job['state']}")
+            self._cancel.clear()
+            self.job = {
+                "id": uuid.uuid4().hex[:12],
+                "state": "running",
+                "phase": "counting",
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+                "notifications": notifications,
+                "archive": archive,
+                "logs_total": 0,
+                "logs_deleted": 0,
+                "notifications_total": 0,
+                "notifications_deleted": 0,
+                "archive_days_purged": 0,
+                "vacuumed": False,
+                "error": None,
+                "started_at": datetime.utcnow().isoformat(),
+                "finished_at": None,
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(start, end, notifications, archive), name="purge", daemon=True
+            )
+            self._thread.start()
+
+        if wait:
+            self._thread.join()
+        return self.status()
+
+    def cancel(self) -> bool:
+        """Stop the running purge after its current chunk; rows already deleted stay deleted."""
+        if not self.running:
+            return False
+        self._cancel.set()
+        self._update(state="cancelling")
+        return True
+
+    def stop(self):
+        if self.running:
+            self._cancel.set()
+            self._thread.join(timeout=30)
+
+    # ─── Job ───
+
+    def _checkpoint(self):
+        if self._cancel.is_set():
+            raise PurgeCancelled()
+        if self.pause:
+            # Lets queued /detect group commits take the write lock
+            time.sleep(self.pause)
+
+    def _run(self, start, end, notifications, archive):
+        try:
+            with archive_lock() as locked:
+                if not locked:
+                    raise RuntimeError("A retention run is archiving; retry once it finishes")
+                self._purge(start, end, notifications, archive)
+            self._update(phase="vacuum")
+            self._update(vacuumed=reclaim_space(self.bind), state="completed")
+        except PurgeCancelled:
+            self._update(state="cancelled")
+        except Exception as e:
+            print(f"⚠️ Purge failed: {e}")
+            self._update(state="failed", error=str(e))
+        finally:
+            self._update(phase=None, finished_at=datetime.utcnow().isoformat())
+
+        job = self.status()
+        print(
+            f"🧹 Purge {job['id']} {job['state']}: {job['logs_deleted']} logs, "
+            f"{job['notifications_deleted']} notifications, {job['archive_days_purged']} archived day(s)"
+        )
+
+    def _purge(self, start, end, notifications, archive):
+        """Runs under the archive lock, so retention never moves rows mid-purge."""
+        log_filter = self._range(DetectionLog.timestamp, start, end)
+        notification_filter = self._range(Notification.timestamp, start, end)
+
+        db = SessionLocal(bind=self.bind)
+        try:
+            # Rows inserted from here on are kept
+            up_to_log_id = last_log_id(db.connection())
+            last_notification_id = db.query(func.max(Notification.id)).scalar() or 0
+            logs_total = db.query(func.count(DetectionLog.id)).filter(
+                DetectionLog.id <= up_to_log_id, *log_filter
+            ).scalar()
+            notifications_total = db.query(func.count(Notification.id)).filter(
+                Notification.id <= last_notification_id, *notification_filter
+            ).scalar() if notifications else 0
+        finally:
+            db.close()
+        self._update(logs_total=logs_total, notifications_total=notifications_total)
+
+        if archive:
+            self._update(phase="archive")
+            self._purge_archive(start, end)
+
+        self._update(phase="detection_logs")
+        self._purge_logs(start, end, up_to_log_id)
+
+        if notifications:
+            self._update(phase="notifications")
+            self._purge_notifications(notification_filter, last_notification_id)
+
+    @staticmethod
+    def _range(column, start, end) -> list:
+        return ([column >= start] if start else []) + ([column < end] if end else [])
+
+    def _purge_logs(self, start, end, last_id: int):
+        with self.bind.connect() as conn:
+            days = list_partitions(conn)
+        for day in days:
+            day_start, day_end = day_bounds(day)
+            if (start is not None and day_end <= start) or (end is not None and day_start >= end):
+                continue
+            whole_day = (start is None or start <= day_start) and (end is None or day_end <= end)
+            dropped = self._drop_day(day, last_id) if whole_day else None
+            if dropped is not None:
+                self._add("logs_deleted", dropped)
+            else:
+                self._delete_rows(day, start, end, last_id)
+
+        with self.bind.begin() as conn:
+            drop_empty_rollups(conn)
+
+    def _drop_day(self, day, last_id: int):
+        """
+        Uncount a whole day from the rollups and drop its partition; returns
+        the rows dropped. None (nothing dropped) when the day has rows newer
+        than the job, which must be kept: its rows are deleted instead.
+        """
+        table = partition_table(day)
+        columns = [table.c.id, table.c.timestamp] + [table.c[d] for d in DIMENSIONS]
+        since = minute_cutoff()
+        newer = select(table.c.id).where(table.c.id > last_id).limit(1)
+        with self.bind.connect() as conn:
+            if conn.execute(newer).first() is not None:
+                return None
+
+        # Counted before taking the lock, so /detect keeps writing meanwhile
+        counts, counted, last = aggregate([]), [], 0
+        while True:
+            self._checkpoint()
+            with self.bind.connect() as conn:
+                rows = conn.execute(
+                    select(*columns).where(table.c.id > last).order_by(table.c.id).limit(REBUILD_CHUNK_ROWS)
+                ).all()
+            if not rows:
+                break
+            aggregate(rows, minutes_since=since, counts=counts)
+            counted.append(np.array([row.id for row in rows], dtype=np.int64))
+            last = rows[-1].id
+        counted = np.concatenate(counted) if counted else np.empty(0, dtype=np.int64)
+
+        with self.bind.begin() as conn:
+            lock_inserts(conn)
+            if conn.execute(newer).first() is not None:
+                return None  # a row arrived meanwhile (nothing is changed yet)
+            # Rows committed since they were counted (Postgres ids can commit out of order)
+            ids = np.fromiter(conn.execute(select(table.c.id)).scalars(), dtype=np.int64)
+            late = ids[~np.isin(ids, counted)]
+            for i in range(0, len(late), self.chunk_rows):
+                rows = conn.execute(select(*columns).where(table.c.id.in_(late[i:i + self.chunk_rows].tolist()))).all()
+                aggregate(rows, minutes_since=since, counts=counts)
+            subtract_counts(conn, counts)
+            drop_partition(conn, day)
+        return len(ids)
+
+    def _delete_rows(self, day, start, end, last_id: int):
+        """Delete the part of a day inside [start, end), a chunk per transaction."""
+        table = partition_table(day)
+        columns = [table.c.id, table.c.timestamp] + [table.c[d] for d in DIMENSIONS]
+        key = tuple_(table.c.timestamp, table.c.id)
+        in_range = self._range(table.c.timestamp, start, end)
+
+        last = None
+        while True:
+            self._checkpoint()
+            with self.bind.begin() as conn:
+                # (timestamp, id) keyset: each chunk is an index range seek
+                query = select(*columns).where(table.c.id <= last_id, *in_range)
+                if last is not None:
+                    query = query.where(key > tuple_(
+                        literal(last.timestamp, table.c.timestamp.type), literal(last.id, table.c.id.type)
+                    ))
+                rows = conn.execute(query.order_by(table.c.timestamp, table.c.id).limit(self.chunk_rows)).all()
+                if not rows:
+                    return
+                subtract_from_rollups(conn, rows)
+                deleted = conn.execute(table.delete().where(table.c.id.in_([row.id for row in rows]))).rowcount
+            self._add("logs_deleted", deleted)
+            last = rows[-1]
+
+    def _purge_notifications(self, notification_filter: list, last_id: int):
+        while True:
+            self._checkpoint()
+            db = SessionLocal(bind=self.bind)
+            try:
+                ids = [
+                    row.id for row in
+                    db.query(Notification.id)
+                    .filter(Notification.id <= last_id, *notification_filter)
+                    .order_by(Notification.id)
+                    .limit(self.chunk_rows)
+                ]
+                if not ids:
+                    return
+                # No group commit updates these rows between the delete and the reset
+                with log_writer.exclusive():
+                    deleted = db.query(Notification).filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+                    db.commit()
+                    notification_coalescer.reset(set(ids))
+            finally:
+                db.close()
+            self._add("notifications_deleted", deleted)
+
+    def _purge_archive(self, start, end):
+        """Drop archived rows in [start, end), uncounting those only the archive still has."""
+        last_day = (end - timedelta(microseconds=1)).date() + timedelta(days=1) if end else None
+        for day in archived_days(start.date() if start else None, last_day):
+            self._checkpoint()
+            day_start = datetime.combine(day, datetime.min.time())
+            whole_day = (start is None or start <= day_start) and (end is None or day_start + timedelta(days=1) <= end)
+
+            db = SessionLocal(bind=self.bind)
+            try:
+                for rows in cold_archive_rows(db.connection(), [day]):
+                    if not whole_day:
+                        rows = [
+                            row for row in rows
+                            if (start is None or row.timestamp >= start) and (end is None or row.timestamp < end)
+                        ]
+                    subtract_from_rollups(db.connection(), rows)
+                db.commit()
+            finally:
+                db.close()
+
+            # After the commit: if this fails, a rollup rebuild recounts the rows
+            if whole_day:
+                shutil.rmtree(day_dir(day))
+            else:
+                remove_rows(day, start, end)
+            self._add("archive_days_purged", 1)
+
+
+purge_manager = PurgeManager()
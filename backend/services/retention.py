@@ -0,0 +1,243 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import literal, select, tuple_
+
+from backend.database.db import SessionLocal, reclaim_space
+from backend.database.partitions import drop_partition, last_log_id, list_partitions, lock_inserts, partition_table
+from backend.services.log_archive import (
+    ARCHIVE_COLUMNS, append_day, archive_lock, archive_summary, day_dir, has_manifest, load_manifest, read_part,
+)
+
+
+# =====================================================
+# Retention Config
+# =====================================================
+# Detection logs are stored as one partition per UTC day
+# (backend/database/partitions.py). With mirroring on, closed days
+# (before today) are copied into the columnar archive
+# (backend/services/log_archive.py), where historical analytics
+# (backend/services/history.py) read them without touching the live
+# table. Mirroring keeps a second copy of every kept day, so it is off
+# unless retention is on or IDS_HISTORY_MIRROR=1. Once a day is older than the
+# retention window its partition is archived and then dropped whole
+# (Postgres: detached, then dropped), with no row-by-row deletes. Freed
+# pages go back to the OS via incremental vacuum. Analytics rollups
+# keep counting archived days.
+#
+#   IDS_LOG_RETENTION_DAYS        days kept in the database (0 = keep everything)
+#   IDS_HISTORY_MIRROR            1 = archive closed days even while they are kept
+#                                 (default: 1 with retention on, else 0)
+#   IDS_HISTORY_RESYNC_DAYS       mirrored days this recent are re-checked for late rows
+#   IDS_RETENTION_CHECK_INTERVAL  seconds between runs
+#   IDS_ARCHIVE_PART_ROWS         rows per archive part file
+
+RETENTION_DAYS = int(os.getenv("IDS_LOG_RETENTION_DAYS", "0"))
+HISTORY_MIRROR = os.getenv("IDS_HISTORY_MIRROR", "1" if RETENTION_DAYS > 0 else "0") == "1"
+RESYNC_DAYS = int(os.getenv("IDS_HISTORY_RESYNC_DAYS", "2"))
+CHECK_INTERVAL_SECONDS = float(os.getenv("IDS_RETENTION_CHECK_INTERVAL", "3600"))
+PART_ROWS = int(os.getenv("IDS_ARCHIVE_PART_ROWS", "250000"))
+LOOKUP_CHUNK_IDS = 1000  # ids per IN (...) when fetching rows the archive is missing
+
+
+def _day_rows(bind, day, after_id: int, up_to_id: int, stop: threading.Event = None):
+    """Yield a day's rows with after_id < id <= up_to_id, PART_ROWS at a time in (timestamp, id) order."""
+    table = partition_table(day)
+    columns = [table.c[name] for name in ARCHIVE_COLUMNS]
+    key = tuple_(table.c.timestamp, table.c.id)
+
+    last = None
+    while True:
+        if stop is not None and stop.is_set():
+            # Abandons the batch: append_day only publishes complete ones
+            raise InterruptedError("archiving stopped")
+        query = select(*columns).where(table.c.id > after_id, table.c.id <= up_to_id)
+        if last is not None:
+            query = query.where(key > tuple_(
+                literal(last.timestamp, table.c.timestamp.type), literal(last.id, table.c.id.type)
+            ))
+        with bind.connect() as conn:
+            rows = conn.execute(query.order_by(table.c.timestamp, table.c.id).limit(PART_ROWS)).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]
+
+
+def sync_day(bind, day, stop: threading.Event = None) -> tuple:
+    """
+    Append a day's rows that the archive does not have yet.
+
+    Returns:
+        (manifest, rows appended)
+    """
+    manifest = load_manifest(day)
+    with bind.connect() as conn:
+        # Rows inserted from here on are left for the next sync
+        up_to_id = last_log_id(conn)
+    if up_to_id <= manifest["max_id"]:
+        return manifest, 0
+
+    updated = append_day(day, _day_rows(bind, day, manifest["max_id"], up_to_id, stop), max_id=up_to_id)
+    return updated, updated["rows"] - manifest["rows"]
+
+
+def drop_day(bind, day, manifest: dict) -> int:
+    """
+    Drop a synced day's partition; returns the rows it held.
+
+    Inserts into the day wait until the drop commits; rows the archive
+    does not have yet (committed late under an id the sync had already
+    passed) are appended first, so nothing is dropped unarchived.
+    """
+    table = partition_table(day)
+    archived = [read_part(os.path.join(day_dir(day), part["file"]), ["id"])["id"] for part in manifest["parts"]]
+    with bind.begin() as conn:
+        lock_inserts(conn)
+        ids = np.fromiter(conn.execute(select(table.c.id)).scalars(), dtype=np.int64)
+        missing = ids[~np.isin(ids, np.concatenate(archived))] if archived else ids
+
+        stragglers = []
+        for i in range(0, len(missing), LOOKUP_CHUNK_IDS):
+            stragglers += conn.execute(
+                select(*[table.c[name] for name in ARCHIVE_COLUMNS])
+                .where(table.c.id.in_(missing[i:i + LOOKUP_CHUNK_IDS].tolist()))
+            ).all()
+        if stragglers:
+            append_day(day, [sorted(stragglers, key=lambda row: (row.timestamp, row.id))])
+        drop_partition(conn, day)
+    return len(ids)
+
+
+class RetentionManager:
+    def __init__(
+        self,
+        retention_days: int = RETENTION_DAYS,
+        interval: float = CHECK_INTERVAL_SECONDS,
+        mirror: bool = HISTORY_MIRROR,
+        bind=None,
+    ):
+        self.retention_days = retention_days
+        self.interval = interval
+        self.mirror = mirror
+        self._bind = bind
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = None
+        self.stats = {
+            "runs": 0, "days_synced": 0, "rows_synced": 0,
+            "days_archived": 0, "rows_archived": 0, "failures": 0,
+        }
+
+    @property
+    def bind(self):
+        """The engine given to the constructor, else the one SessionLocal is bound to."""
+        return self._bind or SessionLocal.kw["bind"]
+
+    @property
+    def enabled(self) -> bool:
+        return self.retention_days > 0 or self.mirror
+
+    def cutoff(self, retention_days: int = None, now: datetime = None):
+        """First day that is still kept."""
+        days = self.retention_days if retention_days is None else retention_days
+        return (now or datetime.utcnow()).date() - timedelta(days=days)
+
+    def expired_days(self, cutoff) -> list:
+        """Days before `cutoff` that still have a partition in the database, oldest first."""
+        with self.bind.connect() as conn:
+            return [day for day in list_partitions(conn) if day < cutoff]
+
+    def _sync(self, day) -> tuple:
+        manifest, rows = sync_day(self.bind, day, self._stop)
+        if rows:
+            self.stats["days_synced"] += 1
+            self.stats["rows_synced"] += rows
+        return manifest, rows
+
+    def run(self, retention_days: int = None, now: datetime = None) -> dict:
+        """Mirror closed days into the archive, then drop every day older than the retention window."""
+        with self._run_lock, archive_lock() as locked:
+            if not locked:
+                return {"at": datetime.utcnow().isoformat(), "skipped": "another process is archiving"}
+
+            today = (now or datetime.utcnow()).date()
+            days = self.retention_days if retention_days is None else retention_days
+            cutoff = self.cutoff(retention_days, now) if days > 0 else None
+            synced, archived = [], []
+            try:
+                if self.mirror:
+                    for day in self.expired_days(today):
+                        # Older mirrored days pick up late rows when they expire
+                        if has_manifest(day) and day < today - timedelta(days=RESYNC_DAYS):
+                            continue
+                        _, rows = self._sync(day)
+                        if rows:
+                            synced.append({"day": day.isoformat(), "rows": rows})
+
+                for day in self.expired_days(cutoff) if cutoff else []:
+                    rows = drop_day(self.bind, day, self._sync(day)[0])
+                    archived.append({"day": day.isoformat(), "rows": rows})
+                    self.stats["days_archived"] += 1
+                    self.stats["rows_archived"] += rows
+                vacuumed = reclaim_space(self.bind) if archived else False
+            except InterruptedError:
+                vacuumed = False
+            except Exception:
+                self.stats["failures"] += 1
+                raise
+            finally:
+                self.stats["runs"] += 1
+
+            self.last_run = {
+                "at": datetime.utcnow().isoformat(),
+                "kept_from": cutoff.isoformat() if cutoff else None,
+                "synced": synced,
+                "archived": archived,
+                "vacuumed": vacuumed,
+            }
+            if synced:
+                print(f"🗄️ Mirrored {sum(d['rows'] for d in synced)} logs from {len(synced)} closed day(s)")
+            if archived:
+                print(f"🗄️ Archived {sum(d['rows'] for d in archived)} logs from {len(archived)} day(s) before {cutoff}")
+            return self.last_run
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "retention_days": self.retention_days,
+            "mirror": self.mirror,
+            "check_interval_seconds": self.interval,
+            "stats": dict(self.stats),
+            "last_run": self.last_run,
+            "archive": archive_summary(),
+        }
+
+    # ─── Lifecycle ───
+
+    def _watch(self):
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                print(f"⚠️ Retention run failed: {e}")
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self):
+        if self.enabled and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="log-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=30)
+            self._thread = None
+
+
+retention_manager = RetentionManager()
@@ -0,0 +1,351 @@
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, func, select
+
+from backend.models.detection_log import DetectionLog
+from backend.models.rollup import DetectionRollup
+from backend.services.log_archive import archive_parts, archived_days, load_manifest, read_part, to_rows
+
+
+# =====================================================
+# Rollup Config
+# =====================================================
+# Detection counts are pre-aggregated per minute / hour / day bucket
+# and per dimension value as the log writer commits each group (in the
+# same transaction as the rows), so analytics and reports read a few
+# hundred rollup rows however large detection_logs gets.
+# rebuild_rollups() recomputes everything from the raw logs (hot
+# database and archive).
+#
+#   IDS_ROLLUP_MINUTE_RETENTION_HOURS  minute buckets older than this are pruned
+#   IDS_ROLLUP_REBUILD_CHUNK           raw rows read per chunk when rebuilding
+
+MINUTE_RETENTION_HOURS = float(os.getenv("IDS_ROLLUP_MINUTE_RETENTION_HOURS", "48"))
+REBUILD_CHUNK_ROWS = int(os.getenv("IDS_ROLLUP_REBUILD_CHUNK", "50000"))
+PRUNE_INTERVAL_SECONDS = 3600
+
+GRANULARITIES = ("minute", "hour", "day")
+DIMENSIONS = ("result", "severity", "attack_type", "service", "protocol")
+
+_last_pruned = 0.0
+
+
+def _naive_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def minute_cutoff(now: datetime = None) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(hours=MINUTE_RETENTION_HOURS)
+
+
+# ===============================
+# WRITE PATH
+# ===============================
+def _field(log, name: str):
+    return log.get(name) if isinstance(log, dict) else getattr(log, name)
+
+
+def aggregate(logs, minutes_since: datetime = None, counts: dict = None) -> dict:
+    """
+    Rollup increments for detection logs (column dicts or result rows),
+    added to `counts` when given (to total a day read in chunks).
+
+    Returns:
+        {(granularity, bucket, dimension, value): [total, attacks]}
+    """
+    # Floods repeat the same values; collapse them per minute first
+    per_minute = Counter()
+    for log in logs:
+        timestamp = _field(log, "timestamp")
+        if timestamp is None:
+            continue
+        minute = bucket_start(_naive_utc(timestamp), "minute")
+        per_minute[(minute,) + tuple(_field(log, dimension) or "" for dimension in DIMENSIONS)] += 1
+
+    counts = defaultdict(lambda: [0, 0]) if counts is None else counts
+    for (minute, *values), n in per_minute.items():
+        attacks = n if values[0] == "ATTACK" else 0
+        for granularity in GRANULARITIES:
+            if granularity == "minute" and minutes_since is not None and minute < minutes_since:
+                continue
+            bucket = bucket_start(minute, granularity)
+            for dimension, value in zip(DIMENSIONS, values):
+                entry = counts[(granularity, bucket, dimension, value)]
+                entry[0] += n
+                entry[1] += attacks
+    return counts
+
+
+def _upsert(conn, counts: dict):
+    if not counts:
+        return
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    table = DetectionRollup.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.granularity, table.c.bucket, table.c.dimension, table.c.value],
+        set_={
+            "total": table.c.total + statement.excluded.total,
+            "attacks": table.c.attacks + statement.excluded.attacks,
+        },
+    )
+    # Sorted keys: concurrent writers lock rollup rows in the same order
+    conn.execute(statement, [
+        {"granularity": g, "bucket": b, "dimension": d, "value": v, "total": total, "attacks": attacks}
+        for (g, b, d, v), (total, attacks) in sorted(counts.items())
+    ])
+
+
+def prune_rollups(conn, now: datetime = None) -> int:
+    table = DetectionRollup.__table__
+    result = conn.execute(
+        delete(table).where(table.c.granularity == "minute", table.c.bucket < minute_cutoff(now))
+    )
+    return result.rowcount or 0
+
+
+def add_to_rollups(conn, logs):
+    """Count newly inserted logs; call inside the transaction that inserts them."""
+    global _last_pruned
+    _upsert(conn, aggregate(logs))
+    if time.monotonic() - _last_pruned > PRUNE_INTERVAL_SECONDS:
+        prune_rollups(conn)
+        _last_pruned = time.monotonic()
+
+
+def subtract_from_rollups(conn, logs):
+    """Uncount logs about to be deleted; call inside the transaction that deletes them."""
+    # Minute buckets before the cutoff are pruned (or about to be): leave them
+    subtract_counts(conn, aggregate(logs, minutes_since=minute_cutoff()))
+
+
+def subtract_counts(conn, counts: dict):
+    """Uncount aggregate() totals (built with minutes_since=minute_cutoff())."""
+    _upsert(conn, {key: [-total, -attacks] for key, (total, attacks) in counts.items()})
+
+
+def drop_empty_rollups(conn) -> int:
+    table = DetectionRollup.__table__
+    return conn.execute(delete(table).where(table.c.total <= 0)).rowcount or 0
+
+
+def remove_all_rollups(conn):
+    conn.execute(delete(DetectionRollup.__table__))
+
+
+def cold_archive_rows(conn, days=None):
+    """
+    Archived rows (as row lists, one per part) that are no longer in
+    detection_logs: mirrored days that are still hot are counted from the
+    table instead.
+    """
+    for day in archived_days() if days is None else days:
+        manifest = load_manifest(day)
+        start = datetime.combine(day, datetime.min.time())
+        in_day = (
+            DetectionLog.timestamp >= start,
+            DetectionLog.timestamp < start + timedelta(days=1),
+            DetectionLog.id <= manifest["max_id"],
+        )
+        hot = conn.execute(select(func.count()).select_from(DetectionLog.__table__).where(*in_day)).scalar()
+        if hot >= manifest["rows"]:
+            continue
+        hot_ids = np.fromiter(conn.execute(select(DetectionLog.id).where(*in_day)).scalars(), dtype=np.int64) if hot else None
+
+        for _, path, _ in archive_parts(day, day + timedelta(days=1)):
+            columns = read_part(path, ["id", "timestamp", *DIMENSIONS])
+            if hot_ids is not None:
+                cold = ~np.isin(columns["id"], hot_ids)
+                columns = {name: values[cold] for name, values in columns.items()}
+            yield to_rows(columns)
+
+
+def rebuild_rollups(conn, chunk_rows: int = REBUILD_CHUNK_ROWS) -> int:
+    """Recompute every rollup from detection_logs and the log archive; returns the rows read."""
+    remove_all_rollups(conn)
+    since = minute_cutoff()
+
+    # Days moved out by retention (backend/services/retention.py) still count
+    rows_read = 0
+    for rows in cold_archive_rows(conn):
+        _upsert(conn, aggregate(rows, minutes_since=since))
+        rows_read += len(rows)
+
+    columns = [DetectionLog.id, DetectionLog.timestamp] + [getattr(DetectionLog, d) for d in DIMENSIONS]
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(*columns).where(DetectionLog.id > last_id).order_by(DetectionLog.id).limit(chunk_rows)
+        ).all()
+        if not rows:
+            break
+        _upsert(conn, aggregate(rows, minutes_since=since))
+        last_id = rows[-1].id
+        rows_read += len(rows)
+    return rows_read
+
+
+# ===============================
+# READ PATH
+# ===============================
+def rollup_totals(db):
+    """(total detections, attacks) over all time."""
+    total, attacks = (
+        db.query(func.sum(DetectionRollup.total), func.sum(DetectionRollup.attacks))
+        .filter(DetectionRollup.granularity == "day", DetectionRollup.dimension == "result")
+        .one()
+    )
+    return total or 0, attacks or 0
+
+
+def rollup_breakdown(db, dimension: str, attacks_only: bool = False, limit: int = None):
+    """[(value, count)] for one dimension over all time, largest first; NULL values skipped."""
+    count = func.sum(DetectionRollup.attacks if attacks_only else DetectionRollup.total)
+    query = (
+        db.query(DetectionRollup.value, count)
+        .filter(
+            DetectionRollup.granularity == "day",
+            DetectionRollup.dimension == dimension,
+            DetectionRollup.value != "",
+        )
+        .group_by(DetectionRollup.value)
+        .having(count > 0)
+        .order_by(count.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return [(value, n) for value, n in query.all()]
+
+
+def _bucket_counts(db, granularity: str, start: datetime, end: datetime = None):
+    query = (
+        db.query(DetectionRollup.bucket, func.sum(DetectionRollup.total), func.sum(DetectionRollup.attacks))
+        .filter(
+            DetectionRollup.granularity == granularity,
+            DetectionRollup.dimension == "result",
+            DetectionRollup.bucket >= start,
+        )
+    )
+    if end is not None:
+        query = query.filter(DetectionRollup.bucket < end)
+    return query.group_by(DetectionRollup.bucket).all()
+
+
+def rollup_daily(db, since: datetime):
+    """
+    [(date "YYYY-MM-DD", total, attacks)] per day from `since`, oldest first.
+
+    The partial first day comes from hour buckets (so `since` is honoured
+    to the hour), the rest from day buckets.
+    """
+    since = bucket_start(_naive_utc(since), "hour")
+    first_full_day = bucket_start(since, "day")
+    if first_full_day < since:
+        first_full_day += timedelta(days=1)
+
+    days = defaultdict(lambda: [0, 0])
+    rows = _bucket_counts(db, "hour", since, first_full_day) + _bucket_counts(db, "day", first_full_day)
+    for bucket, total, attacks in rows:
+        entry = days[bucket.date().isoformat()]
+        entry[0] += total or 0
+        entry[1] += attacks or 0
+    return [(day, total, attacks) for day, (total, attacks) in sorted(days.items())]
+
+
+_STEPS = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def _bucket_ceil(timestamp: datetime, granularity: str) -> datetime:
+    start = bucket_start(timestamp, granularity)
+    return start if start == timestamp else start + _STEPS[granularity]
+
+
+def rollup_spans(start: datetime = None, end: datetime = None, now: datetime = None):
+    """
+    Rollup bucket ranges covering [start, end) (open bounds: all time).
+
+    Whole days come from day buckets, whole hours at the edges from hour
+    buckets and the remaining minutes from minute buckets while those are
+    kept; older edges are widened to the hour.
+
+    Returns:
+        ([(granularity, bucket_from or None, bucket_to or None)], exact);
+        exact is False when an edge had to be widened to a bucket boundary
+    """
+    start = _naive_utc(start) if start is not None else None
+    end = _naive_utc(end) if end is not None else None
+    cutoff = minute_cutoff(now)
+    spans = []
+    exact = True
+
+    def minutes(lo, hi):
+        nonlocal exact
+        if lo >= hi:
+            return
+        if lo >= cutoff:
+            spans.append(("minute", bucket_start(lo, "minute"), _bucket_ceil(hi, "minute")))
+            exact = exact and bucket_start(lo, "minute") == lo and bucket_start(hi, "minute") == hi
+        else:
+            spans.append(("hour", bucket_start(lo, "hour"), _bucket_ceil(hi, "hour")))
+            exact = False
+
+    def hours(lo, hi):
+        if lo >= hi:
+            return
+        first, last = _bucket_ceil(lo, "hour"), bucket_start(hi, "hour")
+        if first >= last:
+            minutes(lo, hi)
+            return
+        minutes(lo, first)
+        spans.append(("hour", first, last))
+        minutes(last, hi)
+
+    first = _bucket_ceil(start, "day") if start is not None else None
+    last = bucket_start(end, "day") if end is not None else None
+    if first is not None and last is not None and first >= last:
+        hours(start, end)
+    else:
+        if start is not None:
+            hours(start, first)
+        spans.append(("day", first, last))
+        if end is not None:
+            hours(last, end)
+    return spans, exact
+
+
+def rollup_facet(db, dimension: str, spans) -> list:
+    """[(value, count)] for one dimension over rollup_spans(), largest first; NULL values skipped."""
+    counts = Counter()
+    for granularity, lo, hi in spans:
+        count = func.sum(DetectionRollup.total)
+        query = db.query(DetectionRollup.value, count).filter(
+            DetectionRollup.granularity == granularity,
+            DetectionRollup.dimension == dimension,
+            DetectionRollup.value != "",
+        )
+        if lo is not None:
+            query = query.filter(DetectionRollup.bucket >= lo)
+        if hi is not None:
+            query = query.filter(DetectionRollup.bucket < hi)
+        for value, n in query.group_by(DetectionRollup.value).all():
+            counts[value] += n or 0
+    return [(value, n) for value, n in counts.most_common() if n > 0]
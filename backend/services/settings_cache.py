@@ -0,0 +1,125 @@
+import os
+import threading
+
+from backend.database.db import SessionLocal
+from backend.models.settings import SystemSettings
+
+
+# =====================================================
+# Settings Cache Config
+# =====================================================
+# Readers get an in-memory snapshot of system_settings instead
+# of querying SQLite. Writers bump system_settings.version; each
+# worker polls that single integer every REFRESH_INTERVAL seconds
+# and reloads the row only when it changed, so a write made by
+# any worker is seen everywhere within one interval.
+
+REFRESH_INTERVAL_SECONDS = float(os.getenv("IDS_SETTINGS_REFRESH_INTERVAL", "2"))
+
+SETTINGS_FIELDS = (
+    "test_mode",
+    "confidence_threshold",
+    "alert_sound",
+    "email_alerts",
+    "auto_generate_daily_report",
+)
+
+# Same defaults as the SystemSettings columns
+DEFAULT_SETTINGS = {
+    "test_mode": True,
+    "confidence_threshold": 0.7,
+    "alert_sound": True,
+    "email_alerts": False,
+    "auto_generate_daily_report": True,
+}
+
+
+def settings_to_dict(settings) -> dict:
+    return {field: getattr(settings, field) for field in SETTINGS_FIELDS}
+
+
+class SettingsCache:
+    """Process-wide snapshot of the system_settings row."""
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL_SECONDS):
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self) -> dict:
+        """Current settings; loads them on first use."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self):
+        """Reload the settings row from the database."""
+        db = SessionLocal()
+        try:
+            settings = db.query(SystemSettings).filter(SystemSettings.id == 1).first()
+            if settings:
+                snapshot, version = settings_to_dict(settings), settings.version or 0
+            else:
+                snapshot, version = dict(DEFAULT_SETTINGS), 0
+        finally:
+            db.close()
+
+        with self._lock:
+            self._snapshot = snapshot
+            self._version = version
+
+    def store(self, settings):
+        """Publish a freshly written settings row (called by writers after commit)."""
+        snapshot = settings_to_dict(settings)
+        version = settings.version or 0
+        with self._lock:
+            # A concurrent refresh may already hold a newer row
+            if self._version is None or version >= self._version:
+                self._snapshot = snapshot
+                self._version = version
+
+    def _check_version(self):
+        db = SessionLocal()
+        try:
+            version = db.query(SystemSettings.version).filter(SystemSettings.id == 1).scalar()
+        finally:
+            db.close()
+        if (version or 0) != self._version:
+            self.refresh()
+
+    # ─── Background version polling ───
+
+    def _watch(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self._check_version()
+            except Exception as e:
+                print(f"❌ Settings refresh failed: {e}")
+
+    def start(self):
+        """Load the settings and start polling for changes made by other workers."""
+        self.refresh()
+        if self._watcher is None and self.refresh_interval > 0:
+            self._stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, name="settings-cache-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.refresh_interval + 1)
+            self._watcher = None
+
+
+settings_cache = SettingsCache()
@@ -0,0 +1,206 @@
+# ===============================
+# Query Plan Check
+# ===============================
+# Runs the dashboard's hot queries (the real route and service code)
+# against a migrated temporary SQLite database, records every SQL
+# statement they issue and runs EXPLAIN QUERY PLAN on each. Fails if
+# any statement scans a detection_logs day table, notifications or the
+# rollups without an index. The seed spans several days, so reads of
+# the detection_logs view plan one UNION ALL arm per day, and each
+# day's table must be read through one of its indexes.
+#
+# Usage (from the repo root):
+#   python bench/check_query_plans.py
+#   python bench/check_query_plans.py --verbose   # print every plan
+#
+# Exits 1 if any statement does a full table scan.
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event
+
+from backend.database.db import SessionLocal, make_engine
+from backend.database.migrations import migrate
+from backend.database.partitions import list_partitions, partition_day, partition_name
+from backend.models.settings import SystemSettings
+from backend.services.log_writer import LogWriter
+from backend.services.notification_coalescer import NotificationCoalescer
+from backend.services.health_sampler import collect_health
+from backend.services.settings_cache import settings_cache
+from backend.routes.analytics import summarize
+from backend.routes.logs import page_logs, query_logs, search_filters, search_logs
+from backend.routes.notifications import count_unread, page_notifications, query_notifications, set_all_read
+from backend.routes.system import get_model_metrics
+from backend.routes.compliance import get_compliance_dashboard
+from backend.routes.reports import _build_pdf
+
+CHECKED_TABLES = {"detection_logs", "notifications", "detection_rollups"}
+
+# "SCAN detection_logs" / "SCAN TABLE detection_logs" with no USING INDEX
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+# A day table read through an index: "SEARCH detection_logs_p20260101 USING ..."
+INDEXED_ARM = re.compile(r"^(?:SEARCH|SCAN) (?:TABLE )?(detection_logs_p\d{8}) .*INDEX")
+READS_VIEW = re.compile(r"\bdetection_logs\b")
+SEED_DAYS = 3
+
+
+# Query helpers take a session; route handlers open their own
+HOT_QUERIES = [
+    ("GET /logs", lambda db: query_logs(db, 100, 0, None)),
+    ("GET /logs?result=ATTACK", lambda db: query_logs(db, 100, 0, "ATTACK")),
+    ("GET /logs/page?cursor=", lambda db: page_logs(db, 2, page_logs(db, 2, None, None)["next_cursor"], None)),
+    ("GET /logs/page?cursor=&result=ATTACK",
+     lambda db: page_logs(db, 2, page_logs(db, 2, None, "ATTACK")["next_cursor"], "ATTACK")),
+    ("GET /logs/search", lambda db: search_logs(db, 100, None, search_filters(), True)),
+    ("GET /logs/search?service=&severity=",
+     lambda db: search_logs(db, 100, None, search_filters(service="http", severity="CRITICAL"), True)),
+    ("GET /logs/search?flag=&start=",
+     lambda db: search_logs(db, 100, None, search_filters(start=datetime.utcnow() - timedelta(hours=1), flag="SF"), True)),
+    ("GET /analytics/summary", summarize),
+    ("GET /notifications", lambda db: query_notifications(db, 50, 0, None, None, None)),
+    ("GET /notifications?type=ATTACK", lambda db: query_notifications(db, 50, 0, "ATTACK", None, None)),
+    ("GET /notifications?severity=CRITICAL", lambda db: query_notifications(db, 50, 0, None, "CRITICAL", None)),
+    ("GET /notifications?is_read=false", lambda db: query_notifications(db, 50, 0, None, None, False)),
+    ("GET /notifications/page?cursor=",
+     lambda db: page_notifications(db, 1, page_notifications(db, 1, None, None, None, None)["next_cursor"], None, None, None)),
+    ("GET /notifications/count", count_unread),
+    ("PUT /notifications/read-all", set_all_read),
+    ("GET /system/model-metrics", lambda db: get_model_metrics()),
+    ("GET /system/health", lambda db: collect_health()),
+    ("GET /compliance/dashboard", lambda db: get_compliance_dashboard()),
+    ("GET /reports/generate", _build_pdf),
+]
+
+
+def seed():
+    """A few rows so handlers walk their normal (non-empty) code paths."""
+    db = SessionLocal()
+    try:
+        db.add(SystemSettings(id=1, test_mode=False))
+        db.commit()
+    finally:
+        db.close()
+    settings_cache.refresh()
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "timestamp": now - timedelta(days=i % SEED_DAYS),
+            "duration": i,
+            "protocol": "tcp",
+            "service": "http",
+            "flag": "SF",
+            "result": "ATTACK" if i % 2 else "NORMAL",
+            "attack_type": "1" if i % 2 else None,
+            "confidence": 0.9,
+            "severity": "CRITICAL" if i % 2 else "LOW",
+        }
+        for i in range(10)
+    ]
+    notification = NotificationCoalescer().record("1", "CRITICAL", 0.9, count=5)
+    notification["related_index"] = 1
+    LogWriter().submit(rows, [notification])
+
+
+def capture(engine, fn):
+    """Run fn(session) and return the (statement, parameters) it executed."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    db = SessionLocal()
+    try:
+        fn(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def full_scans(engine, statement, parameters, days):
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    details = [row[-1] for row in plan]
+    scans, indexed = [], set()
+    for detail in details:
+        match = FULL_SCAN.match(detail)
+        if match and match.group(1) != "detection_logs" and (
+            match.group(1) in CHECKED_TABLES or partition_day(match.group(1))
+        ):
+            scans.append(detail)
+        match = INDEXED_ARM.match(detail)
+        if match:
+            indexed.add(match.group(1))
+
+    # A SCAN of the view itself only reads back what its arms found, so
+    # the view is fine exactly when every day's arm is an index read
+    if READS_VIEW.search(statement):
+        missing = sorted({partition_name(day) for day in days} - indexed)
+        if missing:
+            scans.append(f"no index read of {', '.join(missing)}")
+    return details, scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN for every hot query")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = make_engine(f"sqlite:///{os.path.join(workdir, 'plans.db')}")
+        migrate(bind=engine)
+        SessionLocal.configure(bind=engine)
+        seed()
+        with engine.connect() as conn:
+            days = list_partitions(conn)
+        assert len(days) == SEED_DAYS, days
+
+        failed = 0
+        for label, fn in HOT_QUERIES:
+            try:
+                statements = capture(engine, fn)
+            except ImportError as e:
+                print(f"⚠️ {label}: skipped ({e})")
+                continue
+
+            seen = set()
+            problems = []
+            for statement, parameters in statements:
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                details, scans = full_scans(engine, statement, parameters, days)
+                if scans:
+                    problems.append((statement, scans))
+                if args.verbose:
+                    print(f"   {' '.join(statement.split())}")
+                    for detail in details:
+                        print(f"     → {detail}")
+
+            if problems:
+                failed += 1
+                print(f"❌ {label}")
+                for statement, scans in problems:
+                    print(f"   {' '.join(statement.split())}")
+                    print(f"     → {'; '.join(scans)}")
+            else:
+                print(f"✅ {label}: {len(seen)} statement(s), no full table scans")
+
+        engine.dispose()
+
+    print(f"\n{'❌' if failed else '✅'} {failed} hot quer{'y' if failed == 1 else 'ies'} with full table scans")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
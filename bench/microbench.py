@@ -0,0 +1,245 @@
+# ===============================
+# Detection Pipeline Microbenchmarks
+# ===============================
+# Times each stage of /detect on its own, at single-record and
+# batch sizes, plus end to end. Runs offline against a temporary
+# SQLite database and a small RandomForest trained from
+# dataset/test.csv, then compares against a stored baseline.
+#
+# Usage (from the repo root):
+#   python bench/microbench.py
+#   python bench/microbench.py --batch-size 2000 --repeat 50
+#   python bench/microbench.py --save-baseline
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sqlalchemy import create_engine
+
+from backend.database.db import SessionLocal
+from backend.database.migrations import migrate
+from backend.database.partitions import insert_logs
+from backend.models.notification import Notification
+from backend.models.settings import SystemSettings
+from backend.schemas.ids_schema import IDSInput
+from backend.services.model_registry import model_registry
+from backend.services.settings_cache import settings_cache
+from backend.services.log_writer import log_writer
+from backend.services.notification_coalescer import notification_coalescer
+from backend.routes.detect import classify, detect, detect_records, log_row
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "microbench_baseline.json")
+
+
+# ===============================
+# 1. FIXTURES
+# ===============================
+def load_dataset(limit):
+    columns = list(IDSInput.model_fields) + ["label", "difficulty"]
+    data = pd.read_csv("dataset/test.csv", names=columns, nrows=limit)
+    X = data.drop(["label", "difficulty"], axis=1)
+    y = (data["label"] != "normal").astype(int)
+    return X, y
+
+
+def build_fixtures(workdir, n_estimators, train_rows):
+    """Temporary database + small trained model, wired into the backend singletons."""
+    engine = create_engine(
+        f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        connect_args={"check_same_thread": False},
+    )
+    migrate(bind=engine)
+    SessionLocal.configure(bind=engine)
+
+    db = SessionLocal()
+    db.add(SystemSettings(id=1, test_mode=False))
+    db.commit()
+    db.close()
+    settings_cache.refresh()
+
+    X, y = load_dataset(train_rows)
+    X_encoded = pd.get_dummies(X)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=1)
+    model.fit(X_encoded, y)
+
+    model_path = os.path.join(workdir, "ids_model.pkl")
+    joblib.dump(model, model_path)
+    model_registry.path = model_path
+    model_registry.load(force=True)
+
+    records = [IDSInput(**row) for row in X.to_dict(orient="records")]
+    return engine, records
+
+
+# ===============================
+# 2. TIMING
+# ===============================
+def measure(fn, repeat, records_per_call=1):
+    fn()  # warm caches / lazy init
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "median_us": round(median * 1e6, 2),
+        "p95_us": round(samples[max(0, int(len(samples) * 0.95) - 1)] * 1e6, 2),
+        "per_record_us": round(median * 1e6 / records_per_call, 3),
+    }
+
+
+# ===============================
+# 3. STAGES
+# ===============================
+def legacy_settings_lookup():
+    """What /detect did before the settings cache: one query per request."""
+    db = SessionLocal()
+    try:
+        return db.query(SystemSettings).filter(SystemSettings.id == 1).first().test_mode
+    finally:
+        db.close()
+
+
+def legacy_encode(model, records):
+    """What /detect did before FeatureEncoder: get_dummies + reindex."""
+    df = pd.get_dummies(pd.DataFrame([r.model_dump() for r in records]))
+    return df.reindex(columns=model.feature_names_in_, fill_value=0)
+
+
+def legacy_insert(record, det):
+    """What /detect did before the log writer: one insert + commit per row."""
+    db = SessionLocal()
+    try:
+        insert_logs(db.connection(), [log_row(record, det, None)])
+        db.commit()
+    finally:
+        db.close()
+
+
+def legacy_notification(det):
+    db = SessionLocal()
+    try:
+        db.add(Notification(type="ATTACK", title="bench", message="bench", severity=det["severity"]))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_benchmarks(records, batch_size, repeat):
+    loaded = model_registry.current
+    model, encoder, engine = loaded.model, loaded.encoder, loaded.engine
+
+    single = records[0]
+    batch = records[:batch_size]
+    payload = single.model_dump()
+    payload_json = single.model_dump_json()
+    batch_payloads = [r.model_dump() for r in batch]
+    det = {"result": "ATTACK", "attack_type": "1", "confidence": 0.99, "severity": "CRITICAL", "prediction": 1}
+    now = datetime.utcnow()
+
+    single_matrix = encoder.encode(single)
+    batch_matrix = encoder.encode_many(batch)
+    legacy_single = legacy_encode(model, [single])
+    legacy_batch = legacy_encode(model, batch)
+    n = len(batch)
+
+    stages = {
+        "validation.single": (lambda: IDSInput.model_validate(payload), 1),
+        "validation.single_json": (lambda: IDSInput.model_validate_json(payload_json), 1),
+        "validation.batch": (lambda: [IDSInput.model_validate(p) for p in batch_payloads], n),
+
+        "settings.db_query": (legacy_settings_lookup, 1),
+        "settings.cache": (lambda: settings_cache.get()["test_mode"], 1),
+
+        "encode.pandas.single": (lambda: legacy_encode(model, [single]), 1),
+        "encode.pandas.batch": (lambda: legacy_encode(model, batch), n),
+        "encode.encoder.single": (lambda: encoder.encode(single), 1),
+        "encode.encoder.batch": (lambda: encoder.encode_many(batch), n),
+
+        "predict.sklearn.predict+proba.single": (lambda: (model.predict(legacy_single), model.predict_proba(legacy_single)), 1),
+        "predict.sklearn.proba.batch": (lambda: model.predict_proba(legacy_batch), n),
+        f"predict.{engine.name}.single": (lambda: engine.predict_proba(single_matrix), 1),
+        f"predict.{engine.name}.batch": (lambda: engine.predict_proba(batch_matrix), n),
+        "predict.classify.cached.batch": (lambda: classify(loaded, batch), n),  # warm prediction cache
+
+        "insert.per_row_commit.single": (lambda: legacy_insert(single, det), 1),
+        "insert.log_writer.single": (lambda: log_writer.submit([log_row(single, det, now)]), 1),
+        "insert.log_writer.batch": (lambda: log_writer.submit([log_row(r, det, now) for r in batch]), n),
+
+        "notification.insert_commit": (lambda: legacy_notification(det), 1),
+        "notification.coalesced": (lambda: notification_coalescer.record("1", "CRITICAL", 0.99), 1),
+
+        "end_to_end.detect.single": (lambda: detect(single), 1),
+        "end_to_end.detect_records.batch": (lambda: detect_records(batch, True), n),
+    }
+
+    results = {}
+    for name, (fn, per_call) in stages.items():
+        results[name] = measure(fn, repeat, per_call)
+        print(f"  {name:<42} {results[name]['median_us']:>12.1f} µs  ({results[name]['per_record_us']:.2f} µs/record)")
+    return results
+
+
+# ===============================
+# 4. BASELINE
+# ===============================
+def compare(results, baseline):
+    print("\nComparison against baseline (median per record):")
+    for name, result in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            print(f"  {name:<42} (new)")
+            continue
+        ratio = result["per_record_us"] / old["per_record_us"] if old["per_record_us"] else float("nan")
+        marker = "  ⚠️ slower" if ratio > 1.10 else "  ✅ faster" if ratio < 0.90 else ""
+        print(f"  {name:<42} {old['per_record_us']:>10.2f} → {result['per_record_us']:<10.2f} µs ({ratio:.2f}x){marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage microbenchmarks for the detection pipeline")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--trees", type=int, default=20, help="trees in the fixture model")
+    parser.add_argument("--train-rows", type=int, default=5000)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine, records = build_fixtures(workdir, args.trees, max(args.train_rows, args.batch_size))
+        print(f"Fixture: {args.trees}-tree forest, {model_registry.current.engine.name} engine, batch size {args.batch_size}\n")
+        results = run_benchmarks(records, args.batch_size, args.repeat)
+        engine.dispose()
+
+    report = {
+        "config": {"batch_size": args.batch_size, "repeat": args.repeat, "trees": args.trees},
+        "results": results,
+    }
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    else:
+        print(f"\nNo baseline at {args.baseline} (run with --save-baseline to create one)")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# ===============================
+# NSL-KDD Traffic Replay / Load Generator
+# ===============================
+# Replays dataset/test.csv against a running API and reports
+# throughput, latency percentiles, error rates and detection
+# quality against the dataset labels as JSON.
+#
+# Usage (from the repo root, API on :8000):
+#   python bench/replay.py --concurrency 8 --rate 200 --limit 5000
+#   python bench/replay.py --mode batch --batch-size 500
+#   python bench/replay.py --output reports/replay.json --baseline reports/previous.json
+#
+# Only the standard library is used, so it runs from any machine.
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+# ===============================
+# 1. DATASET → IDSInput
+# ===============================
+# Same column order as ml/train_model.py
+FEATURES = [
+    "duration","protocol_type","service","flag","src_bytes","dst_bytes",
+    "land","wrong_fragment","urgent","hot","num_failed_logins",
+    "logged_in","num_compromised","root_shell","su_attempted","num_root",
+    "num_file_creations","num_shells","num_access_files","num_outbound_cmds",
+    "is_host_login","is_guest_login","count","srv_count","serror_rate",
+    "srv_serror_rate","rerror_rate","srv_rerror_rate","same_srv_rate",
+    "diff_srv_rate","srv_diff_host_rate","dst_host_count","dst_host_srv_count",
+    "dst_host_same_srv_rate","dst_host_diff_srv_rate",
+    "dst_host_same_src_port_rate","dst_host_srv_diff_host_rate",
+    "dst_host_serror_rate","dst_host_srv_serror_rate",
+    "dst_host_rerror_rate","dst_host_srv_rerror_rate",
+]
+CATEGORICAL = {"protocol_type", "service", "flag"}
+
+
+def parse_value(name, value):
+    if name in CATEGORICAL:
+        return value
+    number = float(value)
+    return int(number) if number.is_integer() and "." not in value else number
+
+
+def load_records(path, limit=None):
+    """Return (payloads, labels) where label is 1 for attacks, 0 for normal."""
+    payloads, labels = [], []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row:
+                continue
+            payloads.append({name: parse_value(name, value) for name, value in zip(FEATURES, row)})
+            labels.append(0 if row[len(FEATURES)] == "normal" else 1)
+            if limit and len(payloads) >= limit:
+                break
+    return payloads, labels
+
+
+# ===============================
+# 2. HTTP
+# ===============================
+def post_json(url, body, timeout):
+    data = json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except Exception as e:
+        return type(e).__name__, None
+
+
+# ===============================
+# 3. STATS
+# ===============================
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3) if values else None,
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1] if values else None,
+    }
+
+
+def detection_quality(labels, predictions):
+    tp = fp = tn = fn = 0
+    for label, prediction in zip(labels, predictions):
+        if prediction is None:
+            continue
+        if prediction == 1:
+            tp, fp = (tp + 1, fp) if label == 1 else (tp, fp + 1)
+        else:
+            tn, fn = (tn + 1, fn) if label == 0 else (tn, fn + 1)
+    scored = tp + fp + tn + fn
+    return {
+        "scored": scored,
+        "accuracy": round((tp + tn) / scored, 4) if scored else None,
+        "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else None,
+        "confusion_matrix": {"tp": tp, "fp": fp, "tn": tn, "fn": fn},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+# ===============================
+# 4. REPLAY
+# ===============================
+def replay(args):
+    payloads, labels = load_records(args.dataset, args.limit)
+
+    if args.mode == "batch":
+        url = args.url.rstrip("/") + "/detect/batch"
+        requests_ = [
+            (i, {"records": payloads[i:i + args.batch_size]})
+            for i in range(0, len(payloads), args.batch_size)
+        ]
+    else:
+        url = args.url.rstrip("/") + "/detect"
+        requests_ = list(enumerate(payloads))
+
+    predictions = [None] * len(payloads)
+    service_ms, latency_ms = [], []
+    errors = {}
+    lock = threading.Lock()
+    interval = 1.0 / args.rate if args.rate else 0.0
+
+    def send(n, start_index, body):
+        # Open-loop schedule: latency counts from the intended send time, so
+        # a slow server can't hide queueing delay (coordinated omission)
+        scheduled = started + n * interval
+        if interval:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent = time.perf_counter()
+        status, response = post_json(url, body, args.timeout)
+        done = time.perf_counter()
+
+        with lock:
+            service_ms.append(round((done - sent) * 1000, 3))
+            latency_ms.append(round((done - (scheduled if interval else sent)) * 1000, 3))
+            if status != 200 or response is None:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+                return
+            if args.mode == "batch":
+                for result in response["results"]:
+                    predictions[start_index + result["index"]] = result["prediction"]
+            else:
+                predictions[start_index] = response["prediction"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for n, (start_index, body) in enumerate(requests_):
+            pool.submit(send, n, start_index, body)
+    elapsed = time.perf_counter() - started
+
+    total_requests = len(requests_)
+    failed = sum(errors.values())
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "url": url,
+            "mode": args.mode,
+            "records": len(payloads),
+            "batch_size": args.batch_size if args.mode == "batch" else 1,
+            "concurrency": args.concurrency,
+            "target_rate_rps": args.rate or None,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput": {
+            "requests_per_second": round(total_requests / elapsed, 2),
+            "records_per_second": round(len(payloads) / elapsed, 2),
+        },
+        "latency": latency_summary(latency_ms),
+        "service_time": latency_summary(service_ms),
+        "errors": {
+            "total": failed,
+            "rate": round(failed / total_requests, 4) if total_requests else 0.0,
+            "by_status": errors,
+        },
+        "detection": detection_quality(labels, predictions),
+    }
+
+
+# ===============================
+# 5. BASELINE COMPARISON
+# ===============================
+COMPARED_METRICS = [
+    ("throughput", "records_per_second", "higher"),
+    ("latency", "p50_ms", "lower"),
+    ("latency", "p95_ms", "lower"),
+    ("latency", "p99_ms", "lower"),
+    ("errors", "rate", "lower"),
+    ("detection", "accuracy", "higher"),
+]
+
+
+def compare(report, baseline, tolerance):
+    """Print metric deltas; return True if any metric regressed beyond tolerance."""
+    regressed = False
+    print(f"\nComparison against baseline ({baseline.get('git_commit')}):")
+    for section, key, better in COMPARED_METRICS:
+        old, new = baseline.get(section, {}).get(key), report[section][key]
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = change < -tolerance if better == "higher" else change > tolerance
+        regressed |= worse
+        print(f"  {section}.{key:<20} {old:>12} → {new:<12} ({change:+.1%}){'  ❌ regression' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay NSL-KDD traffic against the IDS API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--dataset", default="dataset/test.csv")
+    parser.add_argument("--mode", choices=["single", "batch"], default="single")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0, help="requests per second (0 = as fast as possible)")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N records")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args()
+
+    report = replay(args)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(report, json.load(f), args.tolerance):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import type { Notification } from "../types/notification";
+import type { SystemHealth } from "./systemService";
+
+const API_BASE = "http://127.0.0.1:8000";
+
+// ─── Live events pushed by GET /events ───
+
+export interface DetectionsEvent {
+    count: number;
+    attacks: number;
+    latest: Array<{
+        id: number;
+        timestamp: string;
+        protocol: string;
+        service: string;
+        flag: string;
+        result: "ATTACK" | "NORMAL";
+        attack_type: string | null;
+        confidence: number;
+        severity: string;
+    }>;
+}
+
+export interface NotificationUpdateEvent {
+    id: number;
+    count: number;
+    last_seen: string;
+    message: string;
+}
+
+export interface LiveEventMap {
+    detections: DetectionsEvent;
+    notification: Notification;
+    notification_update: NotificationUpdateEvent;
+    unread_count: { unread_count: number };
+    health: SystemHealth;
+}
+
+export type LiveEventHandlers = {
+    [K in keyof LiveEventMap]?: (data: LiveEventMap[K]) => void;
+} & {
+    /** Called when the stream reconnects; events may have been missed meanwhile. */
+    reconnect?: () => void;
+};
+
+const EVENT_TYPES = Object.keys({
+    detections: true,
+    notification: true,
+    notification_update: true,
+    unread_count: true,
+    health: true,
+} satisfies Record<keyof LiveEventMap, true>) as Array<keyof LiveEventMap>;
+
+const RECONNECT_DELAY_MS = 5000;
+
+// One EventSource per tab, shared by every subscribed component
+let source: EventSource | null = null;
+let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+let connectedBefore = false;
+const subscribers = new Set<LiveEventHandlers>();
+
+function connect() {
+    source = new EventSource(`${API_BASE}/events`);
+
+    source.onopen = () => {
+        if (connectedBefore) {
+            subscribers.forEach((handlers) => handlers.reconnect?.());
+        }
+        connectedBefore = true;
+    };
+
+    source.onerror = () => {
+        // The browser retries on its own unless the connection is closed for good
+        if (source?.readyState === EventSource.CLOSED) {
+            source = null;
+            reconnectTimer = setTimeout(() => {
+                reconnectTimer = null;
+                if (subscribers.size > 0) connect();
+            }, RECONNECT_DELAY_MS);
+        }
+    };
+
+    for (const type of EVENT_TYPES) {
+        source.addEventListener(type, (event) => {
+            const data = JSON.parse((event as MessageEvent).data);
+            subscribers.forEach((handlers) => {
+                const handler = handlers[type] as ((payload: unknown) => void) | undefined;
+                handler?.(data);
+            });
+        });
+    }
+}
+
+export function subscribeLiveEvents(handlers: LiveEventHandlers): () => void {
+    subscribers.add(handlers);
+    if (!source && !reconnectTimer) connect();
+
+    return () => {
+        subscribers.delete(handlers);
+        if (subscribers.size === 0) {
+            source?.close();
+            source = null;
+            connectedBefore = false;
+            if (reconnectTimer) {
+                clearTimeout(reconnectTimer);
+                reconnectTimer = null;
+            }
+        }
+    };
+}
@@ -24,3 +24,91 @@ export async function fetchLogs(
 
     return response.json();
 }
+
+export interface LogPage {
+    items: DetectionLog[];
+    next_cursor: string | null;
+}
+
+export async function fetchLogsPage(
+    limit: number = 100,
+    cursor?: string | null,
+    result?: "ATTACK" | "NORMAL"
+): Promise<LogPage> {
+    const params = new URLSearchParams({ limit: limit.toString() });
+
+    if (cursor) {
+        params.append("cursor", cursor);
+    }
+    if (result) {
+        params.append("result", result);
+    }
+
+    const response = await fetch(
+        `http://127.0.0.1:8000/logs/page?${params.toString()}`
+    );
+
+    if (!response.ok) {
+        throw new Error("Failed to fetch logs");
+    }
+
+    return response.json();
+}
+
+export interface SearchFilters {
+    start?: string;
+    end?: string;
+    result?: "ATTACK" | "NORMAL";
+    attack_type?: string;
+    severity?: string;
+    service?: string;
+    protocol?: string;
+    flag?: string;
+    min_confidence?: number;
+    max_confidence?: number;
+}
+
+export type FacetDimension = "result" | "severity" | "attack_type" | "service" | "protocol";
+
+export interface FacetCount {
+    value: string;
+    count: number;
+}
+
+export interface LogSearchPage extends LogPage {
+    // Present on the first page (facets=true); a facet ignores its own filter
+    total?: number;
+    total_exact?: boolean;
+    facets?: Record<FacetDimension, FacetCount[]>;
+    facet_sources?: Record<FacetDimension, "rollups" | "scan">;
+    facets_exact?: boolean;
+}
+
+export async function searchLogs(
+    filters: SearchFilters = {},
+    limit: number = 100,
+    cursor?: string | null
+): Promise<LogSearchPage> {
+    const params = new URLSearchParams({ limit: limit.toString() });
+
+    for (const [name, value] of Object.entries(filters)) {
+        if (value !== undefined && value !== "") {
+            params.append(name, String(value));
+        }
+    }
+    if (cursor) {
+        // Facet counts don't change between pages
+        params.append("cursor", cursor);
+        params.append("facets", "false");
+    }
+
+    const response = await fetch(
+        `http://127.0.0.1:8000/logs/search?${params.toString()}`
+    );
+
+    if (!response.ok) {
+        throw new Error("Failed to search logs");
+    }
+
+    return response.json();
+}
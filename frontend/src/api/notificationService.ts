@@ -20,6 +20,28 @@ export async function fetchNotifications(
     return response.json();
 }
 
+export interface NotificationPage {
+    items: Notification[];
+    next_cursor: string | null;
+}
+
+export async function fetchNotificationsPage(
+    limit: number = 20,
+    cursor?: string | null,
+    filters?: NotificationFilters
+): Promise<NotificationPage> {
+    const params = new URLSearchParams({ limit: limit.toString() });
+
+    if (cursor) params.append("cursor", cursor);
+    if (filters?.type) params.append("type", filters.type);
+    if (filters?.severity) params.append("severity", filters.severity);
+    if (filters?.is_read !== undefined) params.append("is_read", filters.is_read.toString());
+
+    const response = await fetch(`${API_BASE}/notifications/page?${params}`);
+    if (!response.ok) throw new Error("Failed to fetch notifications");
+    return response.json();
+}
+
 export async function fetchUnreadCount(): Promise<number> {
     const response = await fetch(`${API_BASE}/notifications/count`);
     if (!response.ok) throw new Error("Failed to fetch unread count");
@@ -30,6 +30,20 @@ export interface ModelMetrics {
     attack_predictions: number;
     normal_predictions: number;
     accuracy_estimate: number;
+    cascade_enabled: boolean;
+    escalation_rate: number | null;
+    cascade_records: number;
+    prediction_cache: {
+        hits: number;
+        misses: number;
+        deduplicated: number;
+        evictions: number;
+        expirations: number;
+        invalidations: number;
+        size: number;
+        max_size: number;
+        hit_rate: number | null;
+    } | null;
 }
 
 export interface QuickActionResponse {
@@ -38,6 +52,29 @@ export interface QuickActionResponse {
     data?: Record<string, any>;
 }
 
+export interface PurgeJob {
+    id: string;
+    state: "running" | "cancelling" | "cancelled" | "completed" | "failed";
+    phase: string | null;
+    start: string | null;
+    end: string | null;
+    logs_total: number;
+    logs_deleted: number;
+    notifications_total: number;
+    notifications_deleted: number;
+    archive_days_purged: number;
+    vacuumed: boolean;
+    error: string | null;
+    progress: number;
+    started_at: string;
+    finished_at: string | null;
+}
+
+export interface PurgeStatus {
+    running: boolean;
+    job: PurgeJob | null;
+}
+
 export async function fetchSystemHealth(): Promise<SystemHealth> {
     const response = await fetch(`${API_BASE}/system/health`);
     if (!response.ok) throw new Error("Failed to fetch system health");
@@ -50,12 +87,21 @@ export async function fetchModelMetrics(): Promise<ModelMetrics> {
     return response.json();
 }
 
-export async function exportLogs(): Promise<QuickActionResponse> {
-    const response = await fetch(`${API_BASE}/system/actions/export-logs`, {
-        method: "POST",
+export interface ExportOptions {
+    format?: "csv" | "ndjson" | "parquet";
+    compression?: "none" | "gzip" | "zstd";
+    start?: string;
+    end?: string;
+    result?: string;
+}
+
+// The export streams as a file download; the browser saves it as it arrives
+export function exportLogsUrl(options: ExportOptions = {}): string {
+    const params = new URLSearchParams();
+    Object.entries(options).forEach(([key, value]) => {
+        if (value) params.set(key, value);
     });
-    if (!response.ok) throw new Error("Failed to export logs");
-    return response.json();
+    return `${API_BASE}/logs/export?${params.toString()}`;
 }
 
 export async function clearDatabase(): Promise<QuickActionResponse> {
@@ -66,6 +112,20 @@ export async function clearDatabase(): Promise<QuickActionResponse> {
     return response.json();
 }
 
+export async function fetchPurgeStatus(): Promise<PurgeStatus> {
+    const response = await fetch(`${API_BASE}/system/purge`);
+    if (!response.ok) throw new Error("Failed to fetch purge status");
+    return response.json();
+}
+
+export async function cancelPurge(): Promise<QuickActionResponse> {
+    const response = await fetch(`${API_BASE}/system/purge/cancel`, {
+        method: "POST",
+    });
+    if (!response.ok) throw new Error("Failed to cancel purge");
+    return response.json();
+}
+
 export async function resetSettings(): Promise<QuickActionResponse> {
     const response = await fetch(`${API_BASE}/system/actions/reset-settings`, {
         method: "POST",
@@ -16,6 +16,7 @@ import {
     markAllAsRead,
     deleteNotification,
 } from '../api/notificationService';
+import { subscribeLiveEvents } from '../api/eventStream';
 import type { Notification } from '../types/notification';
 import './NotificationBell.css';
 
@@ -70,8 +71,19 @@ export default function NotificationBell() {
 
     useEffect(() => {
         loadNotifications();
-        const interval = setInterval(loadNotifications, 5000);
-        return () => clearInterval(interval);
+        // Pushed from /events instead of polling
+        return subscribeLiveEvents({
+            notification: (notification) =>
+                setNotifications((prev) =>
+                    [notification, ...prev.filter((n) => n.id !== notification.id)].slice(0, 4)
+                ),
+            notification_update: (update) =>
+                setNotifications((prev) =>
+                    prev.map((n) => (n.id === update.id ? { ...n, ...update } : n))
+                ),
+            unread_count: ({ unread_count }) => setUnreadCount(unread_count),
+            reconnect: loadNotifications,
+        });
     }, []);
 
     useEffect(() => {
@@ -219,6 +231,7 @@ export default function NotificationBell() {
                                                     <div className="notification-header">
                                                         <h4 className="notification-title">
                                                             {notification.title}
+                                                            {notification.count > 1 && ` ×${notification.count}`}
                                                         </h4>
                                                         {!notification.is_read && (
                                                             <span className="unread-dot"></span>
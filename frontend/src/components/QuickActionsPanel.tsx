@@ -7,12 +7,16 @@ import {
     FaCog,
     FaExclamationTriangle,
     FaCheck,
+    FaStop,
 } from 'react-icons/fa';
 import {
-    exportLogs,
+    exportLogsUrl,
     clearDatabase,
+    fetchPurgeStatus,
+    cancelPurge,
     resetSettings,
 } from '../api/systemService';
+import type { PurgeJob } from '../api/systemService';
 import { generateReport } from '../api/reportsService';
 import './QuickActionsPanel.css';
 
@@ -53,6 +57,7 @@ function ActionButton({
 export default function QuickActionsPanel() {
     const [exporting, setExporting] = useState(false);
     const [clearing, setClearing] = useState(false);
+    const [purge, setPurge] = useState<PurgeJob | null>(null);
     const [resetting, setResetting] = useState(false);
     const [generatingReport, setGeneratingReport] = useState(false);
     const [message, setMessage] = useState<{ type: 'success' | 'error'; text: string } | null>(null);
@@ -62,15 +67,15 @@ export default function QuickActionsPanel() {
         setTimeout(() => setMessage(null), 5000);
     };
 
-    const handleExportLogs = async () => {
+    const handleExportLogs = () => {
         setExporting(true);
         try {
-            const result = await exportLogs();
-            if (result.success) {
-                showMessage('success', `Exported ${result.data?.count} logs to CSV`);
-            } else {
-                showMessage('error', result.message);
-            }
+            const a = document.createElement('a');
+            a.href = exportLogsUrl({ format: 'csv', compression: 'gzip' });
+            document.body.appendChild(a);
+            a.click();
+            document.body.removeChild(a);
+            showMessage('success', 'Log export started (CSV, gzip)');
         } catch (error) {
             showMessage('error', 'Failed to export logs');
         } finally {
@@ -86,21 +91,47 @@ export default function QuickActionsPanel() {
         setClearing(true);
         try {
             const result = await clearDatabase();
-            if (result.success) {
+            if (!result.success) {
+                showMessage('error', result.message);
+                return;
+            }
+
+            // The purge runs in the background; follow it until it finishes
+            let job = result.data as PurgeJob;
+            while (job.state === 'running' || job.state === 'cancelling') {
+                setPurge(job);
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                const status = await fetchPurgeStatus();
+                if (!status.job) break;
+                job = status.job;
+            }
+
+            if (job.state === 'completed') {
                 showMessage(
                     'success',
-                    `Cleared ${result.data?.logs_deleted} logs and ${result.data?.notifications_deleted} notifications`
+                    `Cleared ${job.logs_deleted} logs and ${job.notifications_deleted} notifications`
                 );
+            } else if (job.state === 'cancelled') {
+                showMessage('error', `Purge cancelled after ${job.logs_deleted} logs`);
             } else {
-                showMessage('error', result.message);
+                showMessage('error', `Clear failed: ${job.error}`);
             }
         } catch (error) {
             showMessage('error', 'Failed to clear database');
         } finally {
+            setPurge(null);
             setClearing(false);
         }
     };
 
+    const handleCancelPurge = async () => {
+        try {
+            await cancelPurge();
+        } catch (error) {
+            showMessage('error', 'Failed to cancel purge');
+        }
+    };
+
     const handleResetSettings = async () => {
         if (!window.confirm('Reset all settings to defaults?')) {
             return;
@@ -174,7 +205,7 @@ export default function QuickActionsPanel() {
                 <ActionButton
                     icon={FaDownload}
                     label="Export Logs"
-                    description="Download logs as CSV"
+                    description="Download all logs as CSV"
                     onClick={handleExportLogs}
                     loading={exporting}
                     variant="primary"
@@ -192,11 +223,25 @@ export default function QuickActionsPanel() {
                 <ActionButton
                     icon={FaTrash}
                     label="Clear Database"
-                    description="Delete all logs & notifications"
+                    description={
+                        purge
+                            ? `Purging... ${purge.progress}%`
+                            : 'Delete all logs & notifications'
+                    }
                     onClick={handleClearDatabase}
                     loading={clearing}
                     variant="danger"
                 />
+
+                {purge && purge.state === 'running' && (
+                    <ActionButton
+                        icon={FaStop}
+                        label="Cancel Purge"
+                        description={`${purge.logs_deleted} of ${purge.logs_total} logs deleted`}
+                        onClick={handleCancelPurge}
+                        variant="secondary"
+                    />
+                )}
             </div>
         </div>
     );
@@ -11,6 +11,7 @@ import {
 } from 'react-icons/fa';
 import { fetchSystemHealth, fetchModelMetrics } from '../api/systemService';
 import type { SystemHealth as SystemHealthType, ModelMetrics } from '../api/systemService';
+import { subscribeLiveEvents } from '../api/eventStream';
 import './SystemHealthMonitor.css';
 
 function formatUptime(seconds: number): string {
@@ -66,8 +67,16 @@ export default function SystemHealthMonitor() {
 
     useEffect(() => {
         loadData();
-        const interval = setInterval(loadData, 10000); // Refresh every 10 seconds
-        return () => clearInterval(interval);
+        // Health samples are pushed from /events; model metrics change slowly
+        const unsubscribe = subscribeLiveEvents({ health: setHealth });
+        const interval = setInterval(
+            () => fetchModelMetrics().then(setMetrics).catch(() => {}),
+            60000
+        );
+        return () => {
+            unsubscribe();
+            clearInterval(interval);
+        };
     }, []);
 
     if (loading) {
@@ -211,6 +220,16 @@ export default function SystemHealthMonitor() {
                             <div className="health-card-sub-small">
                                 Accuracy: ~{metrics.accuracy_estimate}%
                             </div>
+                            {metrics.cascade_enabled && metrics.escalation_rate !== null && (
+                                <div className="health-card-sub-small">
+                                    Escalated to full model: {(metrics.escalation_rate * 100).toFixed(1)}%
+                                </div>
+                            )}
+                            {metrics.prediction_cache?.hit_rate != null && (
+                                <div className="health-card-sub-small">
+                                    Cache hits: {(metrics.prediction_cache.hit_rate * 100).toFixed(1)}%
+                                </div>
+                            )}
                         </>
                     )}
                 </div>
@@ -3,29 +3,28 @@ import Layout from '../components/layout/Layout';
 import SeverityBadge from '../components/SeverityBadge';
 import { calculateSeverity } from '../utils/severity';
 import { formatDate } from '../utils/dateUtils';
+import { searchLogs } from '../api/logsService';
+import type { FacetCount } from '../api/logsService';
+import type { DetectionLog } from '../types/log';
 import './Logs.css';
 
-interface DetectionLog {
-    id: number;
-    result: string;
-    confidence: number;
-    attack_type: string;
-    timestamp: string;
-    duration: number;
-    protocol_type: string;
-    service: string;
-}
-
 export default function Logs() {
     const [logs, setLogs] = useState<DetectionLog[]>([]);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState<'all' | 'ATTACK' | 'NORMAL'>('all');
+    const [resultCounts, setResultCounts] = useState<FacetCount[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    const filters = filter === 'all' ? {} : { result: filter };
 
+    // Filtered on the server; the result facet keeps counting every result
     useEffect(() => {
-        fetch('http://127.0.0.1:8000/logs?limit=100')
-            .then((res) => res.json())
-            .then((data) => {
-                setLogs(data);
+        searchLogs(filters, 100)
+            .then((page) => {
+                setLogs(page.items);
+                setNextCursor(page.next_cursor);
+                setResultCounts(page.facets?.result ?? []);
                 setLoading(false);
             })
             .catch((err) => {
@@ -33,14 +32,26 @@ export default function Logs() {
                 setLogs([]);
                 setLoading(false);
             });
-    }, []);
+    }, [filter]);
 
-    const filteredLogs = logs.filter((log) => {
-        if (filter === 'all') return true;
-        return log.result === filter;
-    });
+    // Cursor pages stay consistent while new detections arrive
+    const loadMore = () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        searchLogs(filters, 100, nextCursor)
+            .then((page) => {
+                setLogs((prev) => [...prev, ...page.items]);
+                setNextCursor(page.next_cursor);
+            })
+            .catch((err) => console.error('Failed to load more logs:', err))
+            .finally(() => setLoadingMore(false));
+    };
+
+    const countOf = (result: string) =>
+        resultCounts.find((facet) => facet.value === result)?.count ?? 0;
+    const totalCount = resultCounts.reduce((sum, facet) => sum + facet.count, 0);
 
-    const logsWithSeverity = filteredLogs.map((log) => ({
+    const logsWithSeverity = logs.map((log) => ({
         ...log,
         severity: calculateSeverity(log.confidence, log.attack_type, log.result),
     }));
@@ -65,19 +76,19 @@ export default function Logs() {
                         className={`btn ${filter === 'all' ? 'btn-primary' : ''}`}
                         onClick={() => setFilter('all')}
                     >
-                        All ({logs.length})
+                        All ({totalCount})
                     </button>
                     <button
                         className={`btn ${filter === 'ATTACK' ? 'btn-primary' : ''}`}
                         onClick={() => setFilter('ATTACK')}
                     >
-                        Attacks ({logs.filter((l) => l.result === 'ATTACK').length})
+                        Attacks ({countOf('ATTACK')})
                     </button>
                     <button
                         className={`btn ${filter === 'NORMAL' ? 'btn-primary' : ''}`}
                         onClick={() => setFilter('NORMAL')}
                     >
-                        Normal ({logs.filter((l) => l.result === 'NORMAL').length})
+                        Normal ({countOf('NORMAL')})
                     </button>
                 </div>
 
@@ -109,7 +120,7 @@ export default function Logs() {
                                     <td>
                                         <SeverityBadge severity={log.severity} size="sm" />
                                     </td>
-                                    <td>{log.protocol_type}</td>
+                                    <td>{log.protocol}</td>
                                     <td>{log.service}</td>
                                 </tr>
                             ))}
@@ -121,6 +132,14 @@ export default function Logs() {
                         </div>
                     )}
                 </div>
+
+                {nextCursor && (
+                    <div className="logs-load-more">
+                        <button className="btn" onClick={loadMore} disabled={loadingMore}>
+                            {loadingMore ? 'Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
         </Layout>
     );
@@ -258,7 +258,10 @@ export default function Notifications() {
                                             </td>
                                             <td>
                                                 <div className="table-title">
-                                                    <strong>{notification.title}</strong>
+                                                    <strong>
+                                                        {notification.title}
+                                                        {notification.count > 1 && ` ×${notification.count}`}
+                                                    </strong>
                                                     {notification.message && (
                                                         <p className="table-message">{notification.message}</p>
                                                     )}
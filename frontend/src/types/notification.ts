@@ -10,6 +10,9 @@ export interface Notification {
     is_read: boolean;
     timestamp: string;
     related_id: number | null;
+    count: number;
+    first_seen: string | null;
+    last_seen: string | null;
 }
 
 export interface NotificationFilters {
@@ -0,0 +1,84 @@
+# ===============================
+# Feature Encoder Parity Check
+# ===============================
+# Verifies that backend FeatureEncoder produces exactly the
+# matrix that ml/train_model.py's pandas encoding produces
+# (pd.get_dummies + reindex on the training columns).
+#
+# Usage (from the repo root):
+#   python ml/check_encoder_parity.py [path/to/model.pkl]
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.schemas.ids_schema import IDSInput
+from backend.services.feature_encoder import FeatureEncoder, FEATURE_DTYPE
+
+
+# ===============================
+# 1. LOAD DATASET (same layout as train_model.py)
+# ===============================
+column_names = list(IDSInput.model_fields) + ["label", "difficulty"]
+
+data = pd.read_csv("dataset/test.csv", names=column_names)
+X_raw = data.drop(["label", "difficulty"], axis=1)
+
+
+# ===============================
+# 2. REFERENCE ENCODING (train_model.py)
+# ===============================
+if len(sys.argv) > 1:
+    import joblib
+    feature_names = list(joblib.load(sys.argv[1]).feature_names_in_)
+    print("Using feature layout from model:", sys.argv[1])
+else:
+    feature_names = list(pd.get_dummies(X_raw).columns)
+    print("Using feature layout from dataset/test.csv")
+
+expected = (
+    pd.get_dummies(X_raw)
+    .reindex(columns=feature_names, fill_value=0)
+    .to_numpy(dtype=FEATURE_DTYPE)
+)
+print("Reference shape:", expected.shape)
+
+
+# ===============================
+# 3. ENCODER OUTPUT
+# ===============================
+records = [IDSInput(**row) for row in X_raw.to_dict(orient="records")]
+encoder = FeatureEncoder(feature_names)
+
+failures = 0
+
+batch = encoder.encode_many(records)
+if not np.array_equal(batch, expected):
+    rows, cols = np.nonzero(batch != expected)
+    print(f"❌ encode_many mismatch in {len(set(rows))} rows, e.g. row {rows[0]} column {feature_names[cols[0]]}")
+    failures += 1
+else:
+    print("✅ encode_many matches train_model.py encoding")
+
+
+# ===============================
+# 4. PER-REQUEST PATH (single row, as /detect did)
+# ===============================
+for i in range(0, len(records), max(1, len(records) // 500)):
+    single = (
+        pd.get_dummies(pd.DataFrame([records[i].model_dump()]))
+        .reindex(columns=feature_names, fill_value=0)
+        .to_numpy(dtype=FEATURE_DTYPE)
+    )
+    if not np.array_equal(encoder.encode(records[i]), single):
+        print(f"❌ encode mismatch on row {i}")
+        failures += 1
+        break
+else:
+    print("✅ encode matches the single-row pandas path")
+
+sys.exit(1 if failures else 0)
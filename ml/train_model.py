@@ -1,9 +1,29 @@
 # ===============================
 # NSL-KDD - IDS Model Training
 # ===============================
+# Optional: `python ml/train_model.py --stage1` (or IDS_TRAIN_STAGE1=1)
+# also trains the small first-stage model of the detection cascade
+# and reports its accuracy/latency tradeoffs on dataset/test.csv.
+#
+# Optional: IDS_TRAIN_FROM_DB_DAYS=90 adds the last 90 days of stored
+# production feature vectors (backend/services/feature_store.py) to the
+# training set. Their labels are the model's own verdicts, not ground
+# truth: unless those verdicts were reviewed, retraining on them only
+# reinforces what the current model already believes (mistakes
+# included). Test-mode detections store no vectors, so their random
+# labels are never loaded.
+
+import os
+import sys
+import time
 
 import pandas as pd
 
+TRAIN_STAGE1 = "--stage1" in sys.argv or os.getenv("IDS_TRAIN_STAGE1") == "1"
+TRAIN_FROM_DB_DAYS = int(os.getenv("IDS_TRAIN_FROM_DB_DAYS", "0"))
+STAGE1_FEATURES = 10    # most important forest features given to stage 1
+STAGE1_MAX_DEPTH = 6
+
 
 # ===============================
 # 1. DEFINE COLUMN NAMES
@@ -30,6 +50,18 @@ column_names = [
 train_data = pd.read_csv("dataset/train.csv", names=column_names)
 test_data = pd.read_csv("dataset/test.csv", names=column_names)
 
+if TRAIN_FROM_DB_DAYS > 0:
+    from datetime import datetime, timedelta
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    from backend.services.feature_store import feature_frame, load_features
+
+    now = datetime.utcnow()
+    production = feature_frame(load_features(now - timedelta(days=TRAIN_FROM_DB_DAYS), now))
+    production["difficulty"] = 0
+    print(f"Adding {len(production)} stored production records from the last {TRAIN_FROM_DB_DAYS} days")
+    train_data = pd.concat([train_data, production[column_names]], ignore_index=True)
+
 
 # ===============================
 # 3. DROP UNUSED COLUMN
@@ -128,12 +160,77 @@ print("\nClassification Report:")
 print(classification_report(y_test, y_pred))
 
 
+# ===============================
+# 10. OPTIONAL: STAGE-1 CASCADE MODEL
+# ===============================
+# A shallow tree on the forest's top features. The API keeps its
+# answer when its confidence reaches IDS_CASCADE_MARGIN and asks
+# the full forest otherwise.
+
+def per_record_latency_us(predict, X, repeat=3):
+    """Best-of-N batch time per record, plus median single-record time."""
+    batch = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        batch = min(batch, time.perf_counter() - start)
+
+    singles = []
+    for i in range(min(200, len(X))):
+        row = X.iloc[[i]]
+        start = time.perf_counter()
+        predict(row)
+        singles.append(time.perf_counter() - start)
+    singles.sort()
+    return batch / len(X) * 1e6, singles[len(singles) // 2] * 1e6
+
+
+stage1 = None
+if TRAIN_STAGE1:
+    from sklearn.tree import DecisionTreeClassifier
+
+    importances = pd.Series(model.feature_importances_, index=X_train.columns)
+    stage1_columns = list(importances.sort_values(ascending=False).index[:STAGE1_FEATURES])
+
+    stage1 = DecisionTreeClassifier(max_depth=STAGE1_MAX_DEPTH, random_state=42)
+    print(f"\nTraining stage-1 model on {stage1_columns}...")
+    stage1.fit(X_train[stage1_columns], y_train)
+
+    X_test_stage1 = X_test[stage1_columns]
+    full_proba = model.predict_proba(X_test)
+    stage1_proba = stage1.predict_proba(X_test_stage1)
+    stage1_confidence = stage1_proba.max(axis=1)
+    full_pred = model.classes_[full_proba.argmax(axis=1)]
+    stage1_pred = stage1.classes_[stage1_proba.argmax(axis=1)]
+
+    full_batch_us, full_single_us = per_record_latency_us(model.predict_proba, X_test)
+    stage1_batch_us, stage1_single_us = per_record_latency_us(stage1.predict_proba, X_test_stage1)
+
+    print("\n===============================")
+    print("CASCADE TRADEOFFS (dataset/test.csv)")
+    print("===============================")
+    print(f"\nFull forest : accuracy {accuracy_score(y_test, full_pred):.4f}, "
+          f"{full_batch_us:.1f} µs/record batched, {full_single_us:.0f} µs single")
+    print(f"Stage 1     : accuracy {accuracy_score(y_test, stage1_pred):.4f}, "
+          f"{stage1_batch_us:.1f} µs/record batched, {stage1_single_us:.0f} µs single")
+
+    print(f"\n{'margin':>8} {'escalated':>10} {'accuracy':>9} {'µs/record':>10} {'single µs':>10}")
+    for margin in [0.8, 0.9, 0.95, 0.98, 0.99, 0.999, 1.0]:
+        escalate = stage1_confidence < margin
+        cascade_pred = stage1_pred.copy()
+        cascade_pred[escalate] = full_pred[escalate]
+        rate = escalate.mean()
+        # Expected cost: everyone pays stage 1, escalated records also pay the forest
+        print(f"{margin:>8} {rate:>10.1%} {accuracy_score(y_test, cascade_pred):>9.4f} "
+              f"{stage1_batch_us + rate * full_batch_us:>10.1f} "
+              f"{stage1_single_us + rate * full_single_us:>10.0f}")
+
+
 # ===============================
 # 11. SAVE MODEL
 # ===============================
 
 import joblib
-import os
 
 print("\nSaving model...")
 
@@ -144,3 +241,6 @@ joblib.dump(model, "model/ids_model.pkl")
 
 print("Model saved successfully at model/ids_model.pkl")
 
+if stage1 is not None:
+    joblib.dump(stage1, "model/ids_stage1.pkl")
+    print("Stage-1 model saved at model/ids_stage1.pkl (set IDS_CASCADE_MARGIN to tune escalation)")